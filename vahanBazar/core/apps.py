@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.core.signals import request_started
+
+        from core import signals  # noqa: F401
+        from core.services.suggest_service import warm_suggest_index
+
+        # Not here directly: management commands such as migrate must not
+        # read the catalogue, and ready() must not query the database
+        request_started.connect(warm_suggest_index)
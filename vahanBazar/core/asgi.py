@@ -0,0 +1,73 @@
+import asyncio
+import io
+
+from corsheaders.middleware import CorsMiddleware
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, JsonResponse
+
+from core.views.event_views import STREAM_HEADERS, UNAUTHORIZED, open_stream
+
+EVENT_STREAM_PATH = '/api/events/'
+
+_cors = CorsMiddleware(lambda request: None)
+
+
+async def _start(send, request, response):
+    """Send the status line and headers of `response`, with the CORS headers."""
+    _cors.add_response_headers(request, response)
+    await send({
+        'type': 'http.response.start',
+        'status': response.status_code,
+        'headers': [(name.encode('latin1'), value.encode('latin1')) for name, value in response.items()],
+    })
+
+
+async def _respond(send, request, response):
+    await _start(send, request, response)
+    await send({'type': 'http.response.body', 'body': response.content})
+
+
+async def serve_event_stream(scope, receive, send):
+    """
+    /api/events/ as a bare ASGI app. Django's handler runs its sync
+    request_started receivers in a thread it keeps for the whole request,
+    which for a stream is the whole connection; here an idle subscriber is
+    only a coroutine waiting on its queue.
+    """
+    request = ASGIRequest(scope, io.BytesIO())
+    if scope['method'] != 'GET':
+        return await _respond(send, request, JsonResponse({"detail": "Method not allowed"}, status=405))
+    stream = await open_stream(request)
+    if stream is None:
+        return await _respond(send, request, JsonResponse(UNAUTHORIZED, status=401))
+
+    await _start(send, request, HttpResponse(headers=STREAM_HEADERS))
+
+    async def pump():
+        async for chunk in stream:
+            await send({'type': 'http.response.body', 'body': chunk.encode(), 'more_body': True})
+
+    async def wait_for_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(wait_for_disconnect())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await stream.aclose()
+
+
+class EventStreamRouter:
+    """ASGI app serving the event stream itself and everything else through Django."""
+
+    def __init__(self, django_application):
+        self.django_application = django_application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == EVENT_STREAM_PATH:
+            return await serve_event_stream(scope, receive, send)
+        return await self.django_application(scope, receive, send)
@@ -0,0 +1,67 @@
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from core.services.search_service import search_vehicles
+from core.services.spec_service import get_numeric_spec_keys, is_number, parse_number
+
+
+class SpecFilterBackend(BaseFilterBackend):
+    """
+    Filter vehicles on their specs through `spec_index`.
+
+    `?spec__Fuel Type=Petrol` is a JSON containment test served by the GIN
+    index; repeating the parameter ORs the values. `?spec__engine_cc__gte=150`
+    is a range test on one of the hot numeric keys in SPEC_NUMERIC_KEYS, each of
+    which has its own expression index.
+    """
+    param_prefix = 'spec__'
+    range_lookups = ('gt', 'gte', 'lt', 'lte')
+
+    def filter_queryset(self, request, queryset, view):
+        numeric_keys = get_numeric_spec_keys()
+
+        for param, values in request.query_params.lists():
+            if not param.startswith(self.param_prefix):
+                continue
+            key = param[len(self.param_prefix):]
+            name, _, lookup = key.rpartition('__')
+
+            if name and lookup in self.range_lookups:
+                if name not in numeric_keys:
+                    raise ValidationError({
+                        param: f"Range filters are only supported on: {', '.join(sorted(numeric_keys))}"
+                    })
+                number = parse_number(values[-1])
+                if number is None:
+                    raise ValidationError({param: "A number is required"})
+                queryset = queryset.filter(**{f'spec_index__{name}__{lookup}': number})
+                continue
+
+            condition = Q()
+            for value in values:
+                condition |= Q(spec_index__contains={key: value})
+                if is_number(value):
+                    condition |= Q(spec_index__contains={key: parse_number(value)})
+            queryset = queryset.filter(condition)
+
+        return queryset
+
+
+class VehicleSearchFilter(BaseFilterBackend):
+    """
+    `?search=` over the maintained tsvector and trigram document, ordered by
+    relevance unless the client asked for an explicit `ordering`. Must run
+    after OrderingFilter so the rank ordering is not replaced by the default.
+    """
+    search_param = 'search'
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+        queryset = search_vehicles(queryset, term)
+        if self.ordering_param not in request.query_params and 'rank' in queryset.query.annotations:
+            queryset = queryset.order_by('-rank', '-id')
+        return queryset
@@ -0,0 +1,59 @@
+import json
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.models import VehicleModel
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer, orjson
+from core.serializers.vehicle_serializers import VehicleModelSerializer
+
+
+class Command(BaseCommand):
+    help = "Compare stdlib and orjson rendering/parsing of the vehicle list payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help="Vehicles in the payload")
+        parser.add_argument('--repeat', type=int, default=200, help="Iterations per timing")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; FastJSONRenderer uses stdlib json"))
+
+        request = Request(APIRequestFactory().get('/api/vehicles/'))
+        queryset = VehicleModelSerializer.setup_eager_loading(VehicleModel.objects.all())[:options['limit']]
+        data = VehicleModelSerializer(queryset, many=True, context={'request': request}).data
+        if not data:
+            raise CommandError("No vehicles to serialize; add some data first")
+
+        repeat = options['repeat']
+        stdlib, fast = JSONRenderer(), FastJSONRenderer()
+        body = stdlib.render(data)
+        if json.loads(fast.render(data)) != json.loads(body):
+            raise CommandError("FastJSONRenderer output is not equal to JSONRenderer's")
+
+        self.stdout.write(f"{len(data)} vehicles, {len(body)} bytes, {repeat} iterations")
+        self.report('render', self.time(lambda: stdlib.render(data), repeat), self.time(lambda: fast.render(data), repeat))
+
+        self.report(
+            'parse',
+            self.time(lambda: JSONParser().parse(BytesIO(body)), repeat),
+            self.time(lambda: FastJSONParser().parse(BytesIO(body)), repeat),
+        )
+
+    def time(self, func, repeat):
+        func()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    def report(self, label, stdlib_ms, fast_ms):
+        self.stdout.write(
+            f"{label:<7} stdlib {stdlib_ms:8.3f} ms   fast {fast_ms:8.3f} ms   x{stdlib_ms / fast_ms:.1f}"
+        )
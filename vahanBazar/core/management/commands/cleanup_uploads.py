@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import UploadSession
+from core.services.upload_service import discard_upload
+
+
+class Command(BaseCommand):
+    help = "Delete resumable upload sessions that were never finalized"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=settings.UPLOAD_SESSION_TTL_HOURS)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = UploadSession.objects.filter(status="PENDING", updated_at__lt=cutoff)
+        count = 0
+        for session in stale.iterator():
+            discard_upload(session)
+            count += 1
+        self.stdout.write(f"Removed {count} abandoned upload(s)")
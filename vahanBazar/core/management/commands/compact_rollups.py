@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.services.rollup_service import compact_rollups
+
+
+class Command(BaseCommand):
+    help = "Recount the daily dealer rollups from the source tables (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=2,
+            help="Recount this many days up to today (default: yesterday and today)",
+        )
+        parser.add_argument(
+            '--since', type=date.fromisoformat,
+            help="Recount from this date (YYYY-MM-DD) instead, e.g. to backfill",
+        )
+        parser.add_argument('--chunk-days', type=int, default=31, help="Days recounted per transaction")
+
+    def handle(self, *args, **options):
+        end = timezone.localdate()
+        start = options['since'] or end - timedelta(days=options['days'] - 1)
+        written = deleted = 0
+        while start <= end:
+            chunk_end = min(start + timedelta(days=options['chunk_days'] - 1), end)
+            chunk_written, chunk_deleted = compact_rollups(start, chunk_end)
+            written += chunk_written
+            deleted += chunk_deleted
+            start = chunk_end + timedelta(days=1)
+        self.stdout.write(self.style.SUCCESS(f"Updated {written} rollup row(s), removed {deleted} empty row(s)"))
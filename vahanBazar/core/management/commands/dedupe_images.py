@@ -0,0 +1,182 @@
+import os
+import time
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from core.models import ImageBlob, VehicleImage
+from core.services.blob_service import acquire_blobs
+from core.services.image_service import hash_file
+from core.services.rendition_service import rendition_paths
+from core.storage import BLOB_DIR, blob_digest, blob_storage, is_blob_name
+
+LEGACY_DIR = 'vehicles'
+# Blob files this young may belong to a save whose row is not committed yet
+ORPHAN_GRACE_SECONDS = 60 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        "Move vehicle images into content-addressed storage, merge duplicate "
+        "files and recount blob references"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing")
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.storage = blob_storage()
+        self.freed = 0
+        self.stored = set()
+
+        moved = self.move_rows(options['batch_size'])
+        linked = self.link_loose_files()
+        if self.dry_run:
+            self.stdout.write(
+                f"Would move {moved} image row(s) and link {linked} loose file(s), "
+                f"freeing about {self.freed} bytes"
+            )
+            return
+        removed = self.recount()
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {moved} image row(s), linked {linked} loose file(s), "
+            f"removed {removed} unreferenced blob(s); freed {self.freed} bytes"
+        ))
+
+    def store(self, name, file, digest):
+        """Blob name for `file`, storing it unless an identical blob exists."""
+        blob = self.storage.blob_name(digest, name)
+        if blob in self.stored or self.storage.exists(blob):
+            self.freed += file.size
+        elif not self.dry_run:
+            self.storage.save(name, file)
+        self.stored.add(blob)
+        return blob
+
+    def move_rows(self, batch_size):
+        """Point rows at blobs and delete the per-row files they replace."""
+        legacy = VehicleImage.objects.exclude(image__startswith=f'{BLOB_DIR}/').order_by('id')
+        image_ids = list(legacy.values_list('id', flat=True))
+        # Renditions are per file; the first set seen for a blob is kept
+        blob_renditions = {}
+        moved = 0
+        for start in range(0, len(image_ids), batch_size):
+            batch = VehicleImage.objects.filter(id__in=image_ids[start:start + batch_size]).order_by('id')
+            updates, obsolete = [], []
+            for image in batch:
+                old_name = image.image.name
+                if not old_name or not default_storage.exists(old_name):
+                    self.stderr.write(f"Image {image.pk}: file {old_name!r} is missing, skipped")
+                    continue
+                with default_storage.open(old_name, 'rb') as file:
+                    digest = hash_file(file)
+                    blob = self.store(old_name, file, digest)
+
+                if blob not in blob_renditions:
+                    shared = (
+                        VehicleImage.objects.filter(image=blob, renditions__contains={'source': blob})
+                        .values_list('renditions', flat=True).first()
+                    )
+                    if shared:
+                        blob_renditions[blob] = shared
+                if blob in blob_renditions:
+                    obsolete.extend(rendition_paths(image))
+                    renditions = blob_renditions[blob]
+                elif image.renditions:
+                    renditions = blob_renditions[blob] = {**image.renditions, 'source': blob}
+                else:
+                    renditions = {}
+
+                image.image.name = blob
+                image.content_hash = digest
+                image.renditions = renditions
+                updates.append(image)
+                obsolete.append(old_name)
+                moved += 1
+
+            if self.dry_run or not updates:
+                continue
+            with transaction.atomic():
+                VehicleImage.objects.bulk_update(updates, ['image', 'content_hash', 'renditions'])
+            for path in obsolete:
+                default_storage.delete(path)
+        return moved
+
+    def link_loose_files(self):
+        """
+        Files under vehicles/ that no row uses were handed out by URL (the
+        upload endpoint), so they stay where they are but become hard links
+        to a pinned blob, sharing its disk space.
+        """
+        root = default_storage.path(LEGACY_DIR)
+        if not os.path.isdir(root):
+            return 0
+        referenced = set(VehicleImage.objects.values_list('image', flat=True))
+        skip = {os.path.join(root, 'renditions')}
+        linked = 0
+        for directory, subdirectories, filenames in os.walk(root):
+            subdirectories[:] = [name for name in subdirectories if os.path.join(directory, name) not in skip]
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, default_storage.location).replace(os.sep, '/')
+                if name in referenced:
+                    continue
+                with default_storage.open(name, 'rb') as file:
+                    digest = hash_file(file)
+                    blob = self.storage.blob_name(digest, name)
+                    if self.storage.exists(blob) and os.path.samefile(self.storage.path(blob), path):
+                        continue
+                    self.store(name, file, digest)
+                if self.dry_run:
+                    linked += 1
+                    continue
+                acquire_blobs([blob], pinned=True)
+                temporary = f'{path}.link'
+                os.link(self.storage.path(blob), temporary)
+                os.replace(temporary, path)
+                linked += 1
+        return linked
+
+    def recount(self):
+        """Rebuild reference counts from the rows; delete blobs nothing uses."""
+        counts = dict(
+            VehicleImage.objects.filter(image__startswith=f'{BLOB_DIR}/')
+            .values_list('image').annotate(total=Count('id')).values_list('image', 'total')
+        )
+        blobs = [
+            ImageBlob(name=name, sha256=blob_digest(name), size=self.storage.size(name), ref_count=total)
+            for name, total in counts.items() if self.storage.exists(name)
+        ]
+        with transaction.atomic():
+            ImageBlob.objects.bulk_create(
+                blobs, update_conflicts=True, unique_fields=['name'], update_fields=['ref_count', 'size'],
+            )
+            ImageBlob.objects.exclude(name__in=list(counts)).update(ref_count=0)
+            unused = list(
+                ImageBlob.objects.select_for_update()
+                .filter(ref_count=0, pinned=False).values_list('name', flat=True)
+            )
+            ImageBlob.objects.filter(name__in=unused).delete()
+
+        known = set(ImageBlob.objects.values_list('name', flat=True))
+        removed = 0
+        for name in unused:
+            self.freed += self.storage.size(name) if self.storage.exists(name) else 0
+            self.storage.delete(name)
+            removed += 1
+
+        # Files left behind without a row, e.g. by an interrupted request
+        cutoff = time.time() - ORPHAN_GRACE_SECONDS
+        for directory, _, filenames in os.walk(self.storage.path(BLOB_DIR)):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.storage.location).replace(os.sep, '/')
+                if is_blob_name(name) and name not in known and os.path.getmtime(path) < cutoff:
+                    self.freed += os.path.getsize(path)
+                    os.remove(path)
+                    removed += 1
+        return removed
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.models import VehicleImage
+from core.services.rendition_service import generate_for_ids
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnail/card/detail renditions for existing vehicle images"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehicle', type=int, action='append', help="Only this vehicle (repeatable)")
+        parser.add_argument('--force', action='store_true', help="Regenerate images that already have renditions")
+        parser.add_argument('--batch-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        images = VehicleImage.objects.order_by('id')
+        if options['vehicle']:
+            images = images.filter(vehicle_id__in=options['vehicle'])
+        image_ids = list(images.values_list('id', flat=True))
+
+        batch_size = options['batch_size']
+        generated, failed = 0, []
+        for start in range(0, len(image_ids), batch_size):
+            batch_generated, batch_failed = generate_for_ids(image_ids[start:start + batch_size], force=options['force'])
+            generated += batch_generated
+            failed += batch_failed
+            self.stdout.write(f"{min(start + batch_size, len(image_ids))}/{len(image_ids)} images checked")
+        if failed:
+            self.stderr.write(f"Failed for image(s): {', '.join(map(str, failed))}")
+        self.stdout.write(self.style.SUCCESS(f"Generated renditions for {generated} image(s)"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.models import BranchSlotConfig
+from core.services.slot_service import generate_slots
+
+
+class Command(BaseCommand):
+    help = "Extend every branch's test-ride slots to its booking horizon (run daily)"
+
+    def handle(self, *args, **options):
+        created = 0
+        for config in BranchSlotConfig.objects.iterator():
+            count, overbooked = generate_slots(config)
+            created += count
+            for slot in overbooked:
+                self.stderr.write(
+                    f"Branch {config.branch_id} {slot['date']} {slot['start_time']:%H:%M}: "
+                    f"{slot['booked']} booked, capacity {slot['capacity']}"
+                )
+        self.stdout.write(self.style.SUCCESS(f"Created {created} slot(s)"))
@@ -0,0 +1,48 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from core.models import Dealership
+from core.services.import_service import IMPORT_BATCH_SIZE, import_catalogue
+
+
+class Command(BaseCommand):
+    help = "Import a dealership's vehicles from a CSV or XLSX file (same columns as POST /api/dealer/import/)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--dealership', type=int, required=True, help="Dealership id")
+        parser.add_argument('--dry-run', action='store_true', help="Validate and report without writing")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help="Rows written per transaction")
+
+    def handle(self, *args, **options):
+        dealership = Dealership.objects.filter(pk=options['dealership']).first()
+        if dealership is None:
+            raise CommandError(f"No dealership {options['dealership']}")
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as file:
+                report = import_catalogue(
+                    dealership, file, os.path.basename(options['path']),
+                    dry_run=options['dry_run'], batch_size=options['batch_size'],
+                )
+        except OSError as error:
+            raise CommandError(str(error))
+        except ValidationError as error:
+            raise CommandError(' '.join(str(message) for message in error.detail.values()))
+
+        for entry in report['errors']:
+            messages = '; '.join(f"{column}: {message}" for column, message in entry['errors'].items())
+            self.stderr.write(f"Row {entry['row']}: {messages}")
+        if report['error_count'] > len(report['errors']):
+            self.stderr.write(f"... and {report['error_count'] - len(report['errors'])} more invalid row(s)")
+        if report['ignored_columns']:
+            self.stderr.write(f"Ignored column(s): {', '.join(report['ignored_columns'])}")
+        created = ', '.join(f"{count} {kind.replace('_', ' ')}" for kind, count in report['created'].items())
+        verb = "Would create" if report['dry_run'] else "Created"
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['rows']} row(s) read, {report['error_count']} invalid. {verb} {created} "
+            f"in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,108 @@
+import asyncio
+import json
+import resource
+import statistics
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.asgi import EventStreamRouter
+from core.models import User
+from core.services.event_service import get_broker
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many concurrent /api/events/ streams against the ASGI application "
+        "in this process and measure how fast published events reach all of them"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subscribers', type=int, default=2000)
+        parser.add_argument('--events', type=int, default=5, help="Events published once everyone is connected")
+        parser.add_argument('--username', help="User the streams authenticate as (default: the first user)")
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('id')
+        user = users.filter(username=options['username']).first() if options['username'] else users.first()
+        if user is None:
+            raise CommandError("No such user; create one or pass --username")
+        asyncio.run(self.run(user, options['subscribers'], options['events']))
+
+    async def run(self, user, subscribers, events):
+        # The same stack as vahanBazar/asgi.py
+        application = EventStreamRouter(get_asgi_application())
+        headers = [
+            (b'host', b'localhost'),
+            (b'authorization', f'Bearer {AccessToken.for_user(user)}'.encode()),
+            (b'accept', b'text/event-stream'),
+        ]
+        disconnect = asyncio.Event()
+        connected = []
+        latencies = {sequence: [] for sequence in range(events)}
+
+        async def subscriber(number):
+            requested = False
+
+            async def receive():
+                nonlocal requested
+                if not requested:
+                    requested = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                if message['type'] == 'http.response.start' and message['status'] != 200:
+                    self.stderr.write(f"Subscriber {number}: HTTP {message['status']}")
+                body = message.get('body', b'')
+                if body.startswith(b'retry:'):
+                    connected.append(time.perf_counter())
+                elif b'event: ping' in body:
+                    data = json.loads(body.split(b'data: ', 1)[1])
+                    latencies[data['sequence']].append(time.perf_counter() - data['sent'])
+
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': '/api/events/', 'raw_path': b'/api/events/', 'query_string': b'',
+                'root_path': '', 'headers': headers, 'client': ('127.0.0.1', 10000 + number),
+                'server': ('localhost', 80),
+            }
+            await application(scope, receive, send)
+
+        memory_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(subscriber(number)) for number in range(subscribers)]
+        while len(connected) < subscribers and not all(task.done() for task in tasks):
+            await asyncio.sleep(0.05)
+        connect_seconds = time.perf_counter() - started
+        self.stdout.write(
+            f"{len(connected)}/{subscribers} streams open in {connect_seconds:.2f}s; "
+            f"{threading.active_count()} threads, max RSS grew by "
+            f"{(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - memory_before) / 1024:.1f} MiB"
+        )
+
+        broker = get_broker()
+        for sequence in range(events):
+            # PostgresBroker publishes with a query, so not on the event loop
+            await sync_to_async(broker.publish)({
+                'users': [user.pk], 'event': 'ping', 'data': {'sequence': sequence, 'sent': time.perf_counter()},
+            })
+            deadline = time.perf_counter() + 10
+            while len(latencies[sequence]) < len(connected) and time.perf_counter() < deadline:
+                await asyncio.sleep(0.01)
+            delays = sorted(latencies[sequence]) or [0]
+            self.stdout.write(
+                f"Event {sequence}: {len(latencies[sequence])} delivered, "
+                f"p50 {statistics.median(delays) * 1000:.1f}ms, "
+                f"p99 {delays[int(len(delays) * 0.99) - 1 if len(delays) > 1 else 0] * 1000:.1f}ms, "
+                f"max {delays[-1] * 1000:.1f}ms"
+            )
+
+        disconnect.set()
+        await asyncio.wait(tasks, timeout=30)
+        self.stdout.write(self.style.SUCCESS(f"Closed {sum(task.done() for task in tasks)} stream(s)"))
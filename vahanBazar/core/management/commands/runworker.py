@@ -0,0 +1,95 @@
+import os
+import signal
+import socket
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.services.event_service import LocalBroker, get_broker
+from core.services.job_service import JOB_TYPES, work
+
+
+class Command(BaseCommand):
+    help = "Run background jobs from the database queue until stopped (SIGTERM/SIGINT finish the current jobs)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes to fork")
+        parser.add_argument('--threads', type=int, default=2, help="Threads per process, each running one job at a time")
+        parser.add_argument('--kind', action='append', dest='kinds', help="Only run jobs of this kind (repeatable)")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument('--burst', action='store_true', help="Exit once no job is due")
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1 or options['threads'] < 1:
+            raise CommandError("--processes and --threads must be at least 1")
+        unknown = set(options['kinds'] or ()) - set(JOB_TYPES)
+        if unknown:
+            raise CommandError(f"Unknown job kind(s): {', '.join(sorted(unknown))}")
+        if type(get_broker()) is LocalBroker:
+            self.stderr.write(self.style.WARNING(
+                "EVENT_BROKER is LocalBroker: events published by jobs (e.g. price alerts) "
+                "will not reach the servers' event streams"
+            ))
+
+        if options['processes'] == 1:
+            processed = self.run_process(options)
+            self.stdout.write(self.style.SUCCESS(f"Ran {processed} job(s)"))
+            return
+
+        # Children must not share the parent's database connections
+        connections.close_all()
+        children = []
+        for _ in range(options['processes']):
+            pid = os.fork()
+            if pid == 0:
+                code = 0
+                try:
+                    self.run_process(options)
+                except BaseException:
+                    code = 1
+                    raise
+                finally:
+                    os._exit(code)
+            children.append(pid)
+
+        def forward(signum, frame):
+            for pid in children:
+                try:
+                    os.kill(pid, signum)
+                except ProcessLookupError:
+                    pass
+
+        signal.signal(signal.SIGTERM, forward)
+        signal.signal(signal.SIGINT, forward)
+        failed = 0
+        for pid in children:
+            _, status = os.waitpid(pid, 0)
+            failed += os.waitstatus_to_exitcode(status) != 0
+        if failed:
+            raise CommandError(f"{failed} worker process(es) exited with an error")
+        self.stdout.write(self.style.SUCCESS(f"{len(children)} worker process(es) stopped"))
+
+    def run_process(self, options):
+        """Run the worker threads of this process; returns the jobs they ran."""
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+        name = f'{socket.gethostname()}:{os.getpid()}'
+        counts = []
+
+        def run(number):
+            counts.append(work(
+                f'{name}:{number}', stop, kinds=options['kinds'],
+                poll_interval=options['poll_interval'], burst=options['burst'],
+            ))
+
+        threads = [threading.Thread(target=run, args=(number,), name=f'worker-{number}') for number in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Worker {name} running {len(threads)} thread(s)")
+        # Joined with a timeout so the main thread keeps handling signals
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(1)
+        return sum(counts)
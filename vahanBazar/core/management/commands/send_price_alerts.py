@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.services.price_alert_service import send_price_alerts
+
+
+class Command(BaseCommand):
+    help = "Notify wishlisters of pending price drops now (runworker does this after each change)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Pending price changes picked per batch")
+
+    def handle(self, *args, **options):
+        processed = sent = 0
+        while True:
+            batch, batch_sent = send_price_alerts(options['batch_size'])
+            if not batch:
+                break
+            processed += batch
+            sent += batch_sent
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} price change(s), sent {sent} notification(s)"))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_wishlistitem'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=models.Index(fields=['created_at', 'id'], name='vehicle_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=models.Index(fields=['price', 'id'], name='vehicle_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=models.Index(fields=['dealer', 'created_at', 'id'], name='vehicle_dealer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['created_at', 'id'], name='vehicle_featured_created_idx'),
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:28
+
+import re
+
+import django.contrib.postgres.indexes
+import django.db.models.fields.json
+from django.db import migrations, models
+
+QUANTITY_RE = re.compile(r'(-?\d+(?:,\d{3})*(?:\.\d+)?)\s*([a-zA-Z/]+)?')
+FULL_NUMBER_RE = re.compile(r'^\s*-?\d+(?:\.\d+)?\s*$')
+
+# SPEC_NUMERIC_KEYS and the unit table of core.services.spec_service when
+# this migration was written; only the factors to each canonical unit matter
+NUMERIC_KEYS = {
+    'engine_cc': ['Displacement (cc)', 'Displacement', 'Engine CC', 'Engine'],
+    'mileage': ['Mileage'],
+    'range': ['Range'],
+    'top_speed': ['Top Speed', 'Max Speed'],
+    'power': ['Power', 'Motor Power'],
+    'kerb_weight': ['Kerb Weight'],
+}
+UNITS = {
+    'cc': 1, 'ml': 1, 'cm3': 1, 'l': 1000, 'ltr': 1000, 'litre': 1000, 'litres': 1000,
+    'liter': 1000, 'liters': 1000,
+    'bhp': 1, 'hp': 1, 'ps': 0.98632, 'kw': 1.34102, 'w': 0.00134102,
+    'nm': 1, 'kgm': 9.80665,
+    'kmph': 1, 'km/h': 1, 'kmh': 1, 'mph': 1.609344,
+    'kmpl': 1, 'km/l': 1, 'km/ltr': 1,
+    'km': 1, 'kms': 1, 'mi': 1.609344, 'miles': 1.609344,
+    'mm': 1, 'cm': 10, 'm': 1000, 'in': 25.4, 'inch': 25.4, 'inches': 25.4,
+    'kg': 1, 'kgs': 1, 'g': 0.001,
+    'kwh': 1, 'wh': 0.001,
+    'h': 1, 'hr': 1, 'hrs': 1, 'hours': 1, 'min': 1 / 60, 'mins': 1 / 60, 'minutes': 1 / 60,
+}
+
+
+def flatten(specs):
+    if not isinstance(specs, dict):
+        return
+    for key, value in specs.items():
+        if isinstance(value, dict):
+            yield from flatten(value)
+        else:
+            yield key, value
+
+
+def index_number(value):
+    """A spec value in its canonical unit ("0.11 L" is 110 cc), or None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    elif isinstance(value, str):
+        matches = list(QUANTITY_RE.finditer(value))
+        match = next((match for match in matches if (match.group(2) or '').lower() in UNITS), None)
+        if match is not None:
+            number = round(float(match.group(1).replace(',', '')) * UNITS[match.group(2).lower()], 4)
+        elif FULL_NUMBER_RE.match(value):
+            number = float(value)
+        else:
+            return None
+    else:
+        return None
+    return int(number) if number.is_integer() else number
+
+
+def build_spec_index(*spec_dicts):
+    """core.services.spec_service.build_spec_index as of this migration."""
+    merged = {}
+    for specs in spec_dicts:
+        for key, value in flatten(specs):
+            if value not in (None, ''):
+                merged[key] = value
+    index = dict(merged)
+    for slug, aliases in NUMERIC_KEYS.items():
+        for alias in aliases:
+            number = index_number(merged.get(alias))
+            if number is not None:
+                index[slug] = number
+                break
+    return index
+
+
+def populate_spec_index(apps, schema_editor):
+    VehicleModel = apps.get_model('core', 'VehicleModel')
+    vehicles = list(VehicleModel.objects.select_related('variant').only('specs', 'variant__specs', 'spec_index'))
+    for vehicle in vehicles:
+        variant_specs = vehicle.variant.specs if vehicle.variant_id else {}
+        # Variant specs override the model's, as in the comparison
+        vehicle.spec_index = build_spec_index(vehicle.specs, variant_specs)
+    VehicleModel.objects.bulk_update(vehicles, ['spec_index'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_vehiclemodel_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehiclemodel',
+            name='spec_index',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(populate_spec_index, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['spec_index'], name='vehicle_spec_index_gin', opclasses=['jsonb_path_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=models.Index(django.db.models.fields.json.KeyTransform('engine_cc', 'spec_index'), name='vehicle_spec_engine_cc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=models.Index(django.db.models.fields.json.KeyTransform('mileage', 'spec_index'), name='vehicle_spec_mileage_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=models.Index(django.db.models.fields.json.KeyTransform('range', 'spec_index'), name='vehicle_spec_range_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=models.Index(django.db.models.fields.json.KeyTransform('top_speed', 'spec_index'), name='vehicle_spec_top_speed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=models.Index(django.db.models.fields.json.KeyTransform('power', 'spec_index'), name='vehicle_spec_power_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=models.Index(django.db.models.fields.json.KeyTransform('kerb_weight', 'spec_index'), name='vehicle_spec_kerb_weight_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:31
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import CharField, OuterRef, Subquery, Value
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Coalesce, Concat, Lower
+
+# search_service.refresh_search_index when this migration was written
+SEARCH_CONFIG = 'simple'
+SEARCH_SPEC_KEYS = ['Fuel Type', 'Engine', 'Transmission', 'Motor Type', 'Battery Type']
+
+
+def populate_search_index(apps, schema_editor):
+    VehicleModel = apps.get_model('core', 'VehicleModel')
+    Brand = apps.get_model('core', 'Brand')
+    Variant = apps.get_model('core', 'VehicleModelVariant')
+    brand_name = Subquery(Brand.objects.filter(pk=OuterRef('brand_id')).values('name')[:1])
+    variant_name = Subquery(Variant.objects.filter(pk=OuterRef('variant_id')).values('name')[:1])
+    spec_values = [KeyTextTransform(key, 'spec_index') for key in SEARCH_SPEC_KEYS]
+    search_vector = (
+        SearchVector('name', 'model_name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(brand_name, variant_name, weight='B', config=SEARCH_CONFIG)
+        + SearchVector(*spec_values, weight='C', config=SEARCH_CONFIG)
+    )
+    search_document = Lower(Concat(
+        *[
+            piece
+            for part in ('name', 'model_name', brand_name, variant_name)
+            for piece in (Coalesce(part, Value(''), output_field=CharField()), Value(' '))
+        ],
+        output_field=CharField(),
+    ))
+    VehicleModel.objects.update(search_vector=search_vector, search_document=search_document)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_vehiclemodel_spec_index'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='vehiclemodel',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='vehiclemodel',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_search_index, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='vehicle_search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_document'], name='vehicle_search_trgm_gin', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:36
+
+import django.db.models.expressions
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_vehiclemodel_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='inventoryitem',
+            name='effective_price',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.functions.comparison.Greatest(models.Case(models.When(discount_type='percentage', discount_value__isnull=False, then=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('price'), '*', django.db.models.expressions.CombinedExpression(models.Value(100, output_field=models.DecimalField(decimal_places=2, max_digits=12)), '-', models.F('discount_value'))), '/', models.Value(100, output_field=models.DecimalField(decimal_places=2, max_digits=12)))), models.When(discount_type__in=['fixed', 'cashback'], discount_value__isnull=False, then=django.db.models.expressions.CombinedExpression(models.F('price'), '-', models.F('discount_value'))), default=models.F('price'), output_field=models.DecimalField(decimal_places=2, max_digits=12)), models.Value(0, output_field=models.DecimalField(decimal_places=2, max_digits=12))), output_field=models.DecimalField(decimal_places=2, max_digits=12)), output_field=models.DecimalField(decimal_places=2, max_digits=12)),
+        ),
+        migrations.AddField(
+            model_name='vehiclemodel',
+            name='effective_price',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.comparison.Cast(django.db.models.functions.comparison.Greatest(models.Case(models.When(discount_type='percentage', discount_value__isnull=False, then=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('price'), '*', django.db.models.expressions.CombinedExpression(models.Value(100, output_field=models.DecimalField(decimal_places=2, max_digits=12)), '-', models.F('discount_value'))), '/', models.Value(100, output_field=models.DecimalField(decimal_places=2, max_digits=12)))), models.When(discount_type__in=['fixed', 'cashback'], discount_value__isnull=False, then=django.db.models.expressions.CombinedExpression(models.F('price'), '-', models.F('discount_value'))), default=models.F('price'), output_field=models.DecimalField(decimal_places=2, max_digits=12)), models.Value(0, output_field=models.DecimalField(decimal_places=2, max_digits=12))), output_field=models.DecimalField(decimal_places=2, max_digits=12)), output_field=models.DecimalField(decimal_places=2, max_digits=12)),
+        ),
+        migrations.AddIndex(
+            model_name='inventoryitem',
+            index=models.Index(fields=['effective_price', 'id'], name='inventory_effective_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclemodel',
+            index=models.Index(fields=['effective_price', 'id'], name='vehicle_effective_price_id_idx'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_effective_price'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicleimage',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddIndex(
+            model_name='vehicleimage',
+            index=models.Index(fields=['vehicle', 'content_hash'], name='vehicleimage_vehicle_hash_idx'),
+        ),
+    ]
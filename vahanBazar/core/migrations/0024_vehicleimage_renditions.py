@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicleimage',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:52
+
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_vehicleimage_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False)),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('size', models.BigIntegerField(default=0)),
+                ('ref_count', models.IntegerField(default=0)),
+                ('pinned', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='vehicleimage',
+            name='image',
+            field=models.ImageField(max_length=255, storage=core.storage.blob_storage, upload_to='vehicles/'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_image_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DealerDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('vehicles_added', models.IntegerField(default=0)),
+                ('vehicles_sold', models.IntegerField(default=0)),
+                ('test_ride_bookings', models.IntegerField(default=0)),
+                ('inquiry_bookings', models.IntegerField(default=0)),
+                ('service_bookings', models.IntegerField(default=0)),
+                ('pending_bookings', models.IntegerField(default=0)),
+                ('confirmed_bookings', models.IntegerField(default=0)),
+                ('completed_bookings', models.IntegerField(default=0)),
+                ('cancelled_bookings', models.IntegerField(default=0)),
+                ('wishlist_adds', models.IntegerField(default=0)),
+                ('branch', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.branch')),
+                ('dealership', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.dealership')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dealership', 'date'], name='dealer_daily_stats_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('dealership', 'branch', 'date'), name='dealer_daily_stats_unique', nulls_distinct=False)],
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:01
+
+import datetime
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_dealer_daily_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('start_time', models.TimeField()),
+                ('capacity', models.PositiveSmallIntegerField()),
+                ('booked', models.PositiveSmallIntegerField(default=0)),
+                ('branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slots', to='core.branch')),
+            ],
+            options={
+                'ordering': ['date', 'start_time'],
+            },
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='slot',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bookings', to='core.bookingslot'),
+        ),
+        migrations.CreateModel(
+            name='BranchSlotConfig',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opens_at', models.TimeField(default=datetime.time(10, 0))),
+                ('closes_at', models.TimeField(default=datetime.time(18, 0))),
+                ('slot_minutes', models.PositiveSmallIntegerField(default=30)),
+                ('capacity', models.PositiveSmallIntegerField(default=1)),
+                ('closed_weekdays', models.JSONField(blank=True, default=list)),
+                ('horizon_days', models.PositiveSmallIntegerField(default=30)),
+                ('branch', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='slot_config', to='core.branch')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='bookingslot',
+            constraint=models.UniqueConstraint(fields=('branch', 'date', 'start_time'), name='booking_slot_unique'),
+        ),
+    ]
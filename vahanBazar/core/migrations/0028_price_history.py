@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_booking_slots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceAlertSetting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enabled', models.BooleanField(default=True)),
+                ('min_drop_percent', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('min_drop_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='price_alert_setting', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PriceChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('VEHICLE', 'Vehicle'), ('INVENTORY', 'Inventory item')], max_length=20)),
+                ('old_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('new_price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('old_discount_value', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('new_discount_value', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('old_effective_price', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('new_effective_price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('alerts_sent_at', models.DateTimeField(blank=True, null=True)),
+                ('inventory_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='price_changes', to='core.inventoryitem')),
+                ('vehicle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_changes', to='core.vehiclemodel')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['vehicle', 'changed_at'], name='price_change_vehicle_idx'), models.Index(condition=models.Q(('alerts_sent_at__isnull', True)), fields=['id'], name='price_change_pending_idx')],
+            },
+        ),
+    ]
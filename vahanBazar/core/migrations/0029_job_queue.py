@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_price_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobMetrics',
+            fields=[
+                ('kind', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('succeeded', models.BigIntegerField(default=0)),
+                ('failed', models.BigIntegerField(default=0)),
+                ('retried', models.BigIntegerField(default=0)),
+                ('total_seconds', models.FloatField(default=0)),
+                ('max_seconds', models.FloatField(default=0)),
+                ('last_succeeded_at', models.DateTimeField(blank=True, null=True)),
+                ('last_failed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=100)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('key', models.CharField(blank=True, max_length=200, null=True)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('attempts', models.IntegerField(default=0)),
+                ('max_attempts', models.IntegerField(default=5)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('worker', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('status', 'QUEUED')), fields=['run_at', 'id'], name='job_queued_idx'), models.Index(fields=['status', 'kind'], name='job_status_kind_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status', 'QUEUED')), fields=('key',), name='job_queued_key_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,5 +1,15 @@
+import uuid
+from datetime import time
+from django.conf import settings
 from django.db import models
+from django.db.models.fields.json import KeyTransform
 from django.contrib.auth.models import AbstractUser
+from django.utils import timezone
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from core.services.pricing_service import effective_price_expression
+from core.services.spec_service import build_spec_index
+from core.storage import blob_storage
 
 class User(AbstractUser):
     is_dealer = models.BooleanField(default=False)
@@ -66,6 +76,12 @@ class VehicleModel(models.Model):
     discount_type = models.CharField(max_length=20, choices=DISCOUNT_TYPE_CHOICES, blank=True, null=True)
     discount_value = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     discount_description = models.CharField(max_length=200, blank=True, null=True)
+    # Price after discount, computed and stored by the database
+    effective_price = models.GeneratedField(
+        expression=effective_price_expression(),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        db_persist=True,
+    )
     
     # Used vehicle specific fields (null for new vehicles)
     year = models.IntegerField(blank=True, null=True)
@@ -81,6 +97,49 @@ class VehicleModel(models.Model):
     # Optional variant
     variant = models.ForeignKey('VehicleModelVariant', on_delete=models.SET_NULL, null=True, blank=True, related_name="vehicle_instances")
 
+    # Flattened variant + vehicle specs with hot numeric keys parsed, kept in
+    # sync on save; only used for filtering
+    spec_index = models.JSONField(default=dict, blank=True, editable=False)
+
+    # Search columns maintained by core.services.search_service
+    search_vector = SearchVectorField(null=True, editable=False)
+    search_document = models.TextField(blank=True, default='', editable=False)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination: (sort key, id) so deep cursors are range scans
+            models.Index(fields=['created_at', 'id'], name='vehicle_created_id_idx'),
+            models.Index(fields=['price', 'id'], name='vehicle_price_id_idx'),
+            models.Index(fields=['effective_price', 'id'], name='vehicle_effective_price_id_idx'),
+            models.Index(fields=['dealer', 'created_at', 'id'], name='vehicle_dealer_created_idx'),
+            models.Index(
+                fields=['created_at', 'id'],
+                name='vehicle_featured_created_idx',
+                condition=models.Q(is_featured=True),
+            ),
+            # Spec equality filters (@> containment)
+            GinIndex(fields=['spec_index'], opclasses=['jsonb_path_ops'], name='vehicle_spec_index_gin'),
+            # Spec range filters, one expression index per hot numeric key
+            *[
+                models.Index(KeyTransform(slug, 'spec_index'), name=f'vehicle_spec_{slug}_idx')
+                for slug in settings.SPEC_NUMERIC_KEYS
+            ],
+            # Full-text search and typo-tolerant trigram matching
+            GinIndex(fields=['search_vector'], name='vehicle_search_vector_gin'),
+            GinIndex(fields=['search_document'], opclasses=['gin_trgm_ops'], name='vehicle_search_trgm_gin'),
+        ]
+
+    def refresh_spec_index(self):
+        variant_specs = self.variant.specs if self.variant_id else {}
+        self.spec_index = build_spec_index(self.specs, variant_specs)
+
+    def save(self, *args, **kwargs):
+        self.refresh_spec_index()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'spec_index'}
+        super().save(*args, **kwargs)
+
     def get_effective_specs(self):
         """Get effective specs based on vehicle type"""
         return self.specs
@@ -127,22 +186,58 @@ class InventoryItem(models.Model):
     discount_type = models.CharField(max_length=20, choices=DISCOUNT_TYPE_CHOICES, blank=True, null=True)
     discount_value = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     discount_description = models.CharField(max_length=200, blank=True, null=True)
+    effective_price = models.GeneratedField(
+        expression=effective_price_expression(),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['effective_price', 'id'], name='inventory_effective_price_idx'),
+        ]
 
     def __str__(self):
         return f"{self.vehicle_model_variant} - {self.branch.name}"
 
 class VehicleImage(models.Model):
     vehicle = models.ForeignKey(VehicleModel, on_delete=models.CASCADE, related_name="images")
-    image = models.ImageField(upload_to='vehicles/')
+    # Stored once per distinct content; see core.storage and blob_service
+    image = models.ImageField(upload_to='vehicles/', storage=blob_storage, max_length=255)
     order = models.IntegerField(default=0)
+    # sha256 of the file, so re-uploads of an unchanged image are recognised
+    content_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
+    # Resized copies written by rendition_service:
+    # {"source": <image name>, "sizes": {<size>: {"width", "height", <format>: {"path", "bytes"}}}}
+    renditions = models.JSONField(default=dict, blank=True, editable=False)
 
     class Meta:
         ordering = ["-id"]
+        indexes = [
+            models.Index(fields=['vehicle', 'content_hash'], name='vehicleimage_vehicle_hash_idx'),
+        ]
 
     def __str__(self):
         return f"{self.id} - {self.vehicle}"
 
 
+class ImageBlob(models.Model):
+    """
+    Reference count of a content-addressed file. `name` is the storage
+    name; the file is deleted when the last reference goes away, unless the
+    blob is pinned (handed out by URL, e.g. from the upload endpoints).
+    """
+    name = models.CharField(max_length=255, primary_key=True)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    size = models.BigIntegerField(default=0)
+    ref_count = models.IntegerField(default=0)
+    pinned = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+
 class Booking(models.Model):
     BOOKING_TYPE = [("TEST_RIDE","Test Ride"),("INQUIRY","Inquiry"),("SERVICE","Service Request")]
 
@@ -154,6 +249,40 @@ class Booking(models.Model):
     preferred_time = models.TimeField(blank=True, null=True)
     status = models.CharField(max_length=30, default="PENDING")
     created_at = models.DateTimeField(auto_now_add=True)
+    # Test-ride slot holding one unit of capacity for this booking
+    slot = models.ForeignKey('BookingSlot', on_delete=models.SET_NULL, null=True, blank=True, related_name="bookings")
+
+class BranchSlotConfig(models.Model):
+    """A branch's test-ride schedule; BookingSlot rows are generated from it."""
+    branch = models.OneToOneField(Branch, on_delete=models.CASCADE, related_name="slot_config")
+    opens_at = models.TimeField(default=time(10, 0))
+    closes_at = models.TimeField(default=time(18, 0))
+    slot_minutes = models.PositiveSmallIntegerField(default=30)
+    capacity = models.PositiveSmallIntegerField(default=1)
+    # Weekday numbers the branch takes no test rides, 0 = Monday
+    closed_weekdays = models.JSONField(default=list, blank=True)
+    horizon_days = models.PositiveSmallIntegerField(default=30)
+
+    def __str__(self):
+        return f"{self.branch} slots"
+
+
+class BookingSlot(models.Model):
+    """One bookable time slot; `booked` never exceeds `capacity` (see slot_service)."""
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, related_name="slots")
+    date = models.DateField()
+    start_time = models.TimeField()
+    capacity = models.PositiveSmallIntegerField()
+    booked = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['date', 'start_time']
+        constraints = [
+            models.UniqueConstraint(fields=['branch', 'date', 'start_time'], name='booking_slot_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.branch_id} {self.date} {self.start_time}"
 
 class Review(models.Model):
     vehicle = models.ForeignKey(VehicleModel, on_delete=models.CASCADE, related_name="reviews")
@@ -167,4 +296,138 @@ class Notification(models.Model):
     title = models.CharField(max_length=200)
     message = models.TextField()
     seen = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
\ No newline at end of file
+    created_at = models.DateTimeField(auto_now_add=True)
+
+class DealerDailyStats(models.Model):
+    """
+    Per-day activity counters for a dealership branch (branch is null for
+    vehicles listed without one), kept up to date by rollup_service.
+    """
+    dealership = models.ForeignKey(Dealership, on_delete=models.CASCADE, related_name="daily_stats")
+    branch = models.ForeignKey(Branch, on_delete=models.CASCADE, null=True, blank=True, related_name="daily_stats")
+    date = models.DateField()
+    vehicles_added = models.IntegerField(default=0)
+    vehicles_sold = models.IntegerField(default=0)
+    test_ride_bookings = models.IntegerField(default=0)
+    inquiry_bookings = models.IntegerField(default=0)
+    service_bookings = models.IntegerField(default=0)
+    pending_bookings = models.IntegerField(default=0)
+    confirmed_bookings = models.IntegerField(default=0)
+    completed_bookings = models.IntegerField(default=0)
+    cancelled_bookings = models.IntegerField(default=0)
+    wishlist_adds = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dealership', 'branch', 'date'], name='dealer_daily_stats_unique', nulls_distinct=False
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['dealership', 'date'], name='dealer_daily_stats_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.dealership_id}/{self.branch_id} {self.date}"
+
+
+class UploadSession(models.Model):
+    """A resumable upload: chunks are appended to a temp file until finalized."""
+    STATUS_CHOICES = [("PENDING", "Pending"), ("COMPLETE", "Complete")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="upload_sessions")
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    path = models.CharField(max_length=255, blank=True, default='')
+    # Set while a chunk is being written; one writer per session
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class PriceChange(models.Model):
+    """
+    Append-only history of list price, discount and inventory price changes.
+    Price alerts are sent for rows whose alerts_sent_at is still null.
+    """
+    SOURCE_CHOICES = [("VEHICLE", "Vehicle"), ("INVENTORY", "Inventory item")]
+
+    vehicle = models.ForeignKey(VehicleModel, on_delete=models.CASCADE, related_name="price_changes")
+    inventory_item = models.ForeignKey(
+        InventoryItem, on_delete=models.CASCADE, null=True, blank=True, related_name="price_changes"
+    )
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    old_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    new_price = models.DecimalField(max_digits=12, decimal_places=2)
+    old_discount_value = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    new_discount_value = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    old_effective_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    new_effective_price = models.DecimalField(max_digits=12, decimal_places=2)
+    changed_at = models.DateTimeField(auto_now_add=True)
+    alerts_sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['vehicle', 'changed_at'], name='price_change_vehicle_idx'),
+            models.Index(fields=['id'], condition=models.Q(alerts_sent_at__isnull=True), name='price_change_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.vehicle_id}: {self.old_effective_price} -> {self.new_effective_price}"
+
+
+class PriceAlertSetting(models.Model):
+    """A user's price alert thresholds; users without a row get the defaults."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="price_alert_setting")
+    enabled = models.BooleanField(default=True)
+    min_drop_percent = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    min_drop_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+
+class Job(models.Model):
+    """
+    A unit of background work run by `manage.py runworker`. Finished jobs are
+    deleted; jobs that used up their attempts stay as FAILED for inspection.
+    """
+    STATUS_CHOICES = [("QUEUED", "Queued"), ("RUNNING", "Running"), ("FAILED", "Failed")]
+
+    kind = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    # At most one queued job per key: enqueueing again is a no-op
+    key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="QUEUED")
+    run_at = models.DateTimeField(default=timezone.now)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    last_error = models.TextField(blank=True, default='')
+    worker = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['key'], condition=models.Q(status='QUEUED'), name='job_queued_key_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['run_at', 'id'], condition=models.Q(status='QUEUED'), name='job_queued_idx'),
+            models.Index(fields=['status', 'kind'], name='job_status_kind_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+
+class JobMetrics(models.Model):
+    """Lifetime counters per job kind, updated by the workers."""
+    kind = models.CharField(max_length=100, primary_key=True)
+    succeeded = models.BigIntegerField(default=0)
+    failed = models.BigIntegerField(default=0)
+    retried = models.BigIntegerField(default=0)
+    total_seconds = models.FloatField(default=0)
+    max_seconds = models.FloatField(default=0)
+    last_succeeded_at = models.DateTimeField(null=True, blank=True)
+    last_failed_at = models.DateTimeField(null=True, blank=True)
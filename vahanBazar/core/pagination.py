@@ -0,0 +1,180 @@
+import base64
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Cursor pagination keyed on (<ordering field>, id).
+
+    Each cursor stores the sort value and id of the last row it has seen, so
+    every page is a plain index range scan: page 1000 costs the same as page 1.
+    Unlike DRF's CursorPagination there is no offset for rows sharing the same
+    sort value, the id tie-breaker makes every position unique.
+
+    Every list is paginated, so no request loads the whole catalogue. A
+    paginator with `opt_in = True` returns a plain list unless the client
+    sends `cursor` or `page_size`.
+    """
+    opt_in = False
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = 24
+    max_page_size = 100
+    # Fields a cursor may be keyed on, each backed by a (field, id) index;
+    # `rank` is the relevance annotation added by VehicleSearchFilter.
+    ordering_fields = ('created_at', 'price', 'effective_price', 'rank')
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def is_requested(self, request):
+        if not self.opt_in:
+            return True
+        return (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor.get('r'))
+
+        # Walking backwards flips the scan direction; the page is flipped back
+        # into display order once it has been fetched.
+        scan_descending = descending != self.reverse
+        prefix = '-' if scan_descending else ''
+        queryset = queryset.order_by(f'{prefix}{self.field}', f'{prefix}id')
+
+        if cursor is not None:
+            queryset = queryset.filter(
+                self.get_seek_filter(self.parse_value(queryset, cursor['v']), cursor['id'], scan_descending)
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        return self.page
+
+    def parse_value(self, queryset, value):
+        """A cursor's sort value as the ordering field's type; tampered values are a 404."""
+        try:
+            field = queryset.model._meta.get_field(self.field)
+        except FieldDoesNotExist:
+            field = None  # an annotation such as `rank`
+        try:
+            if field is None:
+                return float(value)
+            return getattr(field, 'output_field', field).to_python(value)
+        except (ValidationError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_seek_filter(self, value, pk, descending):
+        """
+        Rows strictly after (value, pk) in scan order, written so the planner
+        can use a range condition on the leading index column.
+        """
+        if descending:
+            return Q(**{f'{self.field}__lte': value}) & (
+                Q(**{f'{self.field}__lt': value}) | Q(id__lt=pk)
+            )
+        return Q(**{f'{self.field}__gte': value}) & (
+            Q(**{f'{self.field}__gt': value}) | Q(id__gt=pk)
+        )
+
+    def get_ordering(self, queryset):
+        """
+        Reuse the ordering already applied by OrderingFilter (or the view's
+        default) when it is one the cursor can be keyed on.
+        """
+        for term in queryset.query.order_by:
+            if isinstance(term, str) and term.lstrip('-') in self.ordering_fields:
+                return term
+        return self.default_ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            if cursor['o'] != self.ordering:
+                raise ValueError('cursor was issued for another ordering')
+            cursor['id'] = int(cursor['id'])
+            if cursor['v'] is None:
+                raise ValueError('cursor has no position')
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, instance, reverse):
+        value = getattr(instance, self.field)
+        if hasattr(value, 'isoformat'):
+            value = value.isoformat()
+        payload = {'o': self.ordering, 'v': str(value), 'id': instance.pk}
+        if reverse:
+            payload['r'] = 1
+        encoded = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('ascii')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
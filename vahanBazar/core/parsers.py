@@ -0,0 +1,27 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from django.conf import settings
+
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser that decodes with orjson when it is installed. orjson only
+    reads UTF-8 and already rejects NaN/Infinity like a strict JSONParser;
+    other charsets and non-strict mode use the stdlib parser.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        if orjson is None or not self.strict or not self.is_utf8(parser_context):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
+
+    def is_utf8(self, parser_context):
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return encoding.lower().replace('_', '-') in ('utf-8', 'utf8')
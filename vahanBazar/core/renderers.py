@@ -0,0 +1,61 @@
+import math
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def has_non_finite(data):
+    """Whether a payload holds NaN or an infinity, which orjson writes as null."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed.
+
+    Output is semantically equal to JSONRenderer's: Decimal, datetime, lazy
+    strings and the other non-native types are handed to DRF's own encoder,
+    and U+2028/2029 are escaped the same way. Floats may be spelled
+    differently (1e16 for 1e+16). Anything orjson cannot encode the same way
+    (ASCII-only or non-compact output, an indent other than 2, integers
+    beyond 64 bits, NaN and infinities, which DRF rejects) goes to the
+    stdlib renderer.
+    """
+    option = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent not in (None, 2):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        option = self.option | (orjson.OPT_INDENT_2 if indent else 0)
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=option)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Only a payload with a null can hide one; the stdlib raises on it
+        if b'null' in ret and has_non_finite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
@@ -1,10 +1,21 @@
 from rest_framework import serializers
-from core.models import Booking
+from core.models import Booking, Branch
 from .vehicle_serializers import VehicleModelSerializer
 
+
+class BranchNameField(serializers.PrimaryKeyRelatedField):
+    """Takes a branch id, shows the branch's name."""
+
+    def use_pk_only_optimization(self):
+        return False
+
+    def to_representation(self, value):
+        return str(value)
+
+
 class BookingSerializer(serializers.ModelSerializer):
     inventory_item = serializers.StringRelatedField()
-    branch = serializers.StringRelatedField()
+    branch = BranchNameField(queryset=Branch.objects.all(), required=False, allow_null=True)
 
     class Meta:
         model = Booking
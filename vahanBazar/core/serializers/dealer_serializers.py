@@ -35,4 +35,8 @@ class DealerProfileSerializer(serializers.ModelSerializer):
         instance.phone = validated_data.get('phone', instance.phone)
         instance.save()
 
-        return instance
\ No newline at end of file
+        return instance
+
+class CatalogueImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    dry_run = serializers.BooleanField(default=False)
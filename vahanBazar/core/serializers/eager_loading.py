@@ -0,0 +1,132 @@
+from django.db.models import Prefetch, QuerySet, prefetch_related_objects
+from rest_framework import serializers
+
+
+class EagerLoadingListSerializer(serializers.ListSerializer):
+    """
+    List serializer that applies the child's loading plan before iterating, so
+    `many=True` never falls back to one lazy query per row.
+    """
+
+    def to_representation(self, data):
+        fields = getattr(self.child, 'requested_fields', None)
+        if isinstance(data, QuerySet):
+            data = self.child.setup_eager_loading(data, fields)
+        elif data and isinstance(data, (list, tuple)):
+            # Already evaluated (e.g. a paginated page); relations loaded by
+            # the queryset are skipped by prefetch_related_objects.
+            prefetch_related_objects(list(data), *self.child.get_eager_loading_lookups(fields))
+        return super().to_representation(data)
+
+
+class EagerLoadingMixin:
+    """
+    Declares which relations a serializer reads.
+
+    `select_related_fields` lists the forward FKs to join and
+    `prefetch_related_fields` the reverse/many relations (plain lookups or
+    `Prefetch` objects). Nested serializers using this mixin are followed, so a
+    parent serializer inherits the plan of everything it nests.
+
+    For sparse fieldsets the plan can be narrowed to the fields being
+    rendered: a relation is loaded only if a rendered field reads it, either
+    by name or through `field_sources` (field -> model attributes it reads,
+    for method fields). `annotated_fields` maps fields that read a queryset
+    annotation to a callable building it; those are added only when asked for.
+    """
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    field_sources = {}
+    annotated_fields = {}
+
+    @classmethod
+    def get_field_sources(cls, fields):
+        """Model attributes read by `fields`."""
+        sources = set()
+        declared = cls._declared_fields
+        for name in fields:
+            if name in cls.field_sources:
+                sources.update(cls.field_sources[name])
+            elif name in declared and declared[name].source:
+                sources.add(declared[name].source.split('.')[0])
+            else:
+                sources.add(name)
+        return sources
+
+    @classmethod
+    def get_eager_loading_plan(cls, prefix='', fields=None):
+        sources = cls.get_field_sources(fields) if fields is not None else None
+
+        def wanted(lookup):
+            return sources is None or _lookup_path(lookup).split('__')[0] in sources
+
+        select_related = [prefix + field for field in cls.select_related_fields if wanted(field)]
+        prefetch_related = [
+            _prefix_lookup(lookup, prefix) for lookup in cls.prefetch_related_fields if wanted(lookup)
+        ]
+
+        for name, field in cls._declared_fields.items():
+            if isinstance(field, serializers.ListSerializer) or not isinstance(field, EagerLoadingMixin):
+                continue
+            source = field.source or name
+            if sources is not None and source not in sources:
+                continue
+            select_related.append(prefix + source)
+            nested_select, nested_prefetch = field.get_eager_loading_plan(f'{prefix}{source}__')
+            select_related.extend(nested_select)
+            prefetch_related.extend(nested_prefetch)
+
+        return select_related, prefetch_related
+
+    @classmethod
+    def get_eager_loading_lookups(cls, fields=None):
+        select_related, prefetch_related = cls.get_eager_loading_plan(fields=fields)
+        return [*select_related, *prefetch_related]
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        """
+        Apply the loading plan to a queryset; safe to call more than once.
+        With `fields`, only the columns, relations and annotations those
+        fields read are loaded.
+        """
+        select_related, prefetch_related = cls.get_eager_loading_plan(fields=fields)
+        seen = {_lookup_path(lookup) for lookup in queryset._prefetch_related_lookups}
+        prefetch_related = [
+            lookup for lookup in prefetch_related if _lookup_path(lookup) not in seen
+        ]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        annotations = {
+            name: build() for name, build in cls.annotated_fields.items()
+            if fields is not None and name in fields and name not in queryset.query.annotations
+        }
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+
+        if fields is not None:
+            model = queryset.model
+            concrete = {field.name for field in model._meta.concrete_fields}
+            columns = {
+                source for source in cls.get_field_sources(fields)
+                if source in concrete
+            } | {model._meta.pk.name}
+            # Keep columns an earlier only() asked for (e.g. a sort key)
+            loaded, is_defer = queryset.query.deferred_loading
+            if not is_defer:
+                columns |= set(loaded)
+            queryset = queryset.only(*columns, *(lookup.split('__')[0] for lookup in select_related))
+        return queryset
+
+
+def _lookup_path(lookup):
+    return lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+
+
+def _prefix_lookup(lookup, prefix):
+    if isinstance(lookup, Prefetch):
+        return Prefetch(prefix + lookup.prefetch_through, queryset=lookup.queryset, to_attr=lookup.to_attr)
+    return prefix + lookup
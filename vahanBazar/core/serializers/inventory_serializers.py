@@ -13,12 +13,15 @@ class VehicleImageSerializer(serializers.ModelSerializer):
 
 class InventoryItemSerializer(serializers.ModelSerializer):
     images = VehicleImageSerializer(many=True, read_only=True)
+    # A string like price, not the bare ReadOnlyField of a GeneratedField
+    effective_price = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     
     class Meta:
         model = InventoryItem
         fields = [
-            'id', 'branch', 'vehicle_model_variant', 'price',
+            'id', 'branch', 'vehicle_model_variant', 'price', 'effective_price',
             'status', 'is_featured', 'specs_override', 
             'discount_type', 'discount_value', 'discount_description',
             'images', 'added_on'
-        ]
\ No newline at end of file
+        ]
+        read_only_fields = ['effective_price']
\ No newline at end of file
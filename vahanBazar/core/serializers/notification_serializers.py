@@ -0,0 +1,18 @@
+from rest_framework import serializers
+from core.models import Notification, PriceAlertSetting
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Notification
+        fields = ['id', 'title', 'message', 'seen', 'created_at']
+        read_only_fields = ['id', 'title', 'message', 'created_at']
+
+
+class PriceAlertSettingSerializer(serializers.ModelSerializer):
+    min_drop_percent = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, max_value=100)
+    min_drop_amount = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=0)
+
+    class Meta:
+        model = PriceAlertSetting
+        fields = ['enabled', 'min_drop_percent', 'min_drop_amount']
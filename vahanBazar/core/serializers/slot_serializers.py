@@ -0,0 +1,25 @@
+from rest_framework import serializers
+from core.models import BranchSlotConfig
+
+
+class BranchSlotConfigSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BranchSlotConfig
+        fields = ['opens_at', 'closes_at', 'slot_minutes', 'capacity', 'closed_weekdays', 'horizon_days']
+        extra_kwargs = {
+            'slot_minutes': {'min_value': 5, 'max_value': 240},
+            'capacity': {'min_value': 1},
+            'horizon_days': {'min_value': 1, 'max_value': 365},
+        }
+
+    def validate_closed_weekdays(self, value):
+        if not isinstance(value, list) or any(day not in range(7) for day in value):
+            raise serializers.ValidationError("Use weekday numbers 0 (Monday) to 6 (Sunday)")
+        return sorted(set(value))
+
+    def validate(self, attrs):
+        opens_at = attrs.get('opens_at', getattr(self.instance, 'opens_at', None))
+        closes_at = attrs.get('closes_at', getattr(self.instance, 'closes_at', None))
+        if opens_at and closes_at and opens_at >= closes_at:
+            raise serializers.ValidationError({"closes_at": "Must be after opens_at"})
+        return attrs
@@ -0,0 +1,56 @@
+from rest_framework import serializers
+
+
+class SparseFieldsetMixin:
+    """
+    Lets a GET request choose which fields a serializer renders, with
+    `?fields=id,name,price` or a named preset such as `?view=card`.
+
+    `field_views` maps preset names to field tuples; `optional_fields` are
+    rendered only when asked for (typically because they need an extra
+    annotation). Paired with EagerLoadingMixin, `requested_fields` also
+    narrows the query to the columns and relations those fields read.
+    """
+    fields_query_param = 'fields'
+    view_query_param = 'view'
+    field_views = {}
+    optional_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if fields is None and request is not None:
+            fields = self.get_requested_fields(request)
+        self.requested_fields = fields
+
+        keep = set(fields) if fields is not None else set(self.fields) - set(self.optional_fields)
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+    @classmethod
+    def get_requested_fields(cls, request):
+        """Field names asked for by the request, or None for the default set."""
+        if request.method != 'GET':
+            return None
+        params = request.query_params
+        if cls.view_query_param in params:
+            view = params[cls.view_query_param]
+            if view not in cls.field_views:
+                raise serializers.ValidationError({
+                    cls.view_query_param: f"Unknown view '{view}'. Choose from: {', '.join(cls.field_views)}"
+                })
+            return tuple(cls.field_views[view])
+        if cls.fields_query_param in params:
+            fields = tuple(dict.fromkeys(
+                name.strip() for name in params[cls.fields_query_param].split(',') if name.strip()
+            ))
+            available = {*cls.Meta.fields, *cls.optional_fields}
+            unknown = [name for name in fields if name not in available]
+            if unknown:
+                raise serializers.ValidationError({
+                    cls.fields_query_param: f"Unknown fields: {', '.join(unknown)}"
+                })
+            return fields
+        return None
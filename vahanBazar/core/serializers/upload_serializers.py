@@ -0,0 +1,15 @@
+from rest_framework import serializers
+from core.models import UploadSession
+from core.storage import blob_storage
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'size', 'offset', 'sha256', 'status', 'path', 'url', 'created_at']
+        read_only_fields = ['id', 'offset', 'status', 'path', 'url', 'created_at']
+
+    def get_url(self, obj):
+        return blob_storage().url(obj.path) if obj.path else None
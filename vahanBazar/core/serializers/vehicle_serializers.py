@@ -1,12 +1,86 @@
+from django.core.files.storage import default_storage
+from django.db.models import CharField, OuterRef, Prefetch, Subquery, prefetch_related_objects
+from django.db.models.fields.json import KT
+from django.db.models.functions import Coalesce
 from rest_framework import serializers
 from core.models import VehicleModel, VehicleImage, Branch, Dealership
+from .eager_loading import EagerLoadingMixin, EagerLoadingListSerializer
+from .sparse_fields import SparseFieldsetMixin
+from core.services.image_service import add_images, replace_images
+from core.services.rendition_service import RENDITION_FORMATS
 
 class VehicleImageSerializer(serializers.ModelSerializer):
+    renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = VehicleImage
-        fields = ['id', 'image', 'order']
+        fields = ['id', 'image', 'order', 'renditions']
+
+    def get_renditions(self, obj):
+        """
+        Per format, a ready-made `srcset` plus the individual sources; empty
+        until the background renditions have been generated.
+        """
+        sizes = obj.renditions.get('sizes')
+        if not sizes:
+            return {}
+        request = self.context.get('request')
+        result = {}
+        for fmt in RENDITION_FORMATS:
+            sources = []
+            for name, entry in sizes.items():
+                if fmt not in entry:
+                    continue
+                url = default_storage.url(entry[fmt]['path'])
+                sources.append({
+                    'name': name,
+                    'url': request.build_absolute_uri(url) if request else url,
+                    'width': entry['width'],
+                    'height': entry['height'],
+                    'bytes': entry[fmt]['bytes'],
+                })
+            sources.sort(key=lambda source: source['width'])
+            result[fmt] = {
+                'srcset': ', '.join(f"{source['url']} {source['width']}w" for source in sources),
+                'sources': sources,
+            }
+        return result
+
+def primary_image_subquery():
+    """
+    Path of a vehicle's first image by `order`, as one correlated subquery;
+    its card rendition once generated, the original until then.
+    """
+    images = VehicleImage.objects.filter(vehicle=OuterRef('pk')).order_by('order', 'id')
+    path = Coalesce(KT('renditions__sizes__card__webp__path'), 'image', output_field=CharField())
+    return Subquery(images.annotate(card_path=path).values('card_path')[:1])
+
+
+class VehicleModelSerializer(SparseFieldsetMixin, EagerLoadingMixin, serializers.ModelSerializer):
+    select_related_fields = ('brand', 'dealer', 'seller', 'branch', 'variant')
+    prefetch_related_fields = (
+        Prefetch('images', queryset=VehicleImage.objects.order_by('order', 'id')),
+    )
+    # Method fields read the whole instance (source='*'), so list what each uses
+    field_sources = {
+        'brand_detail': ('brand',),
+        'dealer': ('dealer',),
+        'seller': ('seller',),
+        'branch': ('branch',),
+        'variant': ('variant',),
+        'specs': ('specs',),
+        'primary_image': (),
+    }
+    annotated_fields = {'primary_image': primary_image_subquery}
+    optional_fields = ('primary_image',)
+    field_views = {
+        'card': (
+            'id', 'name', 'brand_detail', 'category', 'fuel_type', 'type', 'price',
+            'effective_price', 'discount_type', 'discount_value', 'is_featured',
+            'year', 'km_driven', 'condition', 'primary_image',
+        ),
+    }
 
-class VehicleModelSerializer(serializers.ModelSerializer):
     images = VehicleImageSerializer(many=True, read_only=True)
     specs = serializers.SerializerMethodField()
     brand_detail = serializers.SerializerMethodField(read_only=True)
@@ -14,18 +88,23 @@ class VehicleModelSerializer(serializers.ModelSerializer):
     seller = serializers.SerializerMethodField()
     branch = serializers.SerializerMethodField()
     variant = serializers.SerializerMethodField()
+    primary_image = serializers.SerializerMethodField()
+    # ModelSerializer maps a GeneratedField to a bare ReadOnlyField, which
+    # would render the Decimal as a number; declared so it is a string like price
+    effective_price = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
     
     class Meta:
         model = VehicleModel
         fields = [
             'id', 'brand', 'brand_detail', 'dealer', 'seller', 'branch', 'name', 'category', 
-            'fuel_type', 'price', 'status', 'is_featured', 'type',
+            'fuel_type', 'price', 'effective_price', 'status', 'is_featured', 'type',
             'images', 'discount_type', 'variant',
             'discount_value', 'discount_description', 'created_at',
             'year', 'km_driven', 'condition', 'exchange_offer', 
-            'loan_option', 'approved', 'specs', 'model_name'
+            'loan_option', 'approved', 'specs', 'model_name', 'primary_image'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'created_at', 'updated_at', 'effective_price']
+        list_serializer_class = EagerLoadingListSerializer
         extra_kwargs = {
             'name': {'required': True},
             'brand': {'required': True},
@@ -48,6 +127,15 @@ class VehicleModelSerializer(serializers.ModelSerializer):
         """Return effective specs based on vehicle type"""
         return obj.get_effective_specs()
     
+    def get_primary_image(self, obj):
+        """Return the URL of the first image, from the primary_image annotation"""
+        path = getattr(obj, 'primary_image', None)
+        if not path:
+            return None
+        url = default_storage.url(path)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
     def get_brand_detail(self, obj):
         """Return brand with id and name"""
         if obj.brand:
@@ -129,42 +217,24 @@ class VehicleModelSerializer(serializers.ModelSerializer):
         
         try:
             vehicle = VehicleModel.objects.create(**validated_data)
-            
-            # Create vehicle images
-            for index, img in enumerate(images):
-                VehicleImage.objects.create(
-                    vehicle=vehicle,
-                    image=img,
-                    order=index
-                )
-            
+            add_images(vehicle, images)
             return vehicle
         except Exception as e:
             print("Error creating vehicle:", str(e))
             raise serializers.ValidationError({"detail": str(e)})
         
     def update(self, instance, validated_data):
-
-        images = self.context.pop('images', [])
+        images = self.context.pop('images', None)
+        image_entries = self.context.pop('image_entries', None)
         vehicle = super().update(instance, validated_data)
 
-        if images is not None:
-            if len(images) < 3:
-                raise serializers.ValidationError({"images": "At least 3 images are required"})
-                
-            # Delete existing images
-            instance.images.all().delete()
-            
-            # Create new images
-            for index, image in enumerate(images):
-                VehicleImage.objects.create(
-                    vehicle=vehicle,
-                    image=image,
-                    order=index
-                )
-        print(validated_data)
-        instance.specs = validated_data.get('specs', '')
-        instance.save()
+        # Images are only touched when the request sends new files or an
+        # explicit image list; see image_service.replace_images
+        if images or image_entries is not None:
+            replace_images(vehicle, images or [], image_entries)
+            # Reload images prefetched by get_object() so the response is current
+            getattr(vehicle, '_prefetched_objects_cache', {}).pop('images', None)
+            prefetch_related_objects([vehicle], *self.prefetch_related_fields)
 
         return vehicle
 
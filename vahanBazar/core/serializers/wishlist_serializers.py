@@ -1,8 +1,9 @@
 from rest_framework import serializers
 from core.models import WishlistItem, VehicleModel
 from .vehicle_serializers import VehicleModelSerializer
+from .eager_loading import EagerLoadingMixin, EagerLoadingListSerializer
 
-class WishlistItemSerializer(serializers.ModelSerializer):
+class WishlistItemSerializer(EagerLoadingMixin, serializers.ModelSerializer):
     vehicle = VehicleModelSerializer(read_only=True)
     vehicle_id = serializers.PrimaryKeyRelatedField(
         queryset=VehicleModel.objects.all(), source='vehicle', write_only=True
@@ -12,8 +13,19 @@ class WishlistItemSerializer(serializers.ModelSerializer):
         model = WishlistItem
         fields = ['id', 'vehicle', 'vehicle_id', 'added_at']
         read_only_fields = ['id', 'added_at', 'vehicle']
+        list_serializer_class = EagerLoadingListSerializer
 
     def create(self, validated_data):
         user = self.context['request'].user
         validated_data['user'] = user
         return super().create(validated_data)
+
+
+class WishlistBatchSerializer(serializers.Serializer):
+    add = serializers.ListField(child=serializers.IntegerField(min_value=1), max_length=500, default=list)
+    remove = serializers.ListField(child=serializers.IntegerField(min_value=1), max_length=500, default=list)
+
+    def validate(self, attrs):
+        if set(attrs['add']) & set(attrs['remove']):
+            raise serializers.ValidationError("A vehicle cannot be both added and removed")
+        return attrs
@@ -0,0 +1,81 @@
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F
+
+from core.models import ImageBlob
+from core.storage import blob_digest, blob_storage, is_blob_name
+
+
+def acquire_blobs(names, pinned=False):
+    """
+    Count one reference per occurrence of each blob name. `pinned` blobs
+    are never deleted, for files handed out by URL with no owning row.
+    """
+    pin = {'pinned': True} if pinned else {}
+    for name, count in Counter(name for name in names if is_blob_name(name)).items():
+        # The UPDATE waits for a concurrent release of the same row; if
+        # that deleted it, the row is created again
+        while not ImageBlob.objects.filter(name=name).update(ref_count=F('ref_count') + count, **pin):
+            _, created = ImageBlob.objects.get_or_create(name=name, defaults={
+                'sha256': blob_digest(name), 'size': blob_storage().size(name),
+                'ref_count': count, **pin,
+            })
+            if created:
+                break
+
+
+def reclaim_blob(name):
+    """
+    Called by a save of `name` before it checks whether the file exists.
+    Cancels a pending deletion (a row left without references), or waits
+    for one in progress to finish, so an existing file that the save
+    reuses stays until the new reference is counted.
+    """
+    ImageBlob.objects.filter(name=name, ref_count__lte=0, pinned=False).delete()
+
+
+def release_blobs(names, derived=None):
+    """
+    Drop one reference per occurrence of each name. Blobs left without
+    references are deleted after commit, together with `derived[name]`
+    (files generated from them, such as renditions). Names that are not
+    blobs belong to a single row and are deleted outright.
+    """
+    derived = derived or {}
+    counts = Counter(name for name in names if is_blob_name(name))
+    legacy = [name for name in names if name and not is_blob_name(name)]
+
+    with transaction.atomic():
+        for name, count in counts.items():
+            ImageBlob.objects.filter(name=name).update(ref_count=F('ref_count') - count)
+        # The rows stay until the files are gone, for reclaim_blob to lock
+        orphans = list(
+            ImageBlob.objects.filter(name__in=list(counts), ref_count__lte=0, pinned=False)
+            .values_list('name', flat=True)
+        )
+
+    if not orphans and not legacy:
+        return
+
+    def delete_files():
+        with transaction.atomic():
+            # Locked and re-checked: a reference taken since, or a save that
+            # reclaimed the blob, keeps the file
+            unused = list(
+                ImageBlob.objects.select_for_update()
+                .filter(name__in=orphans, ref_count__lte=0, pinned=False)
+                .values_list('name', flat=True)
+            )
+            ImageBlob.objects.filter(name__in=unused).delete()
+            for name in unused:
+                blob_storage().delete(name)
+                for path in derived.get(name, ()):
+                    default_storage.delete(path)
+        for name in legacy:
+            default_storage.delete(name)
+            for path in derived.get(name, ()):
+                default_storage.delete(path)
+
+    transaction.on_commit(delete_files)
@@ -0,0 +1,83 @@
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_PREFIX = 'version:'
+STATS_PREFIX = 'cache-stats:'
+
+# Names of the response caches, registered by @cache_response, so the stats
+# endpoint knows which counters to read.
+RESPONSE_CACHES = set()
+
+
+def version_scope(kind, pk):
+    return f'{kind}:{pk}'
+
+
+def _fresh_version():
+    # A clock-based seed means a version key lost to eviction can never come
+    # back with a value an old cache entry was stored under.
+    return time.time_ns()
+
+
+def get_versions(*scopes):
+    """Return {scope: version} for each scope, creating missing versions."""
+    keys = {f'{VERSION_PREFIX}{scope}': scope for scope in scopes}
+    found = cache.get_many(list(keys))
+    missing = {key: _fresh_version() for key in keys if key not in found}
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, timeout=None)
+        found.update(cache.get_many(list(missing)))
+    return {scope: found.get(key) for key, scope in keys.items()}
+
+
+def get_version(scope):
+    return get_versions(scope)[scope]
+
+
+def bump_version(scope):
+    """Invalidate everything cached under `scope` once the transaction commits."""
+    bump_versions(scope)
+
+
+def bump_versions(*scopes):
+    """
+    Bump each scope after the current transaction commits (at once outside
+    one). Bumping earlier would let a concurrent read cache the old rows
+    under the new version, where no later write would invalidate them.
+    """
+    transaction.on_commit(partial(_bump_now, tuple(dict.fromkeys(scopes))))
+
+
+def _bump_now(scopes):
+    for scope in scopes:
+        key = f'{VERSION_PREFIX}{scope}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_version(), timeout=None)
+
+
+def record_cache_event(name, hit):
+    key = f'{STATS_PREFIX}{name}:{"hits" if hit else "misses"}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def get_cache_stats():
+    """Hit/miss counters of every registered response cache."""
+    keys = [f'{STATS_PREFIX}{name}:{event}' for name in RESPONSE_CACHES for event in ('hits', 'misses')]
+    counts = cache.get_many(keys)
+    stats = {}
+    for name in sorted(RESPONSE_CACHES):
+        hits = counts.get(f'{STATS_PREFIX}{name}:hits', 0)
+        misses = counts.get(f'{STATS_PREFIX}{name}:misses', 0)
+        total = hits + misses
+        stats[name] = {'hits': hits, 'misses': misses, 'hit_rate': round(hits / total, 4) if total else None}
+    return stats
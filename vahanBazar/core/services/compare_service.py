@@ -0,0 +1,193 @@
+from django.core.cache import cache
+
+from core.models import InventoryItem, VehicleModel, VehicleModelVariant
+from core.services.cache_service import get_versions, version_scope
+from core.services.spec_service import merge_specs, normalize_quantity
+
+COMPARE_KINDS = ('vehicle', 'variant', 'inventory')
+CACHE_TIMEOUT = 60 * 60
+
+# Substrings of spec keys where a larger number is better / worse. Rows that
+# match neither get no best-in-row marker.
+HIGHER_IS_BETTER = (
+    'power', 'torque', 'mileage', 'range', 'speed', 'battery capacity',
+    'tank', 'ground clearance', 'boot', 'loading capacity', 'warranty',
+)
+LOWER_IS_BETTER = ('price', 'weight', 'charging time')
+
+
+def _describe(kind, obj):
+    """
+    Column header, effective specs (least to most specific) and cache scopes
+    for one input. `price` is what the buyer pays, after any discount;
+    `list_price` is the price before it.
+    """
+    if kind == 'vehicle':
+        variant_specs = obj.variant.specs if obj.variant_id else {}
+        return (
+            {
+                'kind': kind, 'id': obj.id, 'name': obj.name, 'brand': obj.brand.name,
+                'price': obj.effective_price, 'list_price': obj.price,
+            },
+            merge_specs(obj.specs, variant_specs),
+            [version_scope('vehicle', obj.id), version_scope('variant', obj.variant_id), 'brands'],
+        )
+    if kind == 'variant':
+        vehicle = obj.vehicle_model
+        return (
+            {
+                'kind': kind, 'id': obj.id, 'name': f'{vehicle.name} {obj.name}', 'brand': vehicle.brand.name,
+                'price': None, 'list_price': None,
+            },
+            merge_specs(vehicle.specs, obj.specs),
+            [version_scope('variant', obj.id), version_scope('vehicle', vehicle.id), 'brands'],
+        )
+    variant = obj.vehicle_model_variant
+    vehicle = variant.vehicle_model
+    return (
+        {
+            'kind': kind, 'id': obj.id, 'name': f'{vehicle.name} {variant.name}',
+            'brand': vehicle.brand.name, 'price': obj.effective_price, 'list_price': obj.price,
+            'branch': obj.branch.name,
+        },
+        merge_specs(vehicle.specs, variant.specs, obj.specs_override),
+        [
+            version_scope('inventory', obj.id), version_scope('variant', variant.id),
+            version_scope('vehicle', vehicle.id), 'brands', 'branches',
+        ],
+    )
+
+
+def _load(refs):
+    """Fetch every requested row with one query per kind."""
+    ids = {kind: [pk for ref_kind, pk in refs if ref_kind == kind] for kind in COMPARE_KINDS}
+    loaded = {}
+    if ids['vehicle']:
+        for obj in VehicleModel.objects.select_related('brand', 'variant').filter(id__in=ids['vehicle']):
+            loaded[('vehicle', obj.id)] = obj
+    if ids['variant']:
+        queryset = VehicleModelVariant.objects.select_related('vehicle_model__brand')
+        for obj in queryset.filter(id__in=ids['variant']):
+            loaded[('variant', obj.id)] = obj
+    if ids['inventory']:
+        queryset = InventoryItem.objects.select_related('branch', 'vehicle_model_variant__vehicle_model__brand')
+        for obj in queryset.filter(id__in=ids['inventory']):
+            loaded[('inventory', obj.id)] = obj
+    return loaded
+
+
+def _direction(key):
+    lowered = key.lower()
+    if any(word in lowered for word in LOWER_IS_BETTER):
+        return 'min'
+    if any(word in lowered for word in HIGHER_IS_BETTER):
+        return 'max'
+    return None
+
+
+def _build_row(key, raw_values):
+    parsed = [normalize_quantity(key, raw) if raw is not None else None for raw in raw_values]
+    units = {quantity[1] for quantity in parsed if quantity is not None}
+    # Only compare numerically when every present value parsed into one unit.
+    numeric = (
+        len(units) == 1
+        and all(quantity is not None for raw, quantity in zip(raw_values, parsed) if raw is not None)
+    )
+    values = [
+        {'raw': raw, 'value': quantity[0] if numeric and quantity else None}
+        for raw, quantity in zip(raw_values, parsed)
+    ]
+
+    if numeric:
+        comparable = [value['value'] for value in values if value['value'] is not None]
+        differs = len(set(comparable)) > 1 or len(comparable) != len(values)
+    else:
+        present = [str(raw).strip().lower() if raw is not None else None for raw in raw_values]
+        differs = len(set(present)) > 1
+
+    best = []
+    direction = _direction(key)
+    if numeric and direction and differs:
+        comparable = [value['value'] for value in values if value['value'] is not None]
+        target = max(comparable) if direction == 'max' else min(comparable)
+        best = [index for index, value in enumerate(values) if value['value'] == target]
+
+    return {
+        'key': key,
+        'unit': units.pop() if numeric and units else None,
+        'values': values,
+        'differs': differs,
+        'best': best,
+    }
+
+
+def build_comparison(refs):
+    """
+    Build the comparison table for (kind, id) refs, in the given order.
+    Returns None if any ref does not exist.
+    """
+    loaded = _load(refs)
+    if len(loaded) != len(set(refs)):
+        return None
+
+    columns, spec_rows, dependencies = [], [], set()
+    for ref in refs:
+        header, specs, scopes = _describe(ref[0], loaded[ref])
+        columns.append(header)
+        spec_rows.append(specs)
+        dependencies.update(scope for scope in scopes if not scope.endswith(':None'))
+
+    for column in columns:
+        for field in ('price', 'list_price'):
+            column[field] = str(column[field]) if column[field] is not None else None
+    keys = list(dict.fromkeys(key for specs in spec_rows for key in specs))
+    rows = [_build_row('Price', [column['price'] for column in columns])]
+    rows += [_build_row(key, [specs.get(key) for specs in spec_rows]) for key in keys]
+
+    return {'columns': columns, 'rows': rows}, sorted(dependencies)
+
+
+def _reorder(table, order):
+    """Permute a table's columns (and per-row values/best indices) by `order`."""
+    position = {old: new for new, old in enumerate(order)}
+    return {
+        'columns': [table['columns'][index] for index in order],
+        'rows': [
+            {
+                **row,
+                'values': [row['values'][index] for index in order],
+                'best': sorted(position[index] for index in row['best']),
+            }
+            for row in table['rows']
+        ],
+    }
+
+
+def compare(refs):
+    """
+    Cached comparison of (kind, id) refs. The table is cached once per sorted
+    ref tuple together with the versions of every row it was built from; a
+    write to any of those rows bumps its version and invalidates the entry.
+    """
+    refs = list(dict.fromkeys(refs))
+    canonical = sorted(refs)
+    cache_key = 'compare:' + ','.join(f'{kind}{pk}' for kind, pk in canonical)
+
+    entry = cache.get(cache_key)
+    if entry is not None and get_versions(*entry['dependencies']) == entry['versions']:
+        table = entry['table']
+    else:
+        # Read the requested rows' versions before loading them, so a write
+        # racing with the build leaves the entry already stale.
+        versions = get_versions(*(version_scope(kind, pk) for kind, pk in canonical))
+        built = build_comparison(canonical)
+        if built is None:
+            return None
+        table, dependencies = built
+        cache.set(cache_key, {
+            'table': table,
+            'dependencies': dependencies,
+            'versions': {**get_versions(*dependencies), **versions},
+        }, CACHE_TIMEOUT)
+
+    return _reorder(table, [canonical.index(ref) for ref in refs])
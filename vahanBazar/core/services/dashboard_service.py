@@ -0,0 +1,83 @@
+from collections import Counter
+
+from django.db.models import Count, Q, Sum
+
+from core.models import Branch, InventoryItem, VehicleModel
+from core.services.rollup_service import COLUMNS, daily_series
+
+SERIES_DAYS = 30
+
+
+def vehicle_counts(dealership):
+    """Total/new/used/available/sold vehicles in one pass over the dealer's rows."""
+    return VehicleModel.objects.filter(dealer=dealership).aggregate(
+        total_vehicles=Count('id'),
+        new_vehicles=Count('id', filter=Q(type='NEW')),
+        used_vehicles=Count('id', filter=Q(type='USED')),
+        available_vehicles=Count('id', filter=Q(status='AVAILABLE')),
+        sold_vehicles=Count('id', filter=Q(status='SOLD')),
+    )
+
+
+def inventory_value(dealership):
+    """Summed effective price of the branches' unsold inventory."""
+    return InventoryItem.objects.filter(
+        branch__dealership=dealership, status='AVAILABLE'
+    ).aggregate(value=Sum('effective_price'))['value'] or 0
+
+
+def booking_breakdown(dealership):
+    """
+    Booking totals by type, status and branch from one GROUP BY over the
+    dealer's branches; branches without bookings are listed with zero.
+    """
+    rows = (
+        Branch.objects.filter(dealership=dealership)
+        .values('id', 'name', 'booking__status')
+        .annotate(
+            count=Count('booking'),
+            test_rides=Count('booking', filter=Q(booking__booking_type='TEST_RIDE')),
+            inquiries=Count('booking', filter=Q(booking__booking_type='INQUIRY')),
+            service_requests=Count('booking', filter=Q(booking__booking_type='SERVICE')),
+        )
+        .order_by('name', 'id')
+    )
+
+    totals = Counter()
+    by_status = Counter()
+    by_branch = {}
+    for row in rows:
+        branch = by_branch.setdefault(row['id'], {'id': row['id'], 'name': row['name'], 'count': 0})
+        branch['count'] += row['count']
+        if row['booking__status'] is not None:
+            by_status[row['booking__status']] += row['count']
+        totals.update({key: row[key] for key in ('count', 'test_rides', 'inquiries', 'service_requests')})
+
+    return {
+        'total_bookings': totals['count'],
+        'test_ride_bookings': totals['test_rides'],
+        'inquiry_bookings': totals['inquiries'],
+        'service_bookings': totals['service_requests'],
+        'bookings_by_status': dict(by_status),
+        'bookings_by_branch': list(by_branch.values()),
+    }
+
+
+def get_dashboard(dealership, days=SERIES_DAYS):
+    """
+    Dealer dashboard metrics; a fixed number of queries however much data
+    there is. Charts over the last `days` days come from the daily rollups,
+    at most one small row per branch and day.
+    """
+    daily = daily_series(dealership, days)
+    return {
+        **vehicle_counts(dealership),
+        **booking_breakdown(dealership),
+        'inventory_value': inventory_value(dealership),
+        'days': days,
+        'daily': daily,
+        'period_totals': {column: sum(row[column] for row in daily) for column in COLUMNS},
+        'vehicles_over_time': [
+            {'date': row['date'], 'count': row['vehicles_added']} for row in daily if row['vehicles_added']
+        ],
+    }
@@ -0,0 +1,136 @@
+import asyncio
+import json
+import logging
+import threading
+from contextlib import asynccontextmanager
+from functools import cache, partial
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'vahanbazar_events'
+# A NOTIFY payload is capped at 8000 bytes, so fan-outs are split
+MAX_USERS_PER_MESSAGE = 500
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+def _offer(queue, message):
+    """Queue `message`; a subscriber that stopped reading loses its oldest message."""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(message)
+
+
+class LocalBroker:
+    """
+    In-process pub/sub. Each subscriber is an asyncio queue registered under
+    its user id, so an idle stream costs a waiting coroutine and a queue.
+    publish() is thread-safe: under ASGI the sync views publishing events
+    run in worker threads. Only subscribers in the publishing process are
+    reached; use PostgresBroker when several server processes run.
+    """
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def publish(self, message):
+        self.dispatch(message)
+
+    def dispatch(self, message):
+        with self._lock:
+            targets = [entry for user_id in message['users'] for entry in self._subscribers.get(user_id, ())]
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, message)
+            except RuntimeError:
+                pass  # the subscriber's event loop has closed
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(entries) for entries in self._subscribers.values())
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(entry)
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                entries = self._subscribers.get(user_id, set())
+                entries.discard(entry)
+                if not entries:
+                    self._subscribers.pop(user_id, None)
+
+
+class PostgresBroker(LocalBroker):
+    """
+    Pub/sub across processes over PostgreSQL LISTEN/NOTIFY. publish() sends
+    pg_notify on the request's connection; each process keeps one listening
+    connection per event loop that hands messages to its local subscribers.
+    """
+
+    def __init__(self):
+        super().__init__()
+        # event loop -> (listener task, set while its LISTEN is active)
+        self._listeners = {}
+
+    def publish(self, message):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps(message, cls=DjangoJSONEncoder)])
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        loop = asyncio.get_running_loop()
+        listener, listening = self._listeners.get(loop, (None, None))
+        if listener is None or listener.done():
+            listening = asyncio.Event()
+            listener = loop.create_task(self._listen(listening))
+            self._listeners[loop] = (listener, listening)
+        async with super().subscribe(user_id) as queue:
+            # Only return once LISTEN has run, or the first messages are lost
+            await listening.wait()
+            yield queue
+
+    async def _listen(self, listening):
+        import psycopg
+
+        params = connection.get_connection_params()
+        for option in ('cursor_factory', 'context', 'prepare_threshold'):
+            params.pop(option, None)
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(**params, autocommit=True) as listener:
+                    await listener.execute(f'LISTEN {CHANNEL}')
+                    listening.set()
+                    async for notify in listener.notifies():
+                        self.dispatch(json.loads(notify.payload))
+            except (psycopg.Error, OSError):
+                listening.clear()
+                logger.exception("Event listener lost its database connection, reconnecting")
+                await asyncio.sleep(1)
+
+
+@cache
+def get_broker():
+    return import_string(settings.EVENT_BROKER)()
+
+
+def publish_event(user_ids, event, data=None):
+    """
+    Send `event` to the users' open streams once the current transaction
+    commits. Subscribers get {'users', 'event', 'data'}; large fan-outs go
+    out as several messages.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    broker = get_broker()
+    for start in range(0, len(user_ids), MAX_USERS_PER_MESSAGE):
+        message = {'users': user_ids[start:start + MAX_USERS_PER_MESSAGE], 'event': event, 'data': data}
+        transaction.on_commit(partial(broker.publish, message))
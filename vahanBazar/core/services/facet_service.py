@@ -0,0 +1,76 @@
+from django.db.models import Case, CharField, Count, Q, Value, When
+
+# (key, lower bound inclusive, upper bound exclusive); None means open-ended.
+PRICE_BUCKETS = [
+    ('under_50k', None, 50000),
+    ('50k_1l', 50000, 100000),
+    ('1l_2l', 100000, 200000),
+    ('2l_3l', 200000, 300000),
+    ('above_3l', 300000, None),
+]
+
+FACET_FIELDS = {
+    'category': 'category',
+    'fuel_type': 'fuel_type',
+    'type': 'type',
+}
+
+
+def price_bucket_expression(field='price'):
+    """CASE expression mapping a price column onto a PRICE_BUCKETS key."""
+    whens = []
+    for key, low, high in PRICE_BUCKETS:
+        condition = Q()
+        if low is not None:
+            condition &= Q(**{f'{field}__gte': low})
+        if high is not None:
+            condition &= Q(**{f'{field}__lt': high})
+        whens.append(When(condition, then=Value(key)))
+    return Case(*whens, output_field=CharField())
+
+
+def _unordered(queryset):
+    return queryset.order_by().select_related(None).prefetch_related(None)
+
+
+def get_facet_counts(queryset, price_field='price', facet_querysets=None):
+    """
+    Count the filtered vehicles per brand, category, fuel type, type and price
+    bucket. Each facet is a single GROUP BY, so only counts leave the database.
+
+    Facets are disjunctive: `facet_querysets` maps a facet to the queryset
+    filtered by everything except that facet's own selection, so picking one
+    category still counts the others. Facets missing from it use `queryset`.
+    """
+    facet_querysets = facet_querysets or {}
+
+    def base(facet):
+        return _unordered(facet_querysets.get(facet, queryset))
+
+    brand_rows = (
+        base('brand').values('brand_id', 'brand__name')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'brand__name')
+    )
+    facets = {
+        'brand': [
+            {'id': row['brand_id'], 'name': row['brand__name'], 'count': row['count']}
+            for row in brand_rows
+        ],
+    }
+
+    for facet, field in FACET_FIELDS.items():
+        rows = base(facet).values(field).annotate(count=Count('id')).order_by('-count', field)
+        facets[facet] = [{'value': row[field], 'count': row['count']} for row in rows]
+
+    bucket_counts = dict(
+        base('price').annotate(price_bucket=price_bucket_expression(price_field))
+        .values('price_bucket')
+        .annotate(count=Count('id'))
+        .values_list('price_bucket', 'count')
+    )
+    facets['price'] = [
+        {'key': key, 'min': low, 'max': high, 'count': bucket_counts.get(key, 0)}
+        for key, low, high in PRICE_BUCKETS
+    ]
+    return facets
@@ -0,0 +1,115 @@
+import hashlib
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from core.models import VehicleImage
+from core.services.cache_service import bump_versions, version_scope
+from core.services.blob_service import acquire_blobs
+from core.services.rendition_service import schedule_renditions
+
+MIN_IMAGES = 3
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def hash_file(file):
+    """sha256 of an uploaded or stored file, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in file.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def stored_hash(image):
+    """The image's content hash, computed once from storage if missing."""
+    if not image.content_hash:
+        with image.image.open('rb') as file:
+            image.content_hash = hash_file(file)
+        VehicleImage.objects.filter(pk=image.pk).update(content_hash=image.content_hash)
+    return image.content_hash
+
+
+def _invalidate(vehicle):
+    # bulk_create/bulk_update/update send no model signals
+    bump_versions(version_scope('vehicle', vehicle.pk), 'vehicles')
+
+
+def add_images(vehicle, files, start_order=0):
+    """Store uploaded files as the vehicle's images with one INSERT."""
+    images = [
+        VehicleImage(vehicle=vehicle, image=file, order=start_order + index, content_hash=hash_file(file))
+        for index, file in enumerate(files)
+    ]
+    created = VehicleImage.objects.bulk_create(images)
+    # bulk_create skips the post_save receiver that counts blob references
+    acquire_blobs(image.image.name for image in created)
+    _invalidate(vehicle)
+    schedule_renditions(image.id for image in created)
+    return created
+
+
+def replace_images(vehicle, files, entries=None):
+    """
+    Make the vehicle's images match a new ordered list, touching only what
+    changed: kept images are reordered in place, only new uploads are
+    stored and only dropped images are deleted.
+
+    `entries` lists the final images in order, each either {"id": <existing
+    image id>} or {"upload": <index into files>}; a reorder-only request
+    sends ids alone and does no file I/O. Without `entries`, `files` is the
+    complete new list and uploads matching an existing image's content hash
+    keep that image instead of being stored again.
+    """
+    existing = {image.id: image for image in vehicle.images.all()}
+
+    if entries is None:
+        by_hash = {}
+        for image in sorted(existing.values(), key=lambda image: (image.order, image.id)):
+            by_hash.setdefault(stored_hash(image), []).append(image)
+        final = []
+        for file in files:
+            matches = by_hash.get(hash_file(file))
+            final.append(matches.pop(0) if matches else file)
+    else:
+        final = []
+        for entry in entries:
+            if not isinstance(entry, dict):
+                raise ValidationError({"images": "Each image must be {\"id\": ...} or {\"upload\": ...}"})
+            if 'id' in entry:
+                if entry['id'] not in existing:
+                    raise ValidationError({"images": f"Image {entry['id']} does not belong to this vehicle"})
+                final.append(existing[entry['id']])
+            elif isinstance(entry.get('upload'), int) and 0 <= entry['upload'] < len(files):
+                final.append(files[entry['upload']])
+            else:
+                raise ValidationError({"images": f"Invalid image entry {entry}"})
+
+    kept_ids = [item.id for item in final if isinstance(item, VehicleImage)]
+    if len(set(kept_ids)) != len(kept_ids):
+        raise ValidationError({"images": "An image is listed more than once"})
+    if len(final) < MIN_IMAGES:
+        raise ValidationError({"images": f"At least {MIN_IMAGES} images are required"})
+
+    with transaction.atomic():
+        removed = [image for image_id, image in existing.items() if image_id not in kept_ids]
+        if removed:
+            # post_delete releases each file (see signals.release_vehicle_image)
+            VehicleImage.objects.filter(id__in=[image.id for image in removed]).delete()
+
+        moved = []
+        new_images = []
+        for order, item in enumerate(final):
+            if isinstance(item, VehicleImage):
+                if item.order != order:
+                    item.order = order
+                    moved.append(item)
+            else:
+                new_images.append(VehicleImage(vehicle=vehicle, image=item, order=order, content_hash=hash_file(item)))
+        if moved:
+            VehicleImage.objects.bulk_update(moved, ['order'])
+        if new_images:
+            VehicleImage.objects.bulk_create(new_images)
+            acquire_blobs(image.image.name for image in new_images)
+            schedule_renditions(image.id for image in new_images)
+        _invalidate(vehicle)
@@ -0,0 +1,392 @@
+import csv
+import io
+import json
+from collections import Counter
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.validators import DecimalValidator
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core.models import Brand, InventoryItem, VehicleModel, VehicleModelVariant
+from core.services.cache_service import bump_versions
+from core.services.price_alert_service import record_initial_prices
+from core.services.rollup_service import add_to_rollup
+from core.services.search_service import refresh_search_index
+from core.services.spec_service import build_spec_index
+from core.services.suggest_service import (
+    brand_payload, index_suggestion, model_payload, suggest_index, variant_payload
+)
+
+IMPORT_BATCH_SIZE = 1000
+MAX_IMPORT_ROWS = 50000
+MAX_REPORTED_ERRORS = 1000
+MAX_STOCK_PER_ROW = 100
+
+REQUIRED_COLUMNS = ('brand', 'name', 'category', 'fuel_type', 'price', 'branch')
+OPTIONAL_COLUMNS = (
+    'model_name', 'status', 'is_featured', 'discount_type', 'discount_value', 'discount_description',
+    'specs', 'variant', 'stock',
+)
+# "spec:Engine" / "variant_spec:Engine" columns add one spec each
+SPEC_PREFIX = 'spec:'
+VARIANT_SPEC_PREFIX = 'variant_spec:'
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y'}
+FALSE_VALUES = {'', '0', 'false', 'no', 'n'}
+
+_price_validator = DecimalValidator(12, 2)
+_discount_validator = DecimalValidator(10, 2)
+
+
+def _choices(field_name, model=VehicleModel):
+    return {value for value, _ in model._meta.get_field(field_name).choices}
+
+
+CATEGORIES = _choices('category')
+FUEL_TYPES = _choices('fuel_type')
+STATUSES = _choices('status')
+DISCOUNT_TYPES = _choices('discount_type')
+
+
+def _text(value):
+    """A cell as stripped text; spreadsheets hand whole numbers over as floats."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def _header(column):
+    column = _text(column)
+    for prefix in (SPEC_PREFIX, VARIANT_SPEC_PREFIX):
+        if column.lower().startswith(prefix):
+            return prefix + column[len(prefix):].strip()
+    return column.lower().replace(' ', '_')
+
+
+def _read_csv(file):
+    reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    yield from reader
+
+
+def _read_xlsx(file):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValidationError({"file": "XLSX import needs openpyxl installed; upload a CSV file instead"})
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception:
+        raise ValidationError({"file": "Not a readable XLSX file"})
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def read_rows(file, filename):
+    """
+    Stream (row number, {column: cell}) from a binary CSV or XLSX file; the
+    first row is the header and row numbers match the spreadsheet's.
+    """
+    if filename.lower().endswith('.xlsx'):
+        rows = _read_xlsx(file)
+    elif filename.lower().endswith('.csv'):
+        rows = _read_csv(file)
+    else:
+        raise ValidationError({"file": "Upload a .csv or .xlsx file"})
+    try:
+        header = [_header(column) for column in next(rows, [])]
+        missing = [column for column in REQUIRED_COLUMNS if column not in header]
+        if missing:
+            raise ValidationError({"file": f"Missing column(s): {', '.join(missing)}"})
+        for number, cells in enumerate(rows, start=2):
+            if not any(_text(cell) for cell in cells):
+                continue
+            yield number, dict(zip(header, cells))
+    except UnicodeDecodeError:
+        raise ValidationError({"file": "CSV files must be UTF-8 encoded"})
+
+
+def ignored_columns(columns):
+    known = {*REQUIRED_COLUMNS, *OPTIONAL_COLUMNS}
+    return [
+        column for column in columns
+        if column not in known and not column.startswith((SPEC_PREFIX, VARIANT_SPEC_PREFIX))
+    ]
+
+
+class CatalogueImport:
+    """
+    Bulk import of one dealership's new vehicles. Brands, branches and the
+    dealership's existing variants are read once into lookup tables, rows
+    are validated and written a batch at a time with bulk_create, and every
+    row that fails validation is reported instead of written.
+
+    bulk_create sends no model signals, so this does their bookkeeping:
+    spec and search indexes, suggestions, rollups, the baseline price
+    history and cache versions.
+    """
+
+    def __init__(self, dealership, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+        self.dealership = dealership
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self.brands = {name.lower(): pk for pk, name in Brand.objects.values_list('pk', 'name')}
+        self.branches = {}
+        for pk, name in dealership.branches.values_list('pk', 'name'):
+            self.branches[str(pk)] = pk
+            self.branches.setdefault(name.lower(), pk)
+        # (brand, vehicle name, variant name), lower-cased -> (variant id, specs, owning vehicle id)
+        self.variants = {
+            (brand.lower(), vehicle.lower(), name.lower()): (pk, specs, vehicle_id)
+            for pk, name, specs, vehicle_id, brand, vehicle in VehicleModelVariant.objects.filter(
+                vehicle_model__dealer=dealership
+            ).values_list('pk', 'name', 'specs', 'vehicle_model_id', 'vehicle_model__brand__name', 'vehicle_model__name')
+        }
+        self.rows = 0
+        self.imported = 0
+        self.created = dict.fromkeys(('brands', 'vehicles', 'variants', 'inventory_items'), 0)
+        self.errors = []
+        self.error_count = 0
+        self.ignored_columns = None
+
+    def run(self, rows):
+        batch = []
+        for number, row in rows:
+            if self.ignored_columns is None:
+                self.ignored_columns = ignored_columns(row)
+            self.rows += 1
+            if self.rows > MAX_IMPORT_ROWS:
+                raise ValidationError({"file": f"At most {MAX_IMPORT_ROWS} rows can be imported at once"})
+            cleaned, errors = self.clean(row)
+            if errors:
+                self.error_count += 1
+                if len(self.errors) < MAX_REPORTED_ERRORS:
+                    self.errors.append({'row': number, 'errors': errors})
+                continue
+            batch.append(cleaned)
+            if len(batch) == self.batch_size:
+                self.write(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+        return self.report()
+
+    def report(self):
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'dry_run': self.dry_run,
+            'created': self.created,
+            'ignored_columns': self.ignored_columns or [],
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+    def clean(self, row):
+        """(values for the write, {column: message}) of one row."""
+        values, errors = {}, {}
+
+        for column, max_length in (('brand', 120), ('name', 200), ('model_name', 200), ('variant', 200),
+                                   ('discount_description', 200)):
+            values[column] = _text(row.get(column))
+            if len(values[column]) > max_length:
+                errors[column] = f"At most {max_length} characters"
+        for column in ('brand', 'name'):
+            if not values[column]:
+                errors[column] = "This field is required"
+
+        for column, choices, default in (
+            ('category', CATEGORIES, None), ('fuel_type', FUEL_TYPES, None), ('status', STATUSES, 'AVAILABLE'),
+        ):
+            value = _text(row.get(column)).upper() or default
+            if value not in choices:
+                errors[column] = f"Must be one of {', '.join(sorted(choices))}"
+            values[column] = value
+
+        branch = _text(row.get('branch'))
+        values['branch_id'] = self.branches.get(branch) or self.branches.get(branch.lower())
+        if values['branch_id'] is None:
+            errors['branch'] = f"No branch {branch!r} in your dealership" if branch else "This field is required"
+
+        values['price'] = self._decimal(row, 'price', _price_validator, errors, required=True)
+        values['discount_value'] = self._decimal(row, 'discount_value', _discount_validator, errors)
+        discount_type = _text(row.get('discount_type')).lower() or None
+        if discount_type is not None and discount_type not in DISCOUNT_TYPES:
+            errors['discount_type'] = f"Must be one of {', '.join(sorted(DISCOUNT_TYPES))}"
+        elif discount_type and not values['discount_value']:
+            errors['discount_value'] = "Discount value is required when discount type is set"
+        elif values['discount_value'] and not discount_type:
+            errors['discount_type'] = "Discount type is required when discount value is set"
+        elif discount_type == 'percentage' and values['discount_value'] > 100:
+            errors['discount_value'] = "A percentage discount is at most 100"
+        values['discount_type'] = discount_type
+
+        featured = _text(row.get('is_featured')).lower()
+        if featured not in TRUE_VALUES | FALSE_VALUES:
+            errors['is_featured'] = "Must be true or false"
+        values['is_featured'] = featured in TRUE_VALUES
+
+        stock = _text(row.get('stock')) or '0'
+        if not stock.isdigit() or int(stock) > MAX_STOCK_PER_ROW:
+            errors['stock'] = f"Must be a whole number from 0 to {MAX_STOCK_PER_ROW}"
+        elif int(stock) and not values['variant']:
+            errors['stock'] = "Stock needs a variant"
+        else:
+            values['stock'] = int(stock)
+
+        specs = _text(row.get('specs'))
+        try:
+            values['specs'] = json.loads(specs) if specs else {}
+            if not isinstance(values['specs'], dict):
+                raise ValueError
+        except ValueError:
+            errors['specs'] = "Must be a JSON object"
+        values['variant_specs'] = {}
+        for column, cell in row.items():
+            value = _text(cell)
+            if not value or not column:
+                continue
+            if column.startswith(SPEC_PREFIX) and 'specs' not in errors:
+                values['specs'][column[len(SPEC_PREFIX):]] = value
+            elif column.startswith(VARIANT_SPEC_PREFIX):
+                values['variant_specs'][column[len(VARIANT_SPEC_PREFIX):]] = value
+        return values, errors
+
+    def _decimal(self, row, column, validator, errors, required=False):
+        text = _text(row.get(column)).replace(',', '')
+        if not text:
+            if required:
+                errors[column] = "This field is required"
+            return None
+        try:
+            value = Decimal(text)
+            if not value.is_finite() or value < 0:
+                raise InvalidOperation
+            validator(value)
+        except InvalidOperation:
+            errors[column] = "Must be a non-negative number"
+            return None
+        except DjangoValidationError as error:
+            errors[column] = error.messages[0]
+            return None
+        return value
+
+    def _brand_ids(self, names):
+        """Resolve brand names, creating the unknown ones (first spelling wins)."""
+        new = {}
+        for name in names:
+            if name.lower() not in self.brands:
+                new.setdefault(name.lower(), name)
+        if not new or self.dry_run:
+            self.created['brands'] += len(new)
+            self.brands.update(dict.fromkeys(new))
+            return
+        Brand.objects.bulk_create([Brand(name=name) for name in new.values()], ignore_conflicts=True)
+        created = list(Brand.objects.filter(name__in=new.values()).values_list('pk', 'name'))
+        self.brands.update({name.lower(): pk for pk, name in created})
+        self.created['brands'] += len(created)
+        if suggest_index.wants_updates:
+            for pk, name in created:
+                index_suggestion('brand', pk, brand_payload(pk, name), [name])
+
+    def write(self, batch):
+        brands_before = self.created['brands']
+        self._brand_ids(row['brand'] for row in batch)
+        vehicles, keys, new_variants = [], [], {}
+        for row in batch:
+            key = (row['brand'].lower(), row['name'].lower(), row['variant'].lower()) if row['variant'] else None
+            variant_id, variant_specs, _ = self.variants.get(key, (None, {}, None))
+            if key and key not in self.variants:
+                # The first row naming a new variant owns it; later rows link to it
+                variant_specs = new_variants.setdefault(key, (len(vehicles), row))[1]['variant_specs']
+            vehicles.append(VehicleModel(
+                brand_id=self.brands[row['brand'].lower()], dealer=self.dealership, branch_id=row['branch_id'],
+                type='NEW', name=row['name'], model_name=row['model_name'] or None,
+                category=row['category'], fuel_type=row['fuel_type'], price=row['price'], status=row['status'],
+                is_featured=row['is_featured'], discount_type=row['discount_type'],
+                discount_value=row['discount_value'], discount_description=row['discount_description'] or None,
+                specs=row['specs'], variant_id=variant_id,
+                spec_index=build_spec_index(row['specs'], variant_specs),
+            ))
+            keys.append(key)
+
+        if self.dry_run:
+            self.created['vehicles'] += len(vehicles)
+            self.created['variants'] += len(new_variants)
+            self.created['inventory_items'] += sum(row['stock'] for row in batch)
+            self.variants.update(dict.fromkeys(new_variants, (None, {}, None)))
+            return
+
+        with transaction.atomic():
+            VehicleModel.objects.bulk_create(vehicles)
+            variants = VehicleModelVariant.objects.bulk_create([
+                VehicleModelVariant(vehicle_model=vehicles[owner], name=row['variant'], specs=row['variant_specs'])
+                for owner, row in new_variants.values()
+            ])
+            for key, variant in zip(new_variants, variants):
+                self.variants[key] = (variant.pk, variant.specs, variant.vehicle_model_id)
+            linked = []
+            for vehicle, key in zip(vehicles, keys):
+                if key in new_variants:
+                    vehicle.variant_id = self.variants[key][0]
+                    linked.append(vehicle)
+            VehicleModel.objects.bulk_update(linked, ['variant'])
+
+            items = InventoryItem.objects.bulk_create([
+                InventoryItem(
+                    branch_id=row['branch_id'], vehicle_model_variant_id=vehicle.variant_id, price=row['price'],
+                    discount_type=row['discount_type'], discount_value=row['discount_value'],
+                    discount_description=row['discount_description'] or None,
+                )
+                for row, vehicle in zip(batch, vehicles)
+                for _ in range(row['stock'])
+            ])
+            refresh_search_index(VehicleModel.objects.filter(pk__in=[vehicle.pk for vehicle in vehicles]))
+            record_initial_prices([vehicle.pk for vehicle in vehicles], [item.pk for item in items])
+            today = timezone.localdate()
+            added = Counter(vehicle.branch_id for vehicle in vehicles)
+            sold = Counter(vehicle.branch_id for vehicle in vehicles if vehicle.status == 'SOLD')
+            for branch_id, count in added.items():
+                add_to_rollup(
+                    self.dealership.pk, branch_id, today, vehicles_added=count, vehicles_sold=sold[branch_id],
+                )
+
+        self.imported += len(vehicles)
+        self.created['vehicles'] += len(vehicles)
+        self.created['variants'] += len(variants)
+        self.created['inventory_items'] += len(items)
+        scopes = ['vehicles']
+        if items:
+            scopes.append('inventory')
+        if self.created['brands'] > brands_before:
+            scopes.append('brands')
+        bump_versions(*scopes)
+        if suggest_index.wants_updates:
+            self._index_suggestions(vehicles, variants)
+
+    def _index_suggestions(self, vehicles, variants):
+        brand_names = dict(
+            Brand.objects.filter(pk__in={vehicle.brand_id for vehicle in vehicles}).values_list('pk', 'name')
+        )
+        for vehicle in vehicles:
+            index_suggestion(
+                'model', vehicle.pk, model_payload(vehicle.pk, vehicle.name, brand_names[vehicle.brand_id]),
+                [vehicle.name, vehicle.model_name],
+            )
+        for variant in variants:
+            vehicle_name = variant.vehicle_model.name
+            index_suggestion(
+                'variant', variant.pk, variant_payload(variant.pk, variant.name, variant.vehicle_model_id, vehicle_name),
+                [variant.name, vehicle_name],
+            )
+
+
+def import_catalogue(dealership, file, filename, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """Import a CSV/XLSX catalogue for `dealership`; returns the report."""
+    return CatalogueImport(dealership, dry_run=dry_run, batch_size=batch_size).run(read_rows(file, filename))
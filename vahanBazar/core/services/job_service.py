@@ -0,0 +1,230 @@
+import logging
+import random
+import time
+import traceback
+from collections import namedtuple
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections, connection, transaction
+from django.db.models import Count, F, Min, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from core.models import Job, JobMetrics
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 10
+RETRY_MAX_SECONDS = 60 * 60
+# How often each worker thread looks for jobs abandoned by a dead worker
+STALE_SWEEP_SECONDS = 60
+
+JobType = namedtuple('JobType', ['function', 'max_attempts'])
+JOB_TYPES = {}
+
+
+def job(kind, max_attempts=None):
+    """
+    Register the decorated function as the handler of jobs of `kind`; it is
+    called with the job's payload as keyword arguments. Jobs run at least
+    once (a worker can die after the work but before recording it), so
+    handlers must be idempotent.
+    """
+    def decorator(function):
+        JOB_TYPES[kind] = JobType(function, max_attempts)
+        return function
+    return decorator
+
+
+def enqueue(kind, payload=None, key=None, delay=None):
+    """
+    Queue a job in the current transaction: it only becomes visible to the
+    workers, and only exists at all, if the transaction commits. With a
+    `key`, a queued job with the same key absorbs this one.
+    """
+    if kind not in JOB_TYPES:
+        raise ValueError(f"Unknown job kind {kind!r}")
+    payload = payload or {}
+    if settings.JOB_QUEUE_EAGER:
+        transaction.on_commit(partial(run_eagerly, kind, payload))
+        return
+    Job.objects.bulk_create(
+        [Job(
+            kind=kind, payload=payload, key=key,
+            run_at=timezone.now() + (delay or timedelta()),
+            max_attempts=JOB_TYPES[kind].max_attempts or settings.JOB_MAX_ATTEMPTS,
+        )],
+        ignore_conflicts=key is not None,
+    )
+
+
+def run_eagerly(kind, payload):
+    try:
+        JOB_TYPES[kind].function(**payload)
+    except Exception:
+        logger.exception("Job %s failed", kind)
+
+
+def retry_delay(attempts):
+    """Exponential backoff with jitter: ~10s, 20s, 40s... capped at an hour."""
+    delay = min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def record_metrics(kind, seconds=0, **deltas):
+    """Add to a kind's counters; `seconds` is one run's duration."""
+    now = timezone.now()
+    values = {'total_seconds': seconds, 'max_seconds': seconds, **deltas}
+    if deltas.get('succeeded'):
+        values['last_succeeded_at'] = now
+    if deltas.get('failed'):
+        values['last_failed_at'] = now
+    updates = {**values, 'total_seconds': F('total_seconds') + seconds, 'max_seconds': Greatest('max_seconds', seconds)}
+    updates.update({column: F(column) + delta for column, delta in deltas.items()})
+    # As in add_to_rollup: a concurrent first insert makes get_or_create
+    # find the row, and the loop updates it
+    while not JobMetrics.objects.filter(kind=kind).update(**updates):
+        _, created = JobMetrics.objects.get_or_create(kind=kind, defaults=values)
+        if created:
+            break
+
+
+def claim_job(worker, kinds=None):
+    """Lock the next due job, mark it running and return it (or None)."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = Job.objects.select_for_update(skip_locked=True).filter(status='QUEUED', run_at__lte=now)
+        if kinds:
+            due = due.filter(kind__in=kinds)
+        job = due.order_by('run_at', 'id').first()
+        if job is None:
+            return None
+        job.status = 'RUNNING'
+        job.attempts += 1
+        job.started_at = now
+        job.worker = worker
+        job.save(update_fields=['status', 'attempts', 'started_at', 'worker'])
+    return job
+
+
+def fail_job(job, error, seconds=0):
+    """
+    Queue the job again after a backoff, or give up once it has used its
+    attempts. A keyed job whose key was queued again meanwhile is dropped:
+    the queued job does the same work.
+    """
+    if job.attempts >= job.max_attempts:
+        Job.objects.filter(pk=job.pk).update(status='FAILED', last_error=error)
+        record_metrics(job.kind, failed=1, seconds=seconds)
+        logger.error("Job %s #%s failed after %s attempts", job.kind, job.pk, job.attempts)
+        return
+    try:
+        with transaction.atomic():
+            Job.objects.filter(pk=job.pk).update(
+                status='QUEUED', last_error=error, run_at=timezone.now() + retry_delay(job.attempts),
+            )
+    except IntegrityError:
+        Job.objects.filter(pk=job.pk).delete()
+    record_metrics(job.kind, retried=1, seconds=seconds)
+
+
+def run_job(job):
+    """Run a claimed job; returns True if it succeeded."""
+    started = time.monotonic()
+    try:
+        job_type = JOB_TYPES.get(job.kind)
+        if job_type is None:
+            raise LookupError(f"No handler registered for job kind {job.kind!r}")
+        job_type.function(**job.payload)
+    except Exception:
+        logger.exception("Job %s #%s raised", job.kind, job.pk)
+        fail_job(job, traceback.format_exc(), time.monotonic() - started)
+        return False
+    Job.objects.filter(pk=job.pk).delete()
+    record_metrics(job.kind, succeeded=1, seconds=time.monotonic() - started)
+    return True
+
+
+def requeue_stale_jobs():
+    """Jobs left RUNNING longer than JOB_TIMEOUT_SECONDS lost their worker; retry them."""
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT_SECONDS)
+    with transaction.atomic():
+        stale = list(Job.objects.select_for_update(skip_locked=True).filter(status='RUNNING', started_at__lt=cutoff))
+        for job in stale:
+            fail_job(job, "The worker stopped before the job finished")
+    return len(stale)
+
+
+def work(worker, stop, kinds=None, poll_interval=1.0, burst=False):
+    """
+    One worker thread: claim and run jobs until `stop` (a threading.Event)
+    is set, or with `burst` until no job is due. Returns the jobs run.
+    """
+    processed = 0
+    next_sweep = 0
+    try:
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                if time.monotonic() >= next_sweep:
+                    # Advanced first, so a failing sweep does not starve claiming
+                    next_sweep = time.monotonic() + STALE_SWEEP_SECONDS
+                    requeue_stale_jobs()
+                job = claim_job(worker, kinds)
+            except DatabaseError:
+                logger.exception("Worker %s could not claim a job", worker)
+                connection.close()
+                stop.wait(poll_interval)
+                continue
+            if job is None:
+                if burst:
+                    break
+                stop.wait(poll_interval)
+                continue
+            try:
+                run_job(job)
+            except Exception:
+                # Recording the outcome failed; the job stays RUNNING until
+                # the stale sweep retries it
+                logger.exception("Worker %s could not record job %s #%s", worker, job.kind, job.pk)
+                connection.close()
+            processed += 1
+    finally:
+        connection.close()
+    return processed
+
+
+def job_stats():
+    """Per kind: the queue's current state and the lifetime counters."""
+    now = timezone.now()
+    queue = (
+        Job.objects.values('kind').order_by('kind')
+        .annotate(
+            queued=Count('id', filter=Q(status='QUEUED')),
+            due=Count('id', filter=Q(status='QUEUED', run_at__lte=now)),
+            running=Count('id', filter=Q(status='RUNNING')),
+            failed_jobs=Count('id', filter=Q(status='FAILED')),
+            oldest_due=Min('run_at', filter=Q(status='QUEUED', run_at__lte=now)),
+        )
+    )
+    stats = {}
+    for row in queue:
+        oldest_due = row.pop('oldest_due')
+        row['lag_seconds'] = round((now - oldest_due).total_seconds(), 1) if oldest_due else 0
+        stats[row.pop('kind')] = row
+    for metrics in JobMetrics.objects.all():
+        runs = metrics.succeeded + metrics.failed + metrics.retried
+        stats.setdefault(metrics.kind, {
+            'queued': 0, 'due': 0, 'running': 0, 'failed_jobs': 0, 'lag_seconds': 0,
+        }).update({
+            'succeeded': metrics.succeeded,
+            'failed': metrics.failed,
+            'retried': metrics.retried,
+            'average_seconds': round(metrics.total_seconds / runs, 3) if runs else None,
+            'max_seconds': round(metrics.max_seconds, 3),
+            'last_succeeded_at': metrics.last_succeeded_at,
+            'last_failed_at': metrics.last_failed_at,
+        })
+    return stats
@@ -0,0 +1,194 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import InventoryItem, Notification, PriceChange, VehicleModel, VehicleModelVariant, WishlistItem
+from core.services.event_service import publish_event
+from core.services.job_service import enqueue, job
+
+PRICE_FIELDS = ('price', 'discount_type', 'discount_value')
+NOTIFICATION_CHUNK = 2000
+# Changes made within this window are alerted on together, so a dealer
+# editing a price twice sends one notification
+ALERT_DELAY = timedelta(seconds=30)
+
+
+def _decimal(value):
+    return value if value is None or isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _normalise(price, discount_type, discount_value):
+    return _decimal(price), discount_type or None, _decimal(discount_value)
+
+
+def price_snapshot(model, pk):
+    """(price, discount_type, discount_value, effective_price) as stored."""
+    return model.objects.filter(pk=pk).values_list(*PRICE_FIELDS, 'effective_price').first()
+
+
+def record_price_change(instance, previous):
+    """
+    Append a history row for a vehicle or inventory item whose price or
+    discount differs from `previous` (its price_snapshot before the save,
+    None for a new row) and queue the alerts job. Returns the row, or None
+    if nothing changed.
+    """
+    current = _normalise(*(getattr(instance, field) for field in PRICE_FIELDS))
+    if previous is not None and _normalise(*previous[:3]) == current:
+        return None
+    # The database computes effective_price on save; read it rather than
+    # repeating the generated column's expression in Python
+    new_effective = type(instance).objects.filter(pk=instance.pk).values_list('effective_price', flat=True).get()
+    old_price, _, old_discount, old_effective = previous or (None, None, None, None)
+    if isinstance(instance, InventoryItem):
+        vehicle_id = instance.vehicle_model_variant.vehicle_model_id
+        inventory_item, source = instance, 'INVENTORY'
+    else:
+        vehicle_id, inventory_item, source = instance.pk, None, 'VEHICLE'
+    enqueue('send_price_alerts', key='send_price_alerts', delay=ALERT_DELAY)
+    return PriceChange.objects.create(
+        vehicle_id=vehicle_id, inventory_item=inventory_item, source=source,
+        old_price=old_price, new_price=instance.price,
+        old_discount_value=old_discount, new_discount_value=instance.discount_value,
+        old_effective_price=old_effective, new_effective_price=new_effective,
+    )
+
+
+def record_initial_prices(vehicle_ids=(), inventory_item_ids=()):
+    """
+    Baseline history rows for listings inserted with bulk_create, which
+    skips record_price_history, copied from the stored prices in one
+    statement. New listings have no wishlisters, so no alerts are pending.
+    """
+    tables = {
+        'history': PriceChange._meta.db_table,
+        'vehicle': VehicleModel._meta.db_table,
+        'item': InventoryItem._meta.db_table,
+        'variant': VehicleModelVariant._meta.db_table,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO {history} (
+                vehicle_id, inventory_item_id, source, new_price, new_discount_value,
+                new_effective_price, changed_at, alerts_sent_at
+            )
+            SELECT id, NULL, 'VEHICLE', price, discount_value, effective_price, %(now)s, %(now)s
+            FROM {vehicle} WHERE id = ANY(%(vehicles)s)
+            UNION ALL
+            SELECT variant.vehicle_model_id, item.id, 'INVENTORY', item.price, item.discount_value,
+                   item.effective_price, %(now)s, %(now)s
+            FROM {item} item JOIN {variant} variant ON variant.id = item.vehicle_model_variant_id
+            WHERE item.id = ANY(%(items)s)
+            """.format(**tables),
+            {'now': timezone.now(), 'vehicles': list(vehicle_ids), 'items': list(inventory_item_ids)},
+        )
+
+
+def price_drops(changes):
+    """
+    {vehicle_id: (old, new)} for vehicles whose price fell in `changes`
+    (ordered oldest first). Several changes to one priced row count as one
+    move from the first old price to the last new one; of a vehicle's rows
+    (its list price and each inventory item) the biggest drop is kept.
+    """
+    spans = {}
+    for change in changes:
+        key = (change.vehicle_id, change.inventory_item_id)
+        if key in spans:
+            old = spans[key][0]
+        else:
+            # A new listing's first price is its baseline
+            old = change.new_effective_price if change.old_effective_price is None else change.old_effective_price
+        spans[key] = (old, change.new_effective_price)
+
+    drops = {}
+    for (vehicle_id, _), (old, new) in spans.items():
+        if old is None or new >= old:
+            continue
+        if vehicle_id not in drops or old - new > drops[vehicle_id][0] - drops[vehicle_id][1]:
+            drops[vehicle_id] = (old, new)
+    return drops
+
+
+def notify_wishlisters(vehicle_id, name, old, new):
+    """
+    Notify everyone who saved the vehicle and whose thresholds the drop
+    meets: one streamed query over the wishlist, inserted in chunks.
+    Returns the number of notifications created.
+    """
+    amount = old - new
+    percent = amount * 100 / old
+    recipients = (
+        WishlistItem.objects.filter(vehicle_id=vehicle_id)
+        .filter(
+            Q(user__price_alert_setting__isnull=True)
+            | Q(
+                user__price_alert_setting__enabled=True,
+                user__price_alert_setting__min_drop_percent__lte=percent,
+                user__price_alert_setting__min_drop_amount__lte=amount,
+            )
+        )
+        .order_by('user_id')
+        .values_list('user_id', flat=True)
+    )
+    title = f"Price drop: {name}"[:200]
+    message = f"{name} is now ₹{new:,} (was ₹{old:,})."
+    sent, chunk = 0, []
+    for user_id in recipients.iterator(chunk_size=NOTIFICATION_CHUNK):
+        chunk.append(user_id)
+        if len(chunk) == NOTIFICATION_CHUNK:
+            sent += _create_notifications(chunk, title, message)
+            chunk = []
+    if chunk:
+        sent += _create_notifications(chunk, title, message)
+    return sent
+
+
+def _create_notifications(user_ids, title, message):
+    created = Notification.objects.bulk_create(
+        [Notification(user_id=user_id, title=title, message=message) for user_id in user_ids]
+    )
+    # bulk_create sends no post_save, so wake the users' streams here
+    publish_event(user_ids, 'notification')
+    return len(created)
+
+
+def send_price_alerts(batch_size=500):
+    """
+    Turn the oldest pending price changes into notifications and mark them
+    sent. Each vehicle's changes are claimed, notified and marked in a
+    transaction of their own, so a large batch never holds one transaction
+    over the whole fan-out. Rows are claimed with SKIP LOCKED, so several
+    runners can share the backlog. Returns (changes processed,
+    notifications created).
+    """
+    pending = (
+        PriceChange.objects.filter(alerts_sent_at__isnull=True)
+        .order_by('id').values_list('vehicle_id', flat=True)[:batch_size]
+    )
+    processed = sent = 0
+    for vehicle_id in dict.fromkeys(pending):
+        with transaction.atomic():
+            changes = list(
+                PriceChange.objects.select_for_update(skip_locked=True)
+                .filter(vehicle_id=vehicle_id, alerts_sent_at__isnull=True).order_by('id')
+            )
+            if not changes:
+                continue  # another runner has them
+            drop = price_drops(changes).get(vehicle_id)
+            if drop:
+                name = VehicleModel.objects.filter(pk=vehicle_id).values_list('name', flat=True).get()
+                sent += notify_wishlisters(vehicle_id, name, *drop)
+            PriceChange.objects.filter(pk__in=[change.pk for change in changes]).update(alerts_sent_at=timezone.now())
+        processed += len(changes)
+    return processed, sent
+
+
+@job('send_price_alerts')
+def send_price_alerts_job(batch_size=500):
+    while send_price_alerts(batch_size)[0]:
+        pass
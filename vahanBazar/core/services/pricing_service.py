@@ -0,0 +1,30 @@
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Cast, Greatest
+
+PRICE_FIELD = DecimalField(max_digits=12, decimal_places=2)
+
+
+def effective_price_expression():
+    """
+    Price after discount as a SQL expression: a percentage comes off the price,
+    a fixed amount or cashback is subtracted, and the result never drops below
+    zero. Rows without a discount keep their list price.
+
+    Only immutable functions are used, so the expression can back a stored
+    generated column as well as an annotation.
+    """
+    hundred = Value(100, output_field=PRICE_FIELD)
+    discounted = Case(
+        When(
+            discount_type='percentage', discount_value__isnull=False,
+            then=F('price') * (hundred - F('discount_value')) / hundred,
+        ),
+        When(
+            discount_type__in=['fixed', 'cashback'], discount_value__isnull=False,
+            then=F('price') - F('discount_value'),
+        ),
+        default=F('price'),
+        output_field=PRICE_FIELD,
+    )
+    return Cast(Greatest(discounted, Value(0, output_field=PRICE_FIELD)), output_field=PRICE_FIELD)
+
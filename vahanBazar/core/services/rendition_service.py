@@ -0,0 +1,138 @@
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from core.models import VehicleImage
+from core.services.cache_service import bump_versions, version_scope
+from core.services.job_service import enqueue, job
+
+logger = logging.getLogger(__name__)
+
+RENDITION_DIR = 'vehicles/renditions'
+# Rendition name -> maximum width; images are never upscaled
+RENDITION_SIZES = {'thumb': 320, 'card': 640, 'detail': 1280}
+RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def rendition_paths(image):
+    """Storage paths of every rendition recorded on `image`."""
+    return _paths(image.renditions)
+
+
+def _paths(renditions):
+    return [
+        entry[fmt]['path']
+        for entry in renditions.get('sizes', {}).values()
+        for fmt in RENDITION_FORMATS if fmt in entry
+    ]
+
+
+def _invalidate(images):
+    vehicle_ids = set(images.values_list('vehicle_id', flat=True))
+    bump_versions(*(version_scope('vehicle', vehicle_id) for vehicle_id in vehicle_ids), 'vehicles')
+
+
+def _load_source(image):
+    with image.image.open('rb') as file:
+        source = Image.open(file)
+        source.load()
+    source = ImageOps.exif_transpose(source)
+    if source.mode in ('RGBA', 'LA', 'P'):
+        # Neither JPEG nor the card background keep transparency
+        background = Image.new('RGB', source.size, 'white')
+        rgba = source.convert('RGBA')
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return source.convert('RGB')
+
+
+def generate_renditions(image, force=False):
+    """
+    Write every size/format rendition of `image` and record them on every
+    row sharing its file (images are content-addressed, so renditions are
+    per file, not per row). Skipped when the renditions already belong to
+    the current file, unless `force`. Returns True if the row changed.
+    """
+    source_name = image.image.name
+    if not force and image.renditions.get('source') == source_name:
+        return False
+
+    siblings = VehicleImage.objects.filter(image=source_name)
+    if not force:
+        shared = siblings.filter(renditions__contains={'source': source_name}).values_list('renditions', flat=True).first()
+        if shared:
+            pending = siblings.exclude(renditions__contains={'source': source_name})
+            _invalidate(pending)
+            image.renditions = shared
+            return bool(pending.update(renditions=shared))
+
+    source = _load_source(image)
+    stem = posixpath.splitext(posixpath.basename(image.image.name))[0]
+    sizes = {}
+    for name, max_width in RENDITION_SIZES.items():
+        if source.width > max_width:
+            height = max(1, round(source.height * max_width / source.width))
+            resized = source.resize((max_width, height), Image.Resampling.LANCZOS)
+        else:
+            resized = source
+        entry = {'width': resized.width, 'height': resized.height}
+        for fmt, (pil_format, options) in RENDITION_FORMATS.items():
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            path = default_storage.save(
+                f'{RENDITION_DIR}/{stem}_{name}.{fmt}', ContentFile(buffer.getvalue())
+            )
+            entry[fmt] = {'path': path, 'bytes': buffer.tell()}
+        sizes[name] = entry
+
+    renditions = {'source': source_name, 'sizes': sizes}
+    old_paths = {path for existing in siblings.values_list('renditions', flat=True) for path in _paths(existing)}
+    new_paths = _paths(renditions)
+    # Filtered on the file, so a concurrent replace or delete wins
+    _invalidate(siblings)
+    updated = siblings.update(renditions=renditions)
+    if updated:
+        image.renditions = renditions
+        stale = [path for path in old_paths if path not in new_paths]
+    else:
+        stale = new_paths
+    for path in stale:
+        default_storage.delete(path)
+    return bool(updated)
+
+
+def generate_for_ids(image_ids, force=False):
+    """
+    Render the given images, logging per-image failures. Returns the number
+    generated and the ids that failed.
+    """
+    generated, failed = 0, []
+    for image in VehicleImage.objects.filter(id__in=image_ids).iterator():
+        try:
+            generated += generate_renditions(image, force=force)
+        except Exception:
+            logger.exception("Could not generate renditions for image %s", image.pk)
+            failed.append(image.pk)
+    return generated, failed
+
+
+@job('generate_renditions')
+def generate_renditions_job(image_ids):
+    _, failed = generate_for_ids(image_ids)
+    if failed:
+        # Only the failures are retried; the rest are skipped as up to date
+        raise RuntimeError(f"Renditions failed for images {failed}")
+
+
+def schedule_renditions(image_ids):
+    """Queue rendition generation for `image_ids` with the current transaction."""
+    image_ids = list(image_ids)
+    if image_ids:
+        enqueue('generate_renditions', {'image_ids': image_ids})
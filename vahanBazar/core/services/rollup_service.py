@@ -0,0 +1,184 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.models import Booking, Branch, DealerDailyStats, VehicleModel, WishlistItem
+
+BOOKING_TYPE_COLUMNS = {
+    'TEST_RIDE': 'test_ride_bookings',
+    'INQUIRY': 'inquiry_bookings',
+    'SERVICE': 'service_bookings',
+}
+BOOKING_STATUS_COLUMNS = {
+    'PENDING': 'pending_bookings',
+    'CONFIRMED': 'confirmed_bookings',
+    'COMPLETED': 'completed_bookings',
+    'CANCELLED': 'cancelled_bookings',
+}
+# Columns that can be recounted from the source tables. vehicles_sold has no
+# source timestamp, so only the incremental counter knows it.
+REBUILT_COLUMNS = (
+    'vehicles_added', *BOOKING_TYPE_COLUMNS.values(), *BOOKING_STATUS_COLUMNS.values(), 'wishlist_adds',
+)
+COLUMNS = ('vehicles_sold', *REBUILT_COLUMNS)
+WINDOWS = (30, 90, 365)
+
+
+def add_to_rollup(dealership_id, branch_id, day, **deltas):
+    """
+    Add `deltas` ({column: n}) to one day's counters. The row is created by
+    the first increment of the day; a decrement of a missing row (e.g. while
+    its dealership is being deleted) is dropped, compaction recounts it.
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not dealership_id or not deltas:
+        return
+    key = {'dealership_id': dealership_id, 'branch_id': branch_id, 'date': day}
+    increments = {column: F(column) + delta for column, delta in deltas.items()}
+    # The UPDATE is atomic; a concurrent first insert makes get_or_create
+    # find the row, and the loop updates it
+    while not DealerDailyStats.objects.filter(**key).update(**increments):
+        if any(delta < 0 for delta in deltas.values()):
+            break
+        _, created = DealerDailyStats.objects.get_or_create(**key, defaults=deltas)
+        if created:
+            break
+
+
+def _booking_dealership_id(booking):
+    if not booking.branch_id:
+        return None
+    if Booking.branch.is_cached(booking):
+        return booking.branch.dealership_id
+    return Branch.objects.filter(pk=booking.branch_id).values_list('dealership_id', flat=True).first()
+
+
+def record_vehicle(vehicle, sign=1):
+    add_to_rollup(
+        vehicle.dealer_id, vehicle.branch_id, timezone.localdate(vehicle.added_on), vehicles_added=sign,
+    )
+
+
+def record_vehicle_sold(vehicle, sign=1):
+    add_to_rollup(vehicle.dealer_id, vehicle.branch_id, timezone.localdate(), vehicles_sold=sign)
+
+
+def record_booking(booking, sign=1):
+    """Count a booking (sign=-1 to uncount it) under its creation day."""
+    deltas = defaultdict(int)
+    if booking.booking_type in BOOKING_TYPE_COLUMNS:
+        deltas[BOOKING_TYPE_COLUMNS[booking.booking_type]] += sign
+    if booking.status in BOOKING_STATUS_COLUMNS:
+        deltas[BOOKING_STATUS_COLUMNS[booking.status]] += sign
+    add_to_rollup(
+        _booking_dealership_id(booking), booking.branch_id, timezone.localdate(booking.created_at), **deltas
+    )
+
+
+def record_booking_status(booking, old_status):
+    """Move a booking from its old status column to the new one."""
+    deltas = defaultdict(int)
+    if old_status in BOOKING_STATUS_COLUMNS:
+        deltas[BOOKING_STATUS_COLUMNS[old_status]] -= 1
+    if booking.status in BOOKING_STATUS_COLUMNS:
+        deltas[BOOKING_STATUS_COLUMNS[booking.status]] += 1
+    add_to_rollup(
+        _booking_dealership_id(booking), booking.branch_id, timezone.localdate(booking.created_at), **deltas
+    )
+
+
+def record_wishlist(item, sign=1):
+    vehicle = VehicleModel.objects.filter(pk=item.vehicle_id).values_list('dealer_id', 'branch_id').first()
+    dealer_id, branch_id = vehicle or (None, None)
+    add_to_rollup(dealer_id, branch_id, timezone.localdate(item.added_at), wishlist_adds=sign)
+
+
+def _day_range(start, end):
+    """Datetime bounds covering local dates start..end inclusive."""
+    return (
+        timezone.make_aware(datetime.combine(start, time.min)),
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min)),
+    )
+
+
+def count_from_source(start, end):
+    """{(dealership_id, branch_id, date): {column: n}} recounted from the source tables."""
+    start_at, end_at = _day_range(start, end)
+    counts = defaultdict(lambda: dict.fromkeys(REBUILT_COLUMNS, 0))
+
+    vehicles = (
+        VehicleModel.objects.filter(dealer__isnull=False, added_on__gte=start_at, added_on__lt=end_at)
+        .annotate(day=TruncDate('added_on')).order_by()
+        .values('dealer_id', 'branch_id', 'day').annotate(total=Count('id'))
+    )
+    for row in vehicles:
+        counts[(row['dealer_id'], row['branch_id'], row['day'])]['vehicles_added'] = row['total']
+
+    booking_columns = {
+        **{column: Count('id', filter=Q(booking_type=value)) for value, column in BOOKING_TYPE_COLUMNS.items()},
+        **{column: Count('id', filter=Q(status=value)) for value, column in BOOKING_STATUS_COLUMNS.items()},
+    }
+    bookings = (
+        Booking.objects.filter(branch__isnull=False, created_at__gte=start_at, created_at__lt=end_at)
+        .annotate(day=TruncDate('created_at')).order_by()
+        .values('branch__dealership_id', 'branch_id', 'day').annotate(**booking_columns)
+    )
+    for row in bookings:
+        counts[(row['branch__dealership_id'], row['branch_id'], row['day'])].update(
+            {column: row[column] for column in booking_columns}
+        )
+
+    wishlist = (
+        WishlistItem.objects.filter(vehicle__dealer__isnull=False, added_at__gte=start_at, added_at__lt=end_at)
+        .annotate(day=TruncDate('added_at')).order_by()
+        .values('vehicle__dealer_id', 'vehicle__branch_id', 'day').annotate(total=Count('id'))
+    )
+    for row in wishlist:
+        counts[(row['vehicle__dealer_id'], row['vehicle__branch_id'], row['day'])]['wishlist_adds'] = row['total']
+    return counts
+
+
+def compact_rollups(start, end):
+    """
+    Recount the rebuildable columns for local dates start..end from the
+    source tables, correcting any drift from writes that bypassed the
+    signals (bulk_create, raw SQL), and drop rows that are all zero.
+    Returns (rows written, rows deleted).
+    """
+    counts = count_from_source(start, end)
+    with transaction.atomic():
+        existing = {
+            (row.dealership_id, row.branch_id, row.date): row
+            for row in DealerDailyStats.objects.select_for_update().filter(date__gte=start, date__lte=end)
+        }
+        changed, created = [], []
+        for key, row in existing.items():
+            values = counts.pop(key, dict.fromkeys(REBUILT_COLUMNS, 0))
+            if any(getattr(row, column) != value for column, value in values.items()):
+                for column, value in values.items():
+                    setattr(row, column, value)
+                changed.append(row)
+        for (dealership_id, branch_id, day), values in counts.items():
+            created.append(DealerDailyStats(dealership_id=dealership_id, branch_id=branch_id, date=day, **values))
+
+        DealerDailyStats.objects.bulk_update(changed, REBUILT_COLUMNS, batch_size=500)
+        DealerDailyStats.objects.bulk_create(created, batch_size=500)
+        deleted, _ = DealerDailyStats.objects.filter(
+            date__gte=start, date__lte=end, **dict.fromkeys(COLUMNS, 0)
+        ).delete()
+    return len(changed) + len(created), deleted
+
+
+def daily_series(dealership, days):
+    """One row per day with activity in the last `days` days, summed over branches."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return list(
+        DealerDailyStats.objects.filter(dealership=dealership, date__gte=since)
+        .values('date')
+        .annotate(**{column: Sum(column) for column in COLUMNS})
+        .order_by('date')
+    )
@@ -0,0 +1,84 @@
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+)
+from django.db.models import CharField, DecimalField, F, OuterRef, Q, Subquery, Value
+from django.db.models.fields.json import KeyTextTransform
+from django.db.models.functions import Cast, Coalesce, Concat, Lower
+
+SEARCH_CONFIG = 'simple'
+
+# Spec values worth matching on, read from the flattened spec_index.
+SEARCH_SPEC_KEYS = ['Fuel Type', 'Engine', 'Transmission', 'Motor Type', 'Battery Type']
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _related_name(model, field):
+    related_model = model._meta.get_field(field).related_model
+    return Subquery(
+        related_model._default_manager.filter(pk=OuterRef(f'{field}_id')).values('name')[:1]
+    )
+
+
+def _spec_values():
+    return [KeyTextTransform(key, 'spec_index') for key in SEARCH_SPEC_KEYS]
+
+
+def refresh_search_index(queryset):
+    """
+    Recompute `search_vector` and `search_document` for the given vehicles in
+    a single UPDATE; brand and variant names are pulled in via subqueries.
+    """
+    model = queryset.model
+    brand_name = _related_name(model, 'brand')
+    variant_name = _related_name(model, 'variant')
+    search_vector = (
+        SearchVector('name', 'model_name', weight='A', config=SEARCH_CONFIG)
+        + SearchVector(brand_name, variant_name, weight='B', config=SEARCH_CONFIG)
+        + SearchVector(*_spec_values(), weight='C', config=SEARCH_CONFIG)
+    )
+    parts = ['name', 'model_name', brand_name, variant_name]
+    search_document = Lower(Concat(
+        *[
+            piece
+            for part in parts
+            for piece in (Coalesce(part, Value(''), output_field=CharField()), Value(' '))
+        ],
+        output_field=CharField(),
+    ))
+    return queryset.order_by().update(search_vector=search_vector, search_document=search_document)
+
+
+def build_search_query(term):
+    """Prefix tsquery: every word must match the start of an indexed lexeme."""
+    tokens = TOKEN_RE.findall(term.lower())
+    if not tokens:
+        return None
+    return SearchQuery(
+        ' & '.join(f'{token}:*' for token in tokens),
+        search_type='raw',
+        config=SEARCH_CONFIG,
+    )
+
+
+def search_vehicles(queryset, term):
+    """
+    Filter vehicles matching `term` through the tsvector (whole words and
+    prefixes) or through trigram word similarity (misspellings such as
+    "actva"), and annotate a `rank` combining both. The rank is a
+    fixed-precision decimal so it can key cursor pagination.
+    """
+    query = build_search_query(term)
+    if query is None:
+        return queryset
+
+    term = term.strip().lower()
+    rank = Cast(
+        SearchRank(F('search_vector'), query) + TrigramWordSimilarity(Value(term), 'search_document'),
+        DecimalField(max_digits=9, decimal_places=6),
+    )
+    return queryset.annotate(rank=rank).filter(
+        Q(search_vector=query) | Q(search_document__trigram_word_similar=term)
+    )
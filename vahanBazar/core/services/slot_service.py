@@ -0,0 +1,167 @@
+import logging
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from core.models import BookingSlot, BranchSlotConfig
+
+logger = logging.getLogger(__name__)
+
+MAX_RANGE_DAYS = 31
+
+
+class SlotUnavailable(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'This slot is fully booked.'
+    default_code = 'slot_unavailable'
+
+
+def slot_times(config):
+    """Start times of the slots in one day of `config`."""
+    step = timedelta(minutes=config.slot_minutes)
+    start = datetime.combine(datetime.min, config.opens_at)
+    end = datetime.combine(datetime.min, config.closes_at)
+    times = []
+    while start + step <= end:
+        times.append(start.time())
+        start += step
+    return times
+
+
+def open_days(config, start, end):
+    closed = set(config.closed_weekdays or ())
+    day = start
+    while day <= end:
+        if day.weekday() not in closed:
+            yield day
+        day += timedelta(days=1)
+
+
+def generate_slots(config, start=None, end=None):
+    """
+    Materialise the config's slots from `start` (default today) up to its
+    booking horizon. Existing slots keep their bookings and take the new
+    capacity; unbooked slots the schedule no longer has are removed.
+    Returns the number of slots created and the slots left holding more
+    bookings than the new capacity, which the dealer has to rearrange.
+    """
+    today = timezone.localdate()
+    start = max(start or today, today)
+    end = end or today + timedelta(days=config.horizon_days)
+    if start > end:
+        return 0, []
+    times = slot_times(config)
+    wanted = {(day, slot_time) for day in open_days(config, start, end) for slot_time in times}
+
+    with transaction.atomic():
+        upcoming = BookingSlot.objects.filter(branch_id=config.branch_id, date__gte=start, date__lte=end)
+        existing = set(upcoming.values_list('date', 'start_time'))
+        upcoming.exclude(capacity=config.capacity).update(capacity=config.capacity)
+        for day, slot_time in existing - wanted:
+            upcoming.filter(date=day, start_time=slot_time, booked=0).delete()
+        created = BookingSlot.objects.bulk_create(
+            [
+                BookingSlot(branch_id=config.branch_id, date=day, start_time=slot_time, capacity=config.capacity)
+                for day, slot_time in sorted(wanted - existing)
+            ],
+            ignore_conflicts=True,
+        )
+        overbooked = list(
+            upcoming.filter(booked__gt=F('capacity'))
+            .order_by('date', 'start_time')
+            .values('date', 'start_time', 'booked', 'capacity')
+        )
+    if overbooked:
+        logger.warning(
+            "Branch %s has %s slot(s) booked beyond the new capacity", config.branch_id, len(overbooked)
+        )
+    return len(created), overbooked
+
+
+def get_config(branch_id):
+    return BranchSlotConfig.objects.filter(branch_id=branch_id).first()
+
+
+def availability(branch_id, start, end):
+    """Open slots per day, read from the precomputed slot table."""
+    if end < start or (end - start).days >= MAX_RANGE_DAYS:
+        raise ValidationError({"end": f"The range must be 1 to {MAX_RANGE_DAYS} days"})
+    config = get_config(branch_id)
+    if config is None:
+        return None
+
+    slots = (
+        BookingSlot.objects.filter(
+            branch_id=branch_id, date__gte=max(start, timezone.localdate()), date__lte=end,
+            booked__lt=F('capacity'),
+        )
+        .annotate(available=F('capacity') - F('booked'))
+        .values_list('date', 'start_time', 'available')
+        .order_by('date', 'start_time')
+    )
+    days = {}
+    for day, slot_time, available in slots:
+        days.setdefault(day, []).append({'time': slot_time.strftime('%H:%M'), 'available': available})
+    return {
+        'branch': branch_id,
+        'slot_minutes': config.slot_minutes,
+        'dates': [{'date': day, 'slots': day_slots} for day, day_slots in days.items()],
+    }
+
+
+def reserve_slot(branch_id, day, slot_time):
+    """
+    Take one unit of a slot's capacity. The conditional UPDATE only matches
+    while `booked < capacity` and row-locks the slot, so concurrent
+    reservations serialise on it and can never overbook. Must run in the
+    transaction that creates the booking.
+    """
+    slots = BookingSlot.objects.filter(branch_id=branch_id, date=day, start_time=slot_time)
+    if slots.filter(booked__lt=F('capacity')).update(booked=F('booked') + 1):
+        return slots.get()
+    if not slots.exists():
+        raise ValidationError({"preferred_time": "Not a bookable slot for this branch and date"})
+    raise SlotUnavailable()
+
+
+def reserve_for_booking(data):
+    """
+    Slot for a new booking's validated data: test rides at a branch with a
+    slot schedule must take a free slot, anything else books as before.
+    """
+    branch = data.get('branch')
+    if data.get('booking_type') != 'TEST_RIDE' or branch is None or get_config(branch.pk) is None:
+        return None
+    if data.get('preferred_time') is None:
+        raise ValidationError({"preferred_time": "Choose a time slot for the test ride"})
+    if data['preferred_date'] < timezone.localdate():
+        raise ValidationError({"preferred_date": "The date has passed"})
+    return reserve_slot(branch.pk, data['preferred_date'], data['preferred_time'])
+
+
+def move_booking_slot(booking, data):
+    """
+    Slot for a booking being updated with validated `data`. Moving a test
+    ride (branch, date, time or type) or reopening a cancelled one releases
+    the slot it holds and reserves the new one; must run in the transaction
+    that saves the booking, so a full slot leaves both untouched.
+    """
+    fields = ('booking_type', 'branch', 'preferred_date', 'preferred_time')
+    data = {**{field: getattr(booking, field) for field in fields}, **data}
+    new_status = data.get('status', booking.status)
+    moved = any(data[field] != getattr(booking, field) for field in fields)
+    reopened = booking.status == 'CANCELLED' and new_status != 'CANCELLED'
+    if new_status == 'CANCELLED' or not (moved or reopened):
+        # Cancelling releases the slot in core.signals
+        return booking.slot
+    if booking.slot_id:
+        release_slot(booking.slot_id)
+    return reserve_for_booking(data)
+
+
+def release_slot(slot_id):
+    BookingSlot.objects.filter(pk=slot_id, booked__gt=0).update(booked=F('booked') - 1)
@@ -0,0 +1,159 @@
+import re
+
+from django.conf import settings
+
+NUMBER_RE = re.compile(r'-?\d+(?:,\d{3})*(?:\.\d+)?')
+FULL_NUMBER_RE = re.compile(r'^\s*-?\d+(?:\.\d+)?\s*$')
+QUANTITY_RE = re.compile(r'(-?\d+(?:,\d{3})*(?:\.\d+)?)\s*([a-zA-Z/]+)?')
+
+# unit token -> (dimension, factor to the dimension's canonical unit)
+UNITS = {
+    'cc': ('volume', 1), 'ml': ('volume', 1), 'cm3': ('volume', 1),
+    'l': ('volume', 1000), 'ltr': ('volume', 1000), 'litre': ('volume', 1000),
+    'litres': ('volume', 1000), 'liter': ('volume', 1000), 'liters': ('volume', 1000),
+    'bhp': ('power', 1), 'hp': ('power', 1), 'ps': ('power', 0.98632),
+    'kw': ('power', 1.34102), 'w': ('power', 0.00134102),
+    'nm': ('torque', 1), 'kgm': ('torque', 9.80665),
+    'kmph': ('speed', 1), 'km/h': ('speed', 1), 'kmh': ('speed', 1), 'mph': ('speed', 1.609344),
+    'kmpl': ('economy', 1), 'km/l': ('economy', 1), 'km/ltr': ('economy', 1),
+    'km': ('distance', 1), 'kms': ('distance', 1), 'mi': ('distance', 1.609344),
+    'miles': ('distance', 1.609344),
+    'mm': ('length', 1), 'cm': ('length', 10), 'm': ('length', 1000), 'in': ('length', 25.4),
+    'inch': ('length', 25.4), 'inches': ('length', 25.4),
+    'kg': ('mass', 1), 'kgs': ('mass', 1), 'g': ('mass', 0.001),
+    'kwh': ('energy', 1), 'wh': ('energy', 0.001),
+    'h': ('time', 1), 'hr': ('time', 1), 'hrs': ('time', 1), 'hours': ('time', 1),
+    'min': ('time', 1 / 60), 'mins': ('time', 1 / 60), 'minutes': ('time', 1 / 60),
+}
+
+CANONICAL_UNITS = {
+    'volume': 'cc', 'power': 'bhp', 'torque': 'Nm', 'speed': 'km/h', 'economy': 'kmpl',
+    'distance': 'km', 'length': 'mm', 'mass': 'kg', 'energy': 'kWh', 'time': 'h',
+}
+
+# Fuel tanks and boot space read better in litres than in cc.
+KEY_UNIT_OVERRIDES = {
+    'tank': ('volume', 'L', 0.001),
+    'boot': ('volume', 'L', 0.001),
+}
+
+
+def get_numeric_spec_keys():
+    """Hot numeric spec keys: {slug: [spec key aliases in priority order]}"""
+    return getattr(settings, 'SPEC_NUMERIC_KEYS', {})
+
+
+def flatten_specs(specs):
+    """
+    Yield (key, value) pairs from a specs dict. Grouped specs such as
+    {"Engine & Transmission": {"Fuel Type": "Petrol"}} are flattened so the
+    inner keys can be filtered on directly.
+    """
+    if not isinstance(specs, dict):
+        return
+    for key, value in specs.items():
+        if isinstance(value, dict):
+            yield from flatten_specs(value)
+        else:
+            yield key, value
+
+
+def parse_number(value):
+    """
+    Return the first number in a filter value ("150" or "150cc" -> 150), or
+    None. Stored specs go through normalize_quantity, which knows units.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    if not isinstance(value, str):
+        return None
+    match = NUMBER_RE.search(value)
+    if not match:
+        return None
+    number = float(match.group().replace(',', ''))
+    return int(number) if number.is_integer() else number
+
+
+def is_number(value):
+    return isinstance(value, str) and bool(FULL_NUMBER_RE.match(value))
+
+
+def merge_specs(*spec_dicts):
+    """
+    Flatten and merge spec dicts from least to most specific (model, variant,
+    inventory override); empty values never hide an inherited one.
+    """
+    merged = {}
+    for specs in spec_dicts:
+        for key, value in flatten_specs(specs):
+            if value in (None, ''):
+                continue
+            merged[key] = value
+    return merged
+
+
+def normalize_quantity(key, value):
+    """
+    Parse a spec value into (number, canonical unit): "110 cc", "110cc" and
+    "0.11 L" all become (110.0, "cc"). The first number with a known unit
+    wins, so "BS6 110 cc" and "4 stroke, 110cc" are 110 cc; failing that,
+    the first number is returned as (number, None). Values without a number
+    return None.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value), None
+    if not isinstance(value, str):
+        return None
+    matches = list(QUANTITY_RE.finditer(value))
+    if not matches:
+        return None
+    match = next((match for match in matches if (match.group(2) or '').lower() in UNITS), matches[0])
+    number = float(match.group(1).replace(',', ''))
+    unit = (match.group(2) or '').lower()
+    if unit not in UNITS:
+        return number, None
+
+    dimension, factor = UNITS[unit]
+    number *= factor
+    canonical = CANONICAL_UNITS[dimension]
+    lowered = key.lower()
+    for hint, (hint_dimension, hint_unit, hint_factor) in KEY_UNIT_OVERRIDES.items():
+        if hint in lowered and hint_dimension == dimension:
+            number *= hint_factor
+            canonical = hint_unit
+            break
+    return round(number, 4), canonical
+
+
+def index_number(key, value):
+    """
+    A hot numeric key's value in its canonical unit ("0.11 L" -> 110), or
+    None. Numbers without a known unit only count if they are the whole
+    value, so "BS6" is not an engine size.
+    """
+    quantity = normalize_quantity(key, value)
+    if quantity is None or (quantity[1] is None and not (is_number(value) or isinstance(value, (int, float)))):
+        return None
+    number = quantity[0]
+    return int(number) if number.is_integer() else number
+
+
+def build_spec_index(*spec_dicts):
+    """
+    Merge spec dicts (see merge_specs) into the flat document stored in
+    `VehicleModel.spec_index`: every scalar spec under its own key, plus each
+    hot numeric key normalised to a number under its slug.
+    """
+    merged = merge_specs(*spec_dicts)
+    index = dict(merged)
+    for slug, aliases in get_numeric_spec_keys().items():
+        for alias in aliases:
+            number = index_number(alias, merged.get(alias))
+            if number is not None:
+                index[slug] = number
+                break
+    return index
@@ -0,0 +1,241 @@
+import logging
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize(text):
+    return ' '.join(WORD_RE.findall((text or '').lower()))
+
+
+def index_keys(*labels):
+    """
+    Keys a label is reachable under: the whole label and every word suffix,
+    so "6g" finds "Activa 6G" as well as "activa" does.
+    """
+    keys = set()
+    for label in labels:
+        words = normalize(label).split()
+        for start in range(len(words)):
+            keys.add(' '.join(words[start:]))
+    return keys
+
+
+class SuggestIndex:
+    """
+    In-process prefix index over brand, model and variant names.
+
+    Many dealers list the same model, so rows are grouped by (kind, label,
+    brand) when they are indexed: the sorted entry list holds one (key, kind,
+    label, brand) tuple per group and key, and a lookup is a bisect to the
+    first key >= prefix followed by a scan over distinct suggestions. Writes
+    go through upsert/remove once their transaction commits.
+
+    Builds never run inside a request: the first one starts in a background
+    thread (see warm_suggest_index) and lookups return nothing until it is
+    done. Because every worker process holds its own copy, the whole index
+    is also rebuilt in the background once it is older than
+    SUGGEST_INDEX_TTL seconds, while the old one keeps serving.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._reset()
+        self._built_at = None
+        # Writes made while a rebuild reads the database, replayed on its result
+        self._pending = None
+
+    def _reset(self):
+        self._entries = []
+        self._groups = {}
+        self._refs = {}
+        self._key_counts = {}
+
+    @property
+    def is_built(self):
+        return self._built_at is not None
+
+    @property
+    def wants_updates(self):
+        """False until the index is first built; writes before then are read by the build."""
+        return self._built_at is not None or self._pending is not None
+
+    def ensure_fresh(self):
+        """Start a background build if the index was never built or is stale; never blocks."""
+        ttl = getattr(settings, 'SUGGEST_INDEX_TTL', 300)
+        stale = self._built_at is None or time.monotonic() - self._built_at > ttl
+        if stale and self._build_lock.acquire(blocking=False):
+            threading.Thread(target=self._rebuild, name='suggest-index', daemon=True).start()
+
+    def _rebuild(self):
+        try:
+            self.build()
+        except Exception:
+            logger.exception("Rebuilding the suggestion index failed")
+        finally:
+            connection.close()
+            self._build_lock.release()
+
+    def build(self):
+        from core.models import Brand, VehicleModel, VehicleModelVariant
+
+        with self._lock:
+            self._pending = []
+        rows = []
+        try:
+            for brand_id, name in Brand.objects.values_list('id', 'name').iterator():
+                rows.append(('brand', brand_id, brand_payload(brand_id, name), [name]))
+            vehicles = VehicleModel.objects.values_list('id', 'name', 'model_name', 'brand__name')
+            for vehicle_id, name, model_name, brand_name in vehicles.iterator():
+                rows.append(('model', vehicle_id, model_payload(vehicle_id, name, brand_name), [name, model_name]))
+            variants = VehicleModelVariant.objects.values_list('id', 'name', 'vehicle_model_id', 'vehicle_model__name')
+            for variant_id, name, vehicle_id, vehicle_name in variants.iterator():
+                rows.append((
+                    'variant', variant_id, variant_payload(variant_id, name, vehicle_id, vehicle_name),
+                    [name, vehicle_name],
+                ))
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+
+        built = SuggestIndex()
+        for row in rows:
+            built._add(*row, sort=False)
+        built._entries.sort()
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._entries, self._groups = built._entries, built._groups
+            self._refs, self._key_counts = built._refs, built._key_counts
+            for operation, args in pending:
+                operation(*args)
+            self._built_at = time.monotonic()
+
+    def upsert(self, kind, obj_id, payload, labels):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((self._upsert, (kind, obj_id, payload, labels)))
+            self._upsert(kind, obj_id, payload, labels)
+
+    def remove(self, kind, obj_id):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((self._remove, (kind, obj_id)))
+            self._remove(kind, obj_id)
+
+    def _upsert(self, kind, obj_id, payload, labels):
+        self._remove(kind, obj_id)
+        self._add(kind, obj_id, payload, labels)
+
+    def _add(self, kind, obj_id, payload, labels, sort=True):
+        # Same-named models of different brands stay apart
+        group = (kind, payload['label'].lower(), (payload.get('brand') or '').lower())
+        keys = index_keys(*labels)
+        self._refs[(kind, obj_id)] = (group, keys)
+        self._groups.setdefault(group, {})[obj_id] = payload
+        for key in keys:
+            count = self._key_counts.get((key, group), 0)
+            self._key_counts[(key, group)] = count + 1
+            if count == 0:
+                entry = (key, *group)
+                if sort:
+                    insort(self._entries, entry)
+                else:
+                    self._entries.append(entry)
+
+    def _remove(self, kind, obj_id):
+        group, keys = self._refs.pop((kind, obj_id), (None, ()))
+        if group is None:
+            return
+        members = self._groups[group]
+        del members[obj_id]
+        if not members:
+            del self._groups[group]
+        for key in keys:
+            count = self._key_counts.pop((key, group)) - 1
+            if count:
+                self._key_counts[(key, group)] = count
+                continue
+            entry = (key, *group)
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def lookup(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        with self._lock:
+            entries, groups = self._entries, self._groups
+            results, seen = [], set()
+            position = bisect_left(entries, (prefix,))
+            while position < len(entries) and len(results) < limit:
+                key, *group = entries[position]
+                if not key.startswith(prefix):
+                    break
+                position += 1
+                # A group is listed under each of its keys, e.g. name and
+                # model name; suggest it once, as its oldest row
+                group = tuple(group)
+                if group in seen:
+                    continue
+                seen.add(group)
+                members = groups[group]
+                results.append(members[min(members)])
+            return results
+
+
+def brand_payload(brand_id, name):
+    return {'type': 'brand', 'id': brand_id, 'label': name}
+
+
+def model_payload(vehicle_id, name, brand_name):
+    return {'type': 'model', 'id': vehicle_id, 'label': name, 'brand': brand_name}
+
+
+def variant_payload(variant_id, name, vehicle_id, vehicle_name):
+    return {
+        'type': 'variant',
+        'id': variant_id,
+        'label': f'{vehicle_name} {name}',
+        'vehicle_id': vehicle_id,
+    }
+
+
+suggest_index = SuggestIndex()
+
+
+def index_suggestion(kind, obj_id, payload, labels):
+    """Add or update a row's suggestion once the current transaction commits."""
+    transaction.on_commit(partial(suggest_index.upsert, kind, obj_id, payload, labels))
+
+
+def remove_suggestion(kind, obj_id):
+    transaction.on_commit(partial(suggest_index.remove, kind, obj_id))
+
+
+def warm_suggest_index(**kwargs):
+    """
+    request_started receiver connected in CoreConfig.ready: the first request
+    a server process handles starts the index build in the background.
+    """
+    from django.core.signals import request_started
+
+    request_started.disconnect(warm_suggest_index)
+    suggest_index.ensure_fresh()
+
+
+def suggest(prefix, limit=10):
+    """Suggestions for a prefix; empty until the index's first build is done."""
+    suggest_index.ensure_fresh()
+    return suggest_index.lookup(prefix, limit)
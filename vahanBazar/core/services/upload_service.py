@@ -0,0 +1,162 @@
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files import File
+from django.db.models import F, Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotFound, ValidationError
+
+from core.models import UploadSession
+from core.services.blob_service import acquire_blobs
+from core.storage import blob_storage
+
+ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'webp', 'heic'}
+COPY_BUFFER_SIZE = 64 * 1024
+# A writer that died mid-chunk blocks its session for this long
+WRITE_LEASE_SECONDS = 5 * 60
+
+
+class UploadConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Upload offset does not match.'
+    default_code = 'upload_conflict'
+
+
+def session_dir():
+    path = Path(settings.UPLOAD_SESSION_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def part_path(session):
+    return session_dir() / f'{session.id}.part'
+
+
+def file_extension(filename):
+    extension = os.path.splitext(filename)[1].lstrip('.').lower()
+    if extension not in ALLOWED_EXTENSIONS:
+        raise ValidationError({"filename": f"Allowed image types: {', '.join(sorted(ALLOWED_EXTENSIONS))}"})
+    return extension
+
+
+def stream_to_storage(file, extension, directory='vehicles'):
+    """
+    Save a file-like object to blob storage chunk by chunk, never reading it
+    whole. The blob is pinned: its URL is handed out with no row owning it.
+    """
+    name = f'{directory}/{uuid.uuid4()}.{extension}'
+    path = blob_storage().save(name, file if isinstance(file, File) else File(file))
+    acquire_blobs([path], pinned=True)
+    return path
+
+
+def start_upload(user, filename, size, sha256=''):
+    file_extension(filename)
+    if size <= 0 or size > settings.UPLOAD_MAX_SIZE:
+        raise ValidationError({"size": f"Size must be between 1 and {settings.UPLOAD_MAX_SIZE} bytes"})
+    session = UploadSession.objects.create(user=user, filename=filename, size=size, sha256=sha256.lower())
+    part_path(session).touch()
+    return session
+
+
+def get_session(user, session_id):
+    try:
+        return UploadSession.objects.get(pk=session_id, user=user)
+    except (UploadSession.DoesNotExist, DjangoValidationError):
+        raise NotFound("Upload session not found")
+
+
+def write_chunk(user, session_id, offset, length, stream):
+    """
+    Append `length` bytes read from `stream` at `offset`. The offset must be
+    exactly what the server has so far, which is what makes retries safe: a
+    client that lost a response asks for the session and resumes from there.
+
+    No transaction or row lock is held while the client sends the body: the
+    session is claimed with a short lease by a conditional UPDATE, the chunk
+    is streamed to disk, and the new offset is saved with the lease released.
+    """
+    if length <= 0 or length > settings.UPLOAD_CHUNK_SIZE:
+        raise ValidationError({"chunk": f"Chunks must be 1 to {settings.UPLOAD_CHUNK_SIZE} bytes"})
+
+    session = get_session(user, session_id)
+    if session.status != "PENDING":
+        raise UploadConflict("Upload is already complete")
+    if offset != session.offset:
+        raise UploadConflict(f"Expected offset {session.offset}")
+    if offset + length > session.size:
+        raise ValidationError({"chunk": "Chunk extends past the declared size"})
+
+    # One writer per session; a concurrent PUT is told to retry
+    now = timezone.now()
+    lease = now + timedelta(seconds=WRITE_LEASE_SECONDS)
+    claimed = UploadSession.objects.filter(
+        Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lt=now),
+        pk=session.pk, status="PENDING", offset=offset,
+    ).update(lease_expires_at=lease, updated_at=now)
+    if not claimed:
+        session.refresh_from_db()
+        if session.status != "PENDING":
+            raise UploadConflict("Upload is already complete")
+        if offset != session.offset:
+            raise UploadConflict(f"Expected offset {session.offset}")
+        raise UploadConflict("Another chunk of this upload is in progress")
+
+    written = 0
+    try:
+        with open(part_path(session), 'r+b') as part:
+            part.seek(offset)
+            while written < length:
+                data = stream.read(min(COPY_BUFFER_SIZE, length - written))
+                if not data:
+                    break
+                part.write(data)
+                written += len(data)
+            # Drop anything past the new end, e.g. from an interrupted retry
+            part.truncate(offset + written)
+    finally:
+        # Only the lease holder moves the offset; if the lease ran out and
+        # another writer took over, its chunk wins
+        saved = UploadSession.objects.filter(pk=session.pk, lease_expires_at=lease).update(
+            offset=F('offset') + written, lease_expires_at=None, updated_at=timezone.now(),
+        )
+    if not saved:
+        raise UploadConflict("The upload lease expired; resume from the current offset")
+    session.refresh_from_db()
+    return session
+
+
+def finalize_upload(user, session_id):
+    """Move a fully received upload into storage and return the session."""
+    session = get_session(user, session_id)
+    if session.status == "COMPLETE":
+        return session
+    if session.offset != session.size:
+        raise UploadConflict(f"Received {session.offset} of {session.size} bytes")
+
+    path = part_path(session)
+    if session.sha256:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as part:
+            for data in iter(lambda: part.read(COPY_BUFFER_SIZE), b''):
+                digest.update(data)
+        if digest.hexdigest() != session.sha256:
+            raise ValidationError({"sha256": "Checksum does not match the received data"})
+
+    with open(path, 'rb') as part:
+        session.path = stream_to_storage(part, file_extension(session.filename))
+    session.status = "COMPLETE"
+    session.save(update_fields=['path', 'status', 'updated_at'])
+    path.unlink(missing_ok=True)
+    return session
+
+
+def discard_upload(session):
+    part_path(session).unlink(missing_ok=True)
+    session.delete()
@@ -0,0 +1,117 @@
+import base64
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from core.models import VehicleModel, WishlistItem
+from core.services.cache_service import bump_version, version_scope
+from core.services.rollup_service import add_to_rollup
+
+MAX_BITMAP_IDS = 64 * 1024
+
+# True while remove_from_wishlist deletes rows whose rollups and cache
+# version it updates itself; the per-row receivers in signals check it
+batch_removal = ContextVar('wishlist_batch_removal', default=False)
+
+
+@contextmanager
+def _batch_removal():
+    token = batch_removal.set(True)
+    try:
+        yield
+    finally:
+        batch_removal.reset(token)
+
+
+def wishlist_ids(user):
+    return list(
+        WishlistItem.objects.filter(user=user).order_by('vehicle_id').values_list('vehicle_id', flat=True)
+    )
+
+
+def wishlist_bitmap(user, start, end):
+    """
+    Membership of vehicles start..end (inclusive) as a base64 bitmap: bit
+    `id - start` is set, least significant bit first in each byte, when
+    the vehicle is on the user's wishlist.
+    """
+    if end < start or end - start >= MAX_BITMAP_IDS:
+        raise ValidationError({"end": f"The range must cover 1 to {MAX_BITMAP_IDS} ids"})
+    bits = bytearray((end - start) // 8 + 1)
+    saved = WishlistItem.objects.filter(
+        user=user, vehicle_id__gte=start, vehicle_id__lte=end
+    ).values_list('vehicle_id', flat=True)
+    for vehicle_id in saved:
+        offset = vehicle_id - start
+        bits[offset // 8] |= 1 << (offset % 8)
+    return {'start': start, 'end': end, 'bitmap': base64.b64encode(bits).decode()}
+
+
+def add_to_wishlist(user, vehicle_ids):
+    """
+    Save several vehicles with one INSERT; vehicles already saved are
+    skipped by the (user, vehicle) unique constraint. bulk_create sends no
+    signals, so the rollups and the wishlist cache version are updated here.
+    Returns the number of vehicles added.
+    """
+    vehicle_ids = set(vehicle_ids)
+    if not vehicle_ids:
+        return 0
+    vehicles = list(
+        VehicleModel.objects.filter(pk__in=vehicle_ids)
+        .annotate(saved=Exists(WishlistItem.objects.filter(user=user, vehicle=OuterRef('pk'))))
+        .values_list('pk', 'dealer_id', 'branch_id', 'saved')
+    )
+    missing = vehicle_ids - {pk for pk, *_ in vehicles}
+    if missing:
+        raise ValidationError({"add": f"Unknown vehicle ids: {sorted(missing)}"})
+
+    new = [(pk, dealer_id, branch_id) for pk, dealer_id, branch_id, saved in vehicles if not saved]
+    if not new:
+        return 0
+    with transaction.atomic():
+        WishlistItem.objects.bulk_create(
+            [WishlistItem(user=user, vehicle_id=pk) for pk, _, _ in new], ignore_conflicts=True,
+        )
+        today = timezone.localdate()
+        # A concurrent add of the same vehicle can count it twice here;
+        # compact_rollups recounts the day
+        for (dealer_id, branch_id), count in Counter((dealer, branch) for _, dealer, branch in new).items():
+            add_to_rollup(dealer_id, branch_id, today, wishlist_adds=count)
+    bump_version(version_scope('wishlist', user.pk))
+    return len(new)
+
+
+def remove_from_wishlist(user, vehicle_ids):
+    """
+    Unsave several vehicles with one DELETE; returns the number removed.
+    The per-row post_delete receivers stand aside (see batch_removal) and
+    the rollups (one decrement per dealership, branch and day saved) and
+    the wishlist cache version are updated here instead.
+    """
+    if not vehicle_ids:
+        return 0
+    with transaction.atomic():
+        items = WishlistItem.objects.filter(user=user, vehicle_id__in=set(vehicle_ids))
+        # Locked, so a concurrent removal of the same rows waits and then
+        # finds them gone instead of decrementing twice
+        rows = list(
+            items.select_for_update(of=('self',))
+            .values_list('pk', 'added_at', 'vehicle__dealer_id', 'vehicle__branch_id')
+        )
+        if not rows:
+            return 0
+        with _batch_removal():
+            WishlistItem.objects.filter(pk__in=[pk for pk, *_ in rows]).delete()
+        removed = Counter(
+            (dealer_id, branch_id, timezone.localdate(added_at)) for _, added_at, dealer_id, branch_id in rows
+        )
+        for (dealer_id, branch_id, day), count in removed.items():
+            add_to_rollup(dealer_id, branch_id, day, wishlist_adds=-count)
+    bump_version(version_scope('wishlist', user.pk))
+    return len(rows)
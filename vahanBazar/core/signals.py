@@ -0,0 +1,348 @@
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core.models import (
+    Booking, Branch, Brand, Dealership, InventoryItem, Notification, User, VehicleImage, VehicleModel,
+    VehicleModelVariant, WishlistItem
+)
+from core.services.cache_service import bump_version, bump_versions, version_scope
+from core.services.blob_service import acquire_blobs, release_blobs
+from core.services.event_service import publish_event
+from core.services.price_alert_service import PRICE_FIELDS, price_snapshot, record_price_change
+from core.services.rendition_service import rendition_paths, schedule_renditions
+from core.services.rollup_service import (
+    record_booking, record_booking_status, record_vehicle, record_vehicle_sold, record_wishlist
+)
+from core.services.search_service import refresh_search_index
+from core.services.slot_service import release_slot
+from core.services.suggest_service import (
+    brand_payload, index_suggestion, model_payload, remove_suggestion, suggest_index, variant_payload
+)
+from core.services.wishlist_service import batch_removal
+
+
+@receiver(post_save, sender=VehicleModelVariant)
+def refresh_variant_vehicle_specs(sender, instance, raw=False, **kwargs):
+    """Variant specs and name feed into the vehicle's spec and search indexes."""
+    if raw:
+        return
+    vehicles = list(instance.vehicle_instances.all())
+    for vehicle in vehicles:
+        vehicle.variant = instance
+        vehicle.refresh_spec_index()
+    VehicleModel.objects.bulk_update(vehicles, ['spec_index'])
+    refresh_search_index(VehicleModel.objects.filter(variant=instance))
+
+
+@receiver(post_save, sender=VehicleModel)
+def refresh_vehicle_search(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_search_index(VehicleModel.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Brand)
+def refresh_brand_vehicle_search(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    refresh_search_index(VehicleModel.objects.filter(brand=instance))
+
+
+@receiver(post_save, sender=Brand)
+def index_brand_suggestion(sender, instance, raw=False, **kwargs):
+    if raw or not suggest_index.wants_updates:
+        return
+    index_suggestion('brand', instance.pk, brand_payload(instance.pk, instance.name), [instance.name])
+
+
+@receiver(post_save, sender=VehicleModel)
+def index_vehicle_suggestion(sender, instance, raw=False, **kwargs):
+    if raw or not suggest_index.wants_updates:
+        return
+    index_suggestion(
+        'model', instance.pk,
+        model_payload(instance.pk, instance.name, instance.brand.name),
+        [instance.name, instance.model_name],
+    )
+
+
+@receiver(post_save, sender=VehicleModelVariant)
+def index_variant_suggestion(sender, instance, raw=False, **kwargs):
+    if raw or not suggest_index.wants_updates:
+        return
+    vehicle_name = instance.vehicle_model.name
+    index_suggestion(
+        'variant', instance.pk,
+        variant_payload(instance.pk, instance.name, instance.vehicle_model_id, vehicle_name),
+        [instance.name, vehicle_name],
+    )
+
+
+@receiver(post_delete, sender=Brand)
+@receiver(post_delete, sender=VehicleModel)
+@receiver(post_delete, sender=VehicleModelVariant)
+def remove_deleted_suggestion(sender, instance, **kwargs):
+    kind = {Brand: 'brand', VehicleModel: 'model', VehicleModelVariant: 'variant'}[sender]
+    remove_suggestion(kind, instance.pk)
+
+
+# Blob reference counts for images saved one at a time; image_service
+# counts the ones it bulk-creates itself.
+
+@receiver(pre_save, sender=VehicleImage)
+def remember_vehicle_image_file(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding or (update_fields is not None and 'image' not in update_fields):
+        return
+    instance._previous_image = (
+        VehicleImage.objects.filter(pk=instance.pk).values_list('image', flat=True).first()
+    )
+
+
+@receiver(post_save, sender=VehicleImage)
+def count_vehicle_image_file(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_image', None)
+    if created:
+        acquire_blobs([instance.image.name])
+    elif previous and previous != instance.image.name:
+        acquire_blobs([instance.image.name])
+        release_blobs([previous])
+    instance._previous_image = None
+
+
+@receiver(post_delete, sender=VehicleImage)
+def release_vehicle_image(sender, instance, **kwargs):
+    name = instance.image.name
+    release_blobs([name], derived={name: rendition_paths(instance)})
+
+
+@receiver(post_save, sender=VehicleImage)
+def render_vehicle_image(sender, instance, raw=False, **kwargs):
+    # Images bulk-created by image_service are scheduled there
+    if raw or instance.renditions.get('source') == instance.image.name:
+        return
+    schedule_renditions([instance.pk])
+
+
+# Daily dealer rollups (DealerDailyStats). Bulk writes bypass these; the
+# compact_rollups command recounts from the source tables.
+
+@receiver(pre_save, sender=VehicleModel)
+@receiver(pre_save, sender=Booking)
+def remember_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Status before this save, or None if new or not being saved."""
+    instance._previous_status = None
+    if raw or instance._state.adding or (update_fields is not None and 'status' not in update_fields):
+        return
+    instance._previous_status = sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=VehicleModel)
+def roll_up_vehicle(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_status', None)
+    if created:
+        record_vehicle(instance)
+        if instance.status == 'SOLD':
+            record_vehicle_sold(instance)
+    elif previous is not None and (previous == 'SOLD') != (instance.status == 'SOLD'):
+        record_vehicle_sold(instance, 1 if instance.status == 'SOLD' else -1)
+
+
+@receiver(post_save, sender=Booking)
+def roll_up_booking(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_status', None)
+    if created:
+        record_booking(instance)
+    elif previous is not None and previous != instance.status:
+        record_booking_status(instance, previous)
+
+
+@receiver(post_save, sender=WishlistItem)
+def roll_up_wishlist(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        record_wishlist(instance)
+
+
+@receiver(post_delete, sender=VehicleModel)
+def unroll_vehicle(sender, instance, **kwargs):
+    record_vehicle(instance, -1)
+
+
+@receiver(post_delete, sender=Booking)
+def unroll_booking(sender, instance, **kwargs):
+    record_booking(instance, -1)
+
+
+@receiver(post_delete, sender=WishlistItem)
+def unroll_wishlist(sender, instance, **kwargs):
+    if not batch_removal.get():
+        record_wishlist(instance, -1)
+
+
+# A cancelled or deleted booking gives its test-ride slot back
+
+@receiver(post_save, sender=Booking)
+def release_cancelled_booking_slot(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created or not instance.slot_id or instance.status != 'CANCELLED':
+        return
+    if getattr(instance, '_previous_status', None) not in (None, 'CANCELLED'):
+        release_slot(instance.slot_id)
+        Booking.objects.filter(pk=instance.pk).update(slot=None)
+        instance.slot = None
+
+
+@receiver(post_delete, sender=Booking)
+def release_deleted_booking_slot(sender, instance, **kwargs):
+    if instance.slot_id:
+        release_slot(instance.slot_id)
+
+
+# Live updates for the user's event stream (core.views.event_views)
+
+@receiver(post_save, sender=Booking)
+def publish_booking_status(sender, instance, created=False, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_status', None)
+    if raw or created or previous is None or previous == instance.status:
+        return
+    publish_event([instance.user_id], 'booking', {
+        'id': instance.pk, 'status': instance.status, 'previous_status': previous,
+    })
+
+
+@receiver(post_save, sender=Notification)
+def publish_notification(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        publish_event([instance.user_id], 'notification')
+
+
+# Cache versions. Plural scopes ('brands', 'vehicles', 'bookings', ...) are
+# per-table change counters, '<kind>:<id>' single objects; see
+# core.views.mixins and compare_service.
+
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+def invalidate_brand_caches(sender, instance, **kwargs):
+    # Vehicles embed their brand's name
+    bump_versions('brands', 'vehicles')
+
+
+@receiver(post_save, sender=VehicleModel)
+@receiver(post_delete, sender=VehicleModel)
+def invalidate_vehicle_caches(sender, instance, **kwargs):
+    bump_versions(version_scope('vehicle', instance.pk), 'vehicles')
+
+
+@receiver(post_save, sender=VehicleImage)
+@receiver(post_delete, sender=VehicleImage)
+def invalidate_vehicle_image_caches(sender, instance, **kwargs):
+    bump_versions(version_scope('vehicle', instance.vehicle_id), 'vehicles')
+
+
+@receiver(post_save, sender=VehicleModelVariant)
+@receiver(pre_delete, sender=VehicleModelVariant)
+def invalidate_variant_caches(sender, instance, **kwargs):
+    # pre_delete: linked vehicles are detached (SET_NULL) without signals, so
+    # collect them while the link still exists
+    vehicle_ids = {instance.vehicle_model_id, *instance.vehicle_instances.values_list('id', flat=True)}
+    bump_versions(
+        version_scope('variant', instance.pk),
+        *(version_scope('vehicle', vehicle_id) for vehicle_id in vehicle_ids),
+        'vehicles',
+    )
+
+
+@receiver(post_save, sender=InventoryItem)
+@receiver(post_delete, sender=InventoryItem)
+def invalidate_inventory_caches(sender, instance, **kwargs):
+    bump_versions(version_scope('inventory', instance.pk), 'inventory')
+
+
+@receiver(post_save, sender=Branch)
+@receiver(post_delete, sender=Branch)
+def invalidate_branch_caches(sender, instance, **kwargs):
+    # Vehicles embed their branch's name
+    bump_versions('branches', 'vehicles')
+
+
+@receiver(post_save, sender=Dealership)
+@receiver(post_delete, sender=Dealership)
+def invalidate_dealership_caches(sender, instance, **kwargs):
+    # Vehicles embed their dealer's name
+    bump_versions('dealerships', 'vehicles')
+
+
+SELLER_NAME_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+def seller_name(user):
+    """The seller name vehicles show, as VehicleSerializer.get_seller builds it."""
+    return user.get_full_name() or user.username
+
+
+@receiver(pre_save, sender=User)
+def remember_seller_name(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Seller name before this save, or None if new or not being saved."""
+    instance._previous_seller_name = None
+    if raw or instance._state.adding or (update_fields is not None and not SELLER_NAME_FIELDS & set(update_fields)):
+        return
+    previous = sender.objects.filter(pk=instance.pk).only(*SELLER_NAME_FIELDS).first()
+    if previous is not None:
+        instance._previous_seller_name = seller_name(previous)
+
+
+@receiver(post_save, sender=User)
+def invalidate_seller_caches(sender, instance, raw=False, **kwargs):
+    # Vehicles embed their seller's name. Sign-ups, last_login updates and
+    # other edits leave it alone, and so do renames of users with no listings
+    previous = getattr(instance, '_previous_seller_name', None)
+    instance._previous_seller_name = None
+    if raw or previous is None or previous == seller_name(instance):
+        return
+    if instance.used_listings.exists():
+        bump_versions('sellers', 'vehicles')
+
+
+@receiver(post_delete, sender=User)
+def invalidate_deleted_seller_caches(sender, instance, **kwargs):
+    # The user's listings lose their seller
+    bump_versions('sellers', 'vehicles')
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking_caches(sender, instance, **kwargs):
+    bump_version('bookings')
+
+
+@receiver(post_save, sender=WishlistItem)
+@receiver(post_delete, sender=WishlistItem)
+def invalidate_wishlist_caches(sender, instance, **kwargs):
+    if not batch_removal.get():
+        bump_version(version_scope('wishlist', instance.user_id))
+
+
+@receiver(pre_save, sender=VehicleModel)
+@receiver(pre_save, sender=InventoryItem)
+def remember_price(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Price and discount before this save, or None if new or not being saved."""
+    instance._previous_price = None
+    if raw or instance._state.adding or (update_fields is not None and not set(PRICE_FIELDS) & set(update_fields)):
+        return
+    instance._previous_price = price_snapshot(sender, instance.pk)
+
+
+@receiver(post_save, sender=VehicleModel)
+@receiver(post_save, sender=InventoryItem)
+def record_price_history(sender, instance, created=False, raw=False, **kwargs):
+    """Price alerts are sent later, in batches, by the send_price_alerts job."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_price', None)
+    if created or previous is not None:
+        record_price_change(instance, previous)
+    instance._previous_price = None
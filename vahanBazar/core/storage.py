@@ -0,0 +1,81 @@
+import hashlib
+import os
+import posixpath
+import uuid
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, storages
+
+BLOB_DIR = 'blobs'
+HASH_CHUNK_SIZE = 64 * 1024
+EXTENSION_ALIASES = {'jpeg': 'jpg'}
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{BLOB_DIR}/')
+
+
+def blob_digest(name):
+    """sha256 encoded in a blob name, or None for any other file."""
+    if not is_blob_name(name):
+        return None
+    return posixpath.splitext(posixpath.basename(name))[0]
+
+
+def blob_storage():
+    """The content-addressed storage; a callable so it can be used as a field's `storage`."""
+    return storages['blobs']
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores each distinct file once, under its sha256:
+    `blobs/ab/cd/abcd…ef.jpg`. Saving content that is already stored
+    returns the existing name without writing, so the name passed in only
+    contributes its extension. Deleting a blob removes it for every
+    reference; callers count references (see blob_service), and a save
+    cancels a pending deletion of the blob it reuses.
+    """
+
+    def blob_name(self, digest, name):
+        extension = posixpath.splitext(name or '')[1].lstrip('.').lower()
+        extension = EXTENSION_ALIASES.get(extension, extension)
+        filename = f'{digest}.{extension}' if extension else digest
+        return f'{BLOB_DIR}/{digest[:2]}/{digest[2:4]}/{filename}'
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+        content.seek(0)
+
+        blob = self.blob_name(digest.hexdigest(), name)
+        # Imported here: core.models imports this module
+        from core.services.blob_service import reclaim_blob
+
+        # Before the existence check, so a release cannot delete the file
+        # this save is about to reuse
+        reclaim_blob(blob)
+        if not self.exists(blob):
+            self._store(blob, content)
+        return blob
+
+    def _store(self, blob, content):
+        # Write under a temporary name, then hard-link into place: the link
+        # fails if another writer got there first, and since both wrote the
+        # same bytes either copy is fine.
+        temporary = super()._save(f'{BLOB_DIR}/tmp/{uuid.uuid4().hex}', content)
+        target = self.path(blob)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.link(self.path(temporary), target)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(self.path(temporary))
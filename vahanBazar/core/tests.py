@@ -1,3 +1,1393 @@
-from django.test import TestCase
+import asyncio
+import base64
+import hashlib
+import json
+import shutil
+import tempfile
+import threading
+import time as time_module
+import uuid
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.models import (
+    User, Dealership, Branch, Brand, VehicleModel, VehicleModelVariant,
+    VehicleImage, WishlistItem, ImageBlob, Booking, InventoryItem, DealerDailyStats, BookingSlot,
+    Notification, PriceChange, PriceAlertSetting, Job, JobMetrics, UploadSession
+)
+from core.asgi import EventStreamRouter
+from core.parsers import FastJSONParser
+from core.renderers import FastJSONRenderer
+from core.services.cache_service import get_version
+from core.services.event_service import PostgresBroker
+from core.services.image_service import add_images, replace_images
+from core.services.job_service import claim_job, requeue_stale_jobs, run_job
+from core.services.price_alert_service import notify_wishlisters, send_price_alerts
+from core.services.rendition_service import generate_renditions
+from core.services.rollup_service import REBUILT_COLUMNS, compact_rollups, count_from_source
+from core.services.spec_service import normalize_quantity
+from core.services.suggest_service import SuggestIndex, suggest, suggest_index
+from core.services.upload_service import write_chunk
+from core.storage import blob_storage
+
+# Query counts measure the app's own queries; the database cache backend
+# would add its own
+LOCAL_CACHE = override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'},
+})
+
+
+class CatalogueFixtureMixin:
+    """
+    A dealer with one branch and a brand, created once per TestCase class,
+    a client signed in as the dealer and helpers to add vehicles and users.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.dealer_user = User.objects.create_user(username='dealer', password='password', is_dealer=True)
+        cls.dealership = Dealership.objects.create(name='Speed Motors', owner=cls.dealer_user)
+        cls.branch = Branch.objects.create(
+            dealership=cls.dealership, name='Main', address='1 MG Road',
+            city='Pune', state='MH', zipcode='411001'
+        )
+        cls.brand = Brand.objects.create(name='Honda')
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.client_for(self.dealer_user)
+
+    def create_user(self, username):
+        return User.objects.create_user(username=username, password='password')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def create_vehicles(self, count, **overrides):
+        vehicles = []
+        for index in range(count):
+            fields = {
+                'brand': self.brand,
+                'dealer': self.dealership,
+                'branch': self.branch,
+                'seller': self.dealer_user,
+                'name': f'Activa {index}',
+                'category': 'SCOOTER',
+                'fuel_type': 'PETROL',
+                'price': Decimal('75000.00'),
+                'type': 'NEW',
+            }
+            fields.update(overrides)
+            vehicle = VehicleModel.objects.create(**fields)
+            vehicle.variant = VehicleModelVariant.objects.create(vehicle_model=vehicle, name='STD')
+            vehicle.save()
+            for order in range(3):
+                VehicleImage.objects.create(vehicle=vehicle, image=f'vehicles/{index}_{order}.png', order=order)
+            vehicles.append(vehicle)
+        return vehicles
+
+
+@LOCAL_CACHE
+class VehicleQueryCountTests(CatalogueFixtureMixin, TestCase):
+    """The list endpoints must cost a fixed number of queries regardless of size."""
+
+    def assert_constant_queries(self, url, expected, setup_rows):
+        for rows in (1, 10):
+            setup_rows(rows)
+            with self.assertNumQueries(expected):
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_vehicle_list_query_count(self):
+        # The ETag aggregate, the vehicles with their FKs joined, the images.
+        self.assert_constant_queries('/api/vehicles/', 3, self.create_vehicles)
+
+    def test_sparse_vehicle_list_query_count(self):
+        # Method fields must keep their relations joined and columns loaded
+        fields = 'id,name,dealer,seller,branch,variant,specs,brand_detail'
+        self.assert_constant_queries(f'/api/vehicles/?fields={fields}', 2, self.create_vehicles)
+        row = self.client.get(f'/api/vehicles/?fields={fields}').data['results'][0]
+        self.assertEqual(row['dealer']['name'], 'Speed Motors')
+        self.assertEqual(row['variant']['name'], 'STD')
+
+    def test_wishlist_query_count(self):
+        def add_to_wishlist(rows):
+            for vehicle in self.create_vehicles(rows):
+                WishlistItem.objects.create(user=self.dealer_user, vehicle=vehicle)
+
+        self.assert_constant_queries('/api/wishlist/', 3, add_to_wishlist)
+
+    def test_images_are_ordered(self):
+        vehicle = self.create_vehicles(1)[0]
+        response = self.client.get(f'/api/vehicles/{vehicle.id}/')
+        self.assertEqual([image['order'] for image in response.data['images']], [0, 1, 2])
+
+
+@LOCAL_CACHE
+class BatchAndOptionsTests(CatalogueFixtureMixin, TestCase):
+    """Several vehicles in one request, and the lightweight picker list."""
+
+    def setUp(self):
+        super().setUp()
+        self.vehicles = self.create_vehicles(4)
+        self.ids = [vehicle.id for vehicle in self.vehicles]
+
+    def test_batch_keeps_the_requested_order(self):
+        ids = [self.ids[2], self.ids[0], self.ids[2], 10 ** 6, self.ids[3]]
+        # The vehicles with their FKs joined, the images
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/vehicles/batch/', {'ids': ','.join(map(str, ids))})
+        self.assertEqual([row['id'] for row in response.data], [self.ids[2], self.ids[0], self.ids[3]])
+        self.assertEqual(len(response.data[0]['images']), 3)
+
+        response = self.client.get('/api/vehicles/batch/', {'ids': f'{self.ids[0]}', 'fields': 'id,name'})
+        self.assertEqual(response.data, [{'id': self.ids[0], 'name': 'Activa 0'}])
+
+    def test_batch_rejects_bad_ids(self):
+        self.assertEqual(self.client.get('/api/vehicles/batch/', {'ids': '1,two'}).status_code, 400)
+        too_many = ','.join(str(pk) for pk in range(1, 52))
+        self.assertEqual(self.client.get('/api/vehicles/batch/', {'ids': too_many}).status_code, 400)
+        self.assertEqual(self.client.get('/api/vehicles/batch/', {'ids': ''}).data, [])
+
+    def test_options_are_filtered_and_one_query(self):
+        self.create_vehicles(1, name='Shine', category='BIKE')
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/vehicles/options/')
+        self.assertEqual(len(response.data), 5)
+        self.assertEqual(response.data[0], {'id': self.ids[0], 'name': 'Activa 0', 'brand': 'Honda'})
+        response = self.client.get('/api/vehicles/options/', {'category': 'BIKE'})
+        self.assertEqual([row['name'] for row in response.data], ['Shine'])
+
+
+@LOCAL_CACHE
+class ResponseCacheTests(CatalogueFixtureMixin, TestCase):
+    """Cached reads skip the database and writes invalidate them."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_vehicle_detail_is_cached_until_a_write(self):
+        vehicle = self.create_vehicles(1)[0]
+        url = f'/api/vehicles/{vehicle.id}/'
+        self.client.get(url)
+        brands_version = get_version('brands')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['images']), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            VehicleImage.objects.create(vehicle=vehicle, image='vehicles/extra.png', order=3)
+        self.assertEqual(len(self.client.get(url).data['images']), 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand.name = 'Hero'
+            self.brand.save()
+            # Versions move only once the write commits, so a read racing
+            # it can't cache the old rows under the new version
+            self.assertEqual(get_version('brands'), brands_version)
+        self.assertEqual(self.client.get(url).data['brand_detail']['name'], 'Hero')
+
+    def test_featured_and_brands_invalidate_on_save(self):
+        vehicle = self.create_vehicles(2)[0]
+        self.assertEqual(self.client.get('/api/vehicles/featured/').data['results'], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle.is_featured = True
+            vehicle.save()
+        self.assertEqual([row['id'] for row in self.client.get('/api/vehicles/featured/').data['results']], [vehicle.id])
+
+        self.client.get('/api/brands/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Brand.objects.create(name='Bajaj')
+        self.assertEqual(len(self.client.get('/api/brands/').data), 2)
+
+    def test_stats_count_hits_and_misses(self):
+        self.client.get('/api/brands/')
+        self.client.get('/api/brands/')
+        admin = User.objects.create_superuser(username='admin', password='password')
+        self.client.force_authenticate(admin)
+        stats = self.client.get('/api/cache/stats/').data['BrandViewSet.list']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+
+@LOCAL_CACHE
+class ConditionalGetTests(CatalogueFixtureMixin, TestCase):
+    """Unchanged resources are answered with 304 without serializing."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_vehicle_list_not_modified(self):
+        vehicle = self.create_vehicles(3)[0]
+        etag = self.client.get('/api/vehicles/')['ETag']
+
+        # One aggregate query and no body
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/vehicles/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        # An update that leaves count and dates alone still changes the ETag
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle.price = Decimal('70000.00')
+            vehicle.save()
+        response = self.client.get('/api/vehicles/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_follows_filters_and_detail(self):
+        vehicle = self.create_vehicles(1)[0]
+        etag = self.client.get('/api/vehicles/')['ETag']
+        filtered = self.client.get('/api/vehicles/?category=BIKE', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(filtered.status_code, 200)
+
+        url = f'/api/vehicles/{vehicle.id}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            VehicleImage.objects.create(vehicle=vehicle, image='vehicles/extra.png', order=3)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detail_etag_follows_related_edits(self):
+        vehicle = self.create_vehicles(1)[0]
+        url = f'/api/vehicles/{vehicle.id}/'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dealership.name = 'Speed Motors Pune'
+            self.dealership.save()
+            # Not until the rename commits
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['dealer']['name'], 'Speed Motors Pune')
+
+        for instance, field, value in (
+            (self.branch, 'name', 'Camp'), (self.dealer_user, 'first_name', 'Ravi'),
+        ):
+            etag = self.client.get(url)['ETag']
+            with self.captureOnCommitCallbacks(execute=True):
+                setattr(instance, field, value)
+                instance.save()
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        # A sign-in's last_login update leaves it alone
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.dealer_user.last_login = timezone.now()
+            self.dealer_user.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Nor do sign-ups, saves that keep the name, or renames of users
+        # with no listings
+        with self.captureOnCommitCallbacks(execute=True):
+            buyer = self.create_user('buyer')
+            self.dealer_user.phone = '9800000000'
+            self.dealer_user.save()
+            buyer.first_name = 'Asha'
+            buyer.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_wishlist_not_modified_until_changed(self):
+        vehicle = self.create_vehicles(1)[0]
+        etag = self.client.get('/api/wishlist/')['ETag']
+        self.assertEqual(self.client.get('/api/wishlist/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            WishlistItem.objects.create(user=self.dealer_user, vehicle=vehicle)
+        self.assertEqual(self.client.get('/api/wishlist/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class FacetSearchTests(CatalogueFixtureMixin, TestCase):
+    """Each facet counts with every filter but its own; total is the real count."""
+
+    def setUp(self):
+        super().setUp()
+        self.yamaha = Brand.objects.create(name='Yamaha')
+        self.create_vehicles(3)
+        self.create_vehicles(1, category='BIKE')
+        self.create_vehicles(1, brand=self.yamaha)
+        self.create_vehicles(1, brand=self.yamaha, category='BIKE', price=Decimal('40000.00'))
+
+    def search(self, **params):
+        response = self.client.get('/api/vehicles/search/', {'page_size': 1, **params})
+        self.assertEqual(response.status_code, 200)
+        facets = response.data['facets']
+        counts = {
+            facet: {row.get('value', row.get('name')): row['count'] for row in facets[facet]}
+            for facet in ('brand', 'category', 'type')
+        }
+        counts['price'] = {row['key']: row['count'] for row in facets['price'] if row['count']}
+        return response.data['total'], counts
+
+    def test_selected_facet_keeps_counting_its_other_values(self):
+        total, counts = self.search(category='SCOOTER')
+        self.assertEqual(total, 4)
+        self.assertEqual(counts['category'], {'SCOOTER': 4, 'BIKE': 2})
+        self.assertEqual(counts['brand'], {'Honda': 3, 'Yamaha': 1})
+
+        total, counts = self.search(category='BIKE', brand=self.yamaha.id)
+        self.assertEqual(total, 1)
+        self.assertEqual(counts['category'], {'SCOOTER': 1, 'BIKE': 1})
+        self.assertEqual(counts['brand'], {'Honda': 1, 'Yamaha': 1})
+        self.assertEqual(counts['type'], {'NEW': 1})
+
+    def test_price_bucket_selection(self):
+        total, counts = self.search(max_effective_price='49999')
+        self.assertEqual(total, 1)
+        self.assertEqual(counts['price'], {'under_50k': 1, '50k_1l': 5})
+        self.assertEqual(counts['category'], {'BIKE': 1})
+
+    def test_total_is_not_limited_to_the_page(self):
+        total, counts = self.search()
+        self.assertEqual(total, 6)
+        self.assertEqual(counts['category'], {'SCOOTER': 4, 'BIKE': 2})
+
+
+class SpecFilterTests(CatalogueFixtureMixin, TestCase):
+    """?spec__ filters read spec_index, with hot numeric keys in canonical units."""
+
+    def filter(self, **params):
+        response = self.client.get('/api/vehicles/', {f'spec__{key}': value for key, value in params.items()})
+        self.assertEqual(response.status_code, 200, response.data)
+        return sorted(row['name'] for row in response.data['results'])
+
+    def test_numeric_keys_are_read_with_their_units(self):
+        self.create_vehicles(1, name='Liter', specs={'Displacement': '0.11 L'})
+        self.create_vehicles(1, name='Emission', specs={'Engine': 'BS6 124.7 cc'})
+        self.create_vehicles(1, name='Stroke', specs={'Engine': '4 stroke, 97.2cc', 'Power': '7.79 PS'})
+        self.create_vehicles(1, name='Bare', specs={'Engine': 'BS6', 'Displacement (cc)': '155'})
+        vehicles = {vehicle.name: vehicle.spec_index for vehicle in VehicleModel.objects.all()}
+        self.assertEqual(vehicles['Liter']['engine_cc'], 110)
+        self.assertEqual(vehicles['Emission']['engine_cc'], 124.7)
+        self.assertEqual(vehicles['Stroke']['power'], 7.6834)
+        self.assertEqual(vehicles['Bare']['engine_cc'], 155)
+
+        self.assertEqual(self.filter(engine_cc__gte=110), ['Bare', 'Emission', 'Liter'])
+        self.assertEqual(self.filter(engine_cc__lt=110), ['Stroke'])
+
+    def test_variant_specs_override_the_model(self):
+        vehicle = self.create_vehicles(1, specs={'Fuel Type': 'Petrol', 'Displacement': '110 cc'})[0]
+        vehicle.variant.specs = {'Displacement': '125 cc'}
+        vehicle.variant.save()
+        self.assertEqual(self.filter(engine_cc__gte=120), [vehicle.name])
+
+    def test_equality_filters(self):
+        self.create_vehicles(1, name='Petrol', specs={'Engine & Transmission': {'Fuel Type': 'Petrol'}, 'Seats': 2})
+        self.create_vehicles(1, name='Electric', specs={'Fuel Type': 'Electric', 'Seats': '1'})
+        self.assertEqual(self.filter(**{'Fuel Type': 'Petrol'}), ['Petrol'])
+        response = self.client.get('/api/vehicles/?spec__Fuel Type=Petrol&spec__Fuel Type=Electric')
+        self.assertEqual(len(response.data['results']), 2)
+        # A number matches whether it was stored as a number or a string
+        self.assertEqual(self.filter(Seats='2'), ['Petrol'])
+        self.assertEqual(self.filter(Seats='1'), ['Electric'])
+
+    def test_invalid_range_filters(self):
+        self.assertEqual(self.client.get('/api/vehicles/', {'spec__colour__gte': '1'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/vehicles/', {'spec__engine_cc__gte': 'big'}).status_code, 400)
+
+
+class EffectivePriceTests(CatalogueFixtureMixin, TestCase):
+    """The stored price after discount is filtered on and rendered like price."""
+
+    def test_discounted_price_is_stored_and_rendered_as_a_string(self):
+        vehicle = self.create_vehicles(1, discount_type='percentage', discount_value=Decimal('15'))[0]
+        self.create_vehicles(1, discount_type='fixed', discount_value=Decimal('80000'))
+        response = self.client.get(f'/api/vehicles/{vehicle.id}/')
+        body = json.loads(response.content)
+        self.assertEqual((body['price'], body['effective_price']), ('75000.00', '63750.00'))
+
+        # A discount larger than the price floors at zero
+        response = self.client.get('/api/vehicles/', {'max_effective_price': '0'})
+        self.assertEqual([row['effective_price'] for row in response.data['results']], ['0.00'])
+
+
+class RankedSearchTests(CatalogueFixtureMixin, TestCase):
+    """?search= matches words, prefixes and misspellings, best match first."""
+
+    def setUp(self):
+        super().setUp()
+        self.activa = self.create_vehicles(1, name='Activa 125', price=Decimal('90000.00'))[0]
+        self.dio = self.create_vehicles(1, name='Dio')[0]
+        self.dio.variant.name = 'Activa Edition'
+        self.dio.variant.save()
+        self.splendor = self.create_vehicles(1, name='Splendor', category='BIKE')[0]
+
+    def search(self, term, **params):
+        return [row['id'] for row in self.client.get('/api/vehicles/', {'search': term, **params}).data['results']]
+
+    def test_name_matches_rank_above_related_names(self):
+        self.assertEqual(self.search('activa'), [self.activa.id, self.dio.id])
+        self.assertEqual(self.search('activ'), [self.activa.id, self.dio.id])
+        # Every word must match, here the brand and the variant
+        self.assertEqual(self.search('honda edition'), [self.dio.id])
+        self.assertEqual(self.search('splendor activa'), [])
+
+    def test_misspellings_match_by_trigram(self):
+        self.assertEqual(sorted(self.search('actva')), [self.activa.id, self.dio.id])
+        self.assertEqual(self.search('splendr'), [self.splendor.id])
+
+    def test_explicit_ordering_replaces_relevance(self):
+        self.assertEqual(self.search('activa', ordering='price'), [self.dio.id, self.activa.id])
+        self.assertEqual(self.search('   '), [self.splendor.id, self.dio.id, self.activa.id])
+
+
+class KeysetPaginationTests(CatalogueFixtureMixin, TestCase):
+    """Cursor pages walk every row exactly once, in both directions."""
+
+    def setUp(self):
+        super().setUp()
+        # Two prices, so most rows tie on the sort value
+        self.vehicles = self.create_vehicles(5)
+        for vehicle in self.vehicles[:3]:
+            vehicle.price = Decimal('60000.00')
+            vehicle.save()
+
+    def walk(self, ordering):
+        url = f'/api/vehicles/?page_size=2&{ordering}'
+        forward, pages = [], []
+        while url:
+            data = self.client.get(url).data
+            pages.append([row['id'] for row in data['results']])
+            forward += pages[-1]
+            last, url = data, data['next']
+        backward = []
+        url = last['previous']
+        while url:
+            data = self.client.get(url).data
+            backward = [row['id'] for row in data['results']] + backward
+            url = data['previous']
+        return forward, pages, backward
+
+    def test_each_ordering_pages_forward_and_back(self):
+        for ordering in ('created_at', '-created_at', 'price', '-price', 'effective_price', '-effective_price'):
+            with self.subTest(ordering=ordering):
+                field = ordering.lstrip('-')
+                expected = sorted(
+                    VehicleModel.objects.all(),
+                    key=lambda vehicle: (getattr(vehicle, field), vehicle.id),
+                    reverse=ordering.startswith('-'),
+                )
+                expected = [vehicle.id for vehicle in expected]
+                forward, pages, backward = self.walk(f'ordering={ordering}')
+                self.assertEqual(forward, expected)
+                self.assertEqual([len(page) for page in pages], [2, 2, 1])
+                # Everything before the last page, in display order
+                self.assertEqual(backward, expected[:4])
+
+    def test_relevance_ordering_pages_through_ties(self):
+        forward, pages, backward = self.walk('search=activa')
+        self.assertEqual(sorted(forward), sorted(vehicle.id for vehicle in self.vehicles))
+        self.assertEqual(backward, forward[:4])
+
+    def test_lists_are_paginated_by_default(self):
+        self.create_vehicles(25)
+        for url in ('/api/vehicles/', '/api/vehicles/dealer_vehicles/'):
+            with self.subTest(url=url):
+                data = self.client.get(url).data
+                self.assertEqual(len(data['results']), 24)
+                self.assertIsNone(data['previous'])
+                self.assertEqual(len(self.client.get(data['next']).data['results']), 6)
+        self.assertEqual(self.client.get('/api/vehicles/featured/').data['results'], [])
+
+    def test_invalid_cursors(self):
+        next_url = self.client.get('/api/vehicles/?page_size=2&ordering=price').data['next']
+        cursor = next_url.split('cursor=')[1].split('&')[0]
+        for params in (
+            {'cursor': 'not-a-cursor'},
+            {'cursor': base64.urlsafe_b64encode(b'[1, 2]').decode()},
+            # Issued for another ordering
+            {'cursor': cursor, 'ordering': '-created_at'},
+            # A position whose value is not a price
+            {'cursor': base64.urlsafe_b64encode(b'{"o":"price","v":"cheap","id":1}').decode(), 'ordering': 'price'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/vehicles/', params).status_code, 404)
+
+    def test_dealer_vehicles_needs_a_dealership(self):
+        self.create_vehicles(1, dealer=None)
+        self.assertEqual(len(self.client.get('/api/vehicles/dealer_vehicles/').data['results']), 5)
+        self.client.force_authenticate(self.create_user('buyer'))
+        self.assertEqual(self.client.get('/api/vehicles/dealer_vehicles/').status_code, 403)
+
+
+class SuggestTests(CatalogueFixtureMixin, TestCase):
+    """Autocomplete suggests each name once and only sees committed rows."""
+
+    def setUp(self):
+        super().setUp()
+        # Let a warm-up build started by an earlier request finish first
+        with suggest_index._build_lock:
+            suggest_index.build()
+        self.addCleanup(setattr, suggest_index, '_built_at', None)
+
+    def test_same_name_from_many_dealers_is_one_entry(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first, second = self.create_vehicles(2, name='Activa 6G', model_name='Activa')
+        labels = [(row['type'], row['label']) for row in suggest('activa')]
+        self.assertEqual(labels, [('model', 'Activa 6G'), ('variant', 'Activa 6G STD')])
+        self.assertEqual(suggest('6g')[0]['id'], first.id)
+        groups = {entry for entry in suggest_index._entries if entry[1] == 'model'}
+        self.assertEqual(groups, {
+            ('activa 6g', 'model', 'activa 6g', 'honda'),
+            ('6g', 'model', 'activa 6g', 'honda'),
+            ('activa', 'model', 'activa 6g', 'honda'),
+        })
+
+        response = self.client.get('/api/vehicles/suggest/', {'q': 'hon'})
+        self.assertEqual(response.data, [{'type': 'brand', 'id': self.brand.id, 'label': 'Honda'}])
+
+        # The name stays while any listing has it
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(suggest('activa')[0]['id'], second.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(suggest('activa'), [])
+
+    def test_same_model_name_from_two_brands_is_two_entries(self):
+        other = Brand.objects.create(name='Tata')
+        with self.captureOnCommitCallbacks(execute=True):
+            honda, = self.create_vehicles(1, name='Nexon', model_name='Nexon')
+            tata, = self.create_vehicles(1, name='Nexon', model_name='Nexon', brand=other)
+        models = [(row['brand'], row['id']) for row in suggest('nexon') if row['type'] == 'model']
+        self.assertEqual(models, [('Honda', honda.id), ('Tata', tata.id)])
+
+    def test_first_lookup_does_not_wait_for_the_build(self):
+        suggest_index._built_at = None
+        suggest_index._entries = []
+        release = threading.Event()
+        with mock.patch.object(SuggestIndex, 'build', side_effect=lambda: release.wait(5)) as build:
+            self.assertEqual(suggest('honda'), [])
+            release.set()
+            while suggest_index._build_lock.locked():
+                time_module.sleep(0.01)
+        build.assert_called_once_with()
+
+    def test_rolled_back_writes_are_not_indexed(self):
+        try:
+            with transaction.atomic():
+                self.create_vehicles(1, name='Pulsar')
+                raise DatabaseError
+        except DatabaseError:
+            pass
+        self.assertEqual(suggest('pulsar'), [])
+
+    def test_stale_index_is_rebuilt_once_in_the_background(self):
+        suggest_index._built_at -= 3600
+        release = threading.Event()
+        with mock.patch.object(SuggestIndex, 'build', side_effect=lambda: release.wait(5)) as build:
+            suggest_index.ensure_fresh()
+            # The old index keeps serving while the rebuild runs
+            suggest_index.ensure_fresh()
+            self.assertEqual(suggest('honda')[0]['label'], 'Honda')
+            release.set()
+            while suggest_index._build_lock.locked():
+                time_module.sleep(0.01)
+        build.assert_called_once_with()
+
+
+class CompareTests(CatalogueFixtureMixin, TestCase):
+    """Spec values are compared in canonical units, with the best per row marked."""
+
+    def test_normalize_quantity(self):
+        self.assertEqual(normalize_quantity('Displacement', '110 cc'), (110.0, 'cc'))
+        self.assertEqual(normalize_quantity('Displacement', '110cc'), (110.0, 'cc'))
+        self.assertEqual(normalize_quantity('Displacement', '0.11 L'), (110.0, 'cc'))
+        self.assertEqual(normalize_quantity('Power', '7.79 PS'), (7.6834, 'bhp'))
+        self.assertEqual(normalize_quantity('Fuel Tank', '5.3 L'), (5.3, 'L'))
+        self.assertEqual(normalize_quantity('Seats', 2), (2.0, None))
+        self.assertIsNone(normalize_quantity('Power', 'N/A'))
+        self.assertIsNone(normalize_quantity('ABS', True))
+
+    def test_rows_flag_differences_and_best_values(self):
+        first = self.create_vehicles(1, specs={
+            'Power': '8 bhp', 'Kerb Weight': '110 kg', 'Colour': 'Red', 'Brakes': 'Drum',
+        })[0]
+        second = self.create_vehicles(1, specs={
+            'Power': '7.79 PS', 'Kerb Weight': '105 kg', 'Colour': 'red', 'Brakes': 'Disc',
+        }, discount_type='percentage', discount_value=Decimal('10'))[0]
+        response = self.client.get('/api/compare/', {'vehicles': f'{first.id},{second.id}'})
+        self.assertEqual(response.status_code, 200)
+        rows = {row['key']: row for row in response.data['rows']}
+
+        self.assertEqual(rows['Power']['unit'], 'bhp')
+        self.assertEqual([value['value'] for value in rows['Power']['values']], [8.0, 7.6834])
+        self.assertTrue(rows['Power']['differs'])
+        self.assertEqual(rows['Power']['best'], [0])
+        # Lower is better for weight
+        self.assertEqual(rows['Kerb Weight']['best'], [1])
+        # Text rows differ case-insensitively and have no best column
+        self.assertFalse(rows['Colour']['differs'])
+        self.assertTrue(rows['Brakes']['differs'])
+        self.assertEqual(rows['Brakes']['best'], [])
+        # Prices compare after discounts
+        self.assertEqual([value['raw'] for value in rows['Price']['values']], ['75000.00', '67500.00'])
+        self.assertEqual(rows['Price']['best'], [1])
+        self.assertEqual(response.data['columns'][1]['list_price'], '75000.00')
+
+        # Column order follows the request
+        reversed_order = self.client.get('/api/compare/', {'vehicles': f'{second.id},{first.id}'}).data
+        power = next(row for row in reversed_order['rows'] if row['key'] == 'Power')
+        self.assertEqual(power['best'], [1])
+
+    @LOCAL_CACHE
+    def test_cached_table_follows_brand_and_branch_edits(self):
+        vehicle = self.create_vehicles(1)[0]
+        item = InventoryItem.objects.create(
+            branch=self.branch, vehicle_model_variant=vehicle.variant, price=Decimal('74000'),
+        )
+        params = {'vehicles': str(vehicle.id), 'inventory': str(item.id)}
+        self.client.get('/api/compare/', params)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.brand.name = 'Honda Motors'
+            self.brand.save()
+            self.branch.name = 'Camp'
+            self.branch.save()
+        columns = self.client.get('/api/compare/', params).data['columns']
+        self.assertEqual([column['brand'] for column in columns], ['Honda Motors', 'Honda Motors'])
+        self.assertEqual(columns[1]['branch'], 'Camp')
+
+    def test_needs_two_distinct_items(self):
+        vehicle = self.create_vehicles(1)[0]
+        response = self.client.get('/api/compare/', {'vehicles': f'{vehicle.id},{vehicle.id}'})
+        self.assertEqual(response.status_code, 400)
+
+
+class FastJSONTests(TestCase):
+    """FastJSONRenderer/Parser must agree with DRF's stdlib implementations."""
+
+    def test_renderer_matches_stdlib(self):
+        data = {
+            'price': Decimal('75000.50'),
+            'created_at': timezone.now(),
+            'naive': datetime(2025, 1, 2, 3, 4, 5),
+            'date': date(2025, 1, 2),
+            'id': uuid.uuid4(),
+            'specs': {'Engine': '109.51 cc', 'Mileage': 60, 'Disc': True, 'नाम': None},
+            1: 'non-string key',
+            'separator': 'a\u2028b',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, 'application/json; indent=2'),
+            JSONRenderer().render(data, 'application/json; indent=2'),
+        )
+
+        # Floats may be spelled differently (1e16 for 1e+16) but read back the same
+        floats = {'values': [0.1, 1e16, 1e-7, -2.5e300, 12345.678, 1e15]}
+        self.assertEqual(json.loads(FastJSONRenderer().render(floats)), json.loads(JSONRenderer().render(floats)))
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                FastJSONRenderer().render({'specs': [{'Range': value, 'Seats': None}]})
+
+    def test_parser_matches_stdlib(self):
+        body = '{"name": "Activa", "price": 75000.5, "specs": {"नाम": [1, 2.5, null]}}'.encode()
+        self.assertEqual(FastJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(BytesIO(b'{"price": NaN}'))
+
+
+class TemporaryMediaMixin:
+    """Points MEDIA_ROOT and UPLOAD_SESSION_DIR at a directory removed after each test."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root, UPLOAD_SESSION_DIR=f'{media_root}/sessions')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def png_upload(self, color):
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new('RGB', (8, 8), color).save(buffer, 'PNG')
+        return ContentFile(buffer.getvalue(), name='photo.png')
+
+
+class RenditionTests(TemporaryMediaMixin, CatalogueFixtureMixin, TestCase):
+
+    def create_image(self, width, height):
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new('RGBA', (width, height), (200, 30, 30, 128)).save(buffer, 'PNG')
+        vehicle = self.create_vehicles(1)[0]
+        path = default_storage.save('vehicles/photo.png', ContentFile(buffer.getvalue()))
+        return VehicleImage.objects.create(vehicle=vehicle, image=path, order=-1)
+
+    def test_generates_each_size_without_upscaling(self):
+        image = self.create_image(1000, 500)
+        self.assertTrue(generate_renditions(image))
+        sizes = VehicleImage.objects.get(pk=image.pk).renditions['sizes']
+        self.assertEqual((sizes['thumb']['width'], sizes['thumb']['height']), (320, 160))
+        self.assertEqual((sizes['detail']['width'], sizes['detail']['height']), (1000, 500))
+        for entry in sizes.values():
+            for fmt in ('webp', 'jpeg'):
+                self.assertEqual(default_storage.size(entry[fmt]['path']), entry[fmt]['bytes'])
+        # Unchanged source: nothing to do
+        self.assertFalse(generate_renditions(image))
+
+    def test_card_view_uses_card_rendition(self):
+        image = self.create_image(800, 600)
+        generate_renditions(image)
+        response = self.client.get(f'/api/vehicles/{image.vehicle_id}/')
+        webp = response.data['images'][0]['renditions']['webp']
+        self.assertEqual([source['width'] for source in webp['sources']], [320, 640, 800])
+        self.assertIn(' 640w', webp['srcset'])
+
+        response = self.client.get('/api/vehicles/', {'view': 'card'})
+        self.assertTrue(response.data['results'][0]['primary_image'].endswith('_card.webp'))
+
+
+@override_settings(JOB_QUEUE_EAGER=True)
+class BlobStorageTests(TemporaryMediaMixin, CatalogueFixtureMixin, TestCase):
+    def test_identical_uploads_share_one_file(self):
+        first, second = self.create_vehicles(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            add_images(first, [self.png_upload('red')])
+            add_images(second, [self.png_upload('red')])
+        names = set(VehicleImage.objects.filter(vehicle__in=[first, second], order=0)
+                    .exclude(image__startswith='vehicles/').values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertEqual(ImageBlob.objects.get(name=name).ref_count, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertTrue(blob_storage().exists(name))
+        self.assertEqual(ImageBlob.objects.get(name=name).ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(blob_storage().exists(name))
+        self.assertFalse(ImageBlob.objects.filter(name=name).exists())
+
+    def test_saving_a_blob_cancels_its_pending_deletion(self):
+        first, second = self.create_vehicles(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            name = add_images(first, [self.png_upload('red')])[0].image.name
+        with self.captureOnCommitCallbacks() as pending:
+            first.delete()
+        # The file exists, so the save reuses it; the release's deletion then runs
+        self.assertEqual(blob_storage().save('photo.png', self.png_upload('red')), name)
+        for callback in pending:
+            callback()
+        self.assertTrue(blob_storage().exists(name))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_images(second, [self.png_upload('red')])
+        self.assertEqual(ImageBlob.objects.get(name=name).ref_count, 1)
+
+
+@override_settings(JOB_QUEUE_EAGER=True)
+class ReplaceImagesTests(TemporaryMediaMixin, CatalogueFixtureMixin, TestCase):
+    """Replacing a vehicle's images touches only what changed."""
+
+    def setUp(self):
+        super().setUp()
+        self.vehicle = self.create_vehicles(1)[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehicle.images.all().delete()
+            self.red, self.green, self.blue = add_images(
+                self.vehicle, [self.png_upload(color) for color in ('red', 'green', 'blue')],
+            )
+
+    def current(self):
+        return list(self.vehicle.images.order_by('order').values_list('id', 'image'))
+
+    def test_reorder_only_reads_no_files(self):
+        before = dict(self.current())
+        entries = [{'id': image.id} for image in (self.blue, self.red, self.green)]
+        with mock.patch('core.services.image_service.hash_file') as hash_file, \
+                mock.patch('core.services.image_service.acquire_blobs') as acquire:
+            replace_images(self.vehicle, [], entries)
+        hash_file.assert_not_called()
+        acquire.assert_not_called()
+        self.assertEqual(
+            self.current(),
+            [(image.id, before[image.id]) for image in (self.blue, self.red, self.green)],
+        )
+
+    def test_matching_uploads_keep_their_images(self):
+        files = [self.png_upload(color) for color in ('blue', 'red', 'yellow')]
+        with self.captureOnCommitCallbacks(execute=True):
+            replace_images(self.vehicle, files)
+        ids = [image_id for image_id, _ in self.current()]
+        self.assertEqual(ids[:2], [self.blue.id, self.red.id])
+        self.assertNotIn(ids[2], (self.red.id, self.green.id, self.blue.id))
+        # The dropped image's file and blob go with it
+        self.assertFalse(blob_storage().exists(self.green.image.name))
+        self.assertFalse(ImageBlob.objects.filter(name=self.green.image.name).exists())
+        self.assertEqual(ImageBlob.objects.count(), 3)
+
+    def test_dropped_images_release_their_files(self):
+        entries = [{'id': self.green.id}, {'upload': 0}, {'id': self.red.id}]
+        with self.captureOnCommitCallbacks(execute=True):
+            replace_images(self.vehicle, [self.png_upload('white')], entries)
+        ids = [image_id for image_id, _ in self.current()]
+        self.assertEqual((ids[0], ids[2]), (self.green.id, self.red.id))
+        self.assertFalse(VehicleImage.objects.filter(pk=self.blue.pk).exists())
+        self.assertFalse(blob_storage().exists(self.blue.image.name))
+        self.assertTrue(blob_storage().exists(self.red.image.name))
+
+    def test_rejects_fewer_than_three_images(self):
+        before = self.current()
+        for entries in (
+            [{'id': self.red.id}, {'id': self.blue.id}],
+            [{'id': self.red.id}, {'id': self.red.id}, {'id': self.blue.id}],
+        ):
+            with self.assertRaises(ValidationError):
+                replace_images(self.vehicle, [], entries)
+        with self.assertRaises(ValidationError):
+            replace_images(self.vehicle, [self.png_upload('red'), self.png_upload('blue')])
+        self.assertEqual(self.current(), before)
+        self.assertTrue(all(blob_storage().exists(name) for _, name in before))
+
+
+class ResumableUploadTests(TemporaryMediaMixin, TransactionTestCase):
+    # The concurrent chunk is written from a second connection, which only
+    # sees committed rows
+    DATA = bytes(range(256)) * 4
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='rider', password='password')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def start(self, sha256=None):
+        response = self.client.post('/api/uploads/', {
+            'filename': 'front.jpg', 'size': len(self.DATA),
+            'sha256': hashlib.sha256(self.DATA).hexdigest() if sha256 is None else sha256,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        return f"/api/uploads/{response.data['id']}/"
+
+    def put(self, url, start, end):
+        return self.client.put(
+            url, self.DATA[start:end + 1], content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{len(self.DATA)}',
+        )
+
+    def test_chunks_resume_from_the_offset_and_finalize(self):
+        url = self.start()
+        self.assertEqual(self.put(url, 0, 399).data['offset'], 400)
+        # A retried chunk whose response was lost
+        response = self.put(url, 0, 399)
+        self.assertEqual((response.status_code, response.data['detail']), (409, 'Expected offset 400'))
+        self.assertEqual(self.client.get(url).data['offset'], 400)
+        self.assertEqual(self.client.post(f'{url}finalize/').status_code, 409)
+
+        self.assertEqual(self.put(url, 400, len(self.DATA) - 1).data['offset'], len(self.DATA))
+        response = self.client.post(f'{url}finalize/')
+        self.assertEqual(response.data['status'], 'COMPLETE')
+        with blob_storage().open(response.data['path'], 'rb') as file:
+            self.assertEqual(file.read(), self.DATA)
+        self.assertTrue(ImageBlob.objects.get(name=response.data['path']).pinned)
+        self.assertEqual(list(Path(settings.UPLOAD_SESSION_DIR).iterdir()), [])
+
+        # Finalizing again is harmless; writing again is not allowed
+        self.assertEqual(self.client.post(f'{url}finalize/').data['path'], response.data['path'])
+        self.assertEqual(self.put(url, 0, 9).status_code, 409)
+
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='other', password='password'))
+        self.assertEqual(other.get(url).status_code, 404)
+
+    def test_checksum_mismatch_is_not_stored(self):
+        url = self.start(sha256='0' * 64)
+        self.put(url, 0, len(self.DATA) - 1)
+        response = self.client.post(f'{url}finalize/')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('sha256', response.data)
+        self.assertEqual(self.client.get(url).data['status'], 'PENDING')
+        self.assertFalse(ImageBlob.objects.exists())
+
+    def test_concurrent_chunk_is_refused(self):
+        url = self.start()
+        session_id = url.rstrip('/').rsplit('/', 1)[1]
+        # Another PUT holds the writer lease
+        UploadSession.objects.filter(pk=session_id).update(lease_expires_at=timezone.now() + timedelta(minutes=1))
+        response = self.put(url, 0, 99)
+        self.assertEqual(response.status_code, 409)
+        self.assertIn('in progress', response.data['detail'])
+
+        # A writer that died mid-chunk does not block the session for good
+        UploadSession.objects.filter(pk=session_id).update(lease_expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.put(url, 0, 99).data['offset'], 100)
+        self.assertIsNone(UploadSession.objects.get(pk=session_id).lease_expires_at)
+
+    def test_session_row_is_not_locked_while_the_body_is_read(self):
+        url = self.start()
+        session_id = url.rstrip('/').rsplit('/', 1)[1]
+        body = BytesIO(self.DATA[:100])
+        outcome = []
+
+        def lock_from_another_connection():
+            try:
+                with transaction.atomic():
+                    outcome.append(UploadSession.objects.select_for_update(nowait=True).get(pk=session_id).offset)
+            except DatabaseError as exc:
+                outcome.append(exc)
+            finally:
+                connection.close()
+
+        def read(size):
+            if not outcome:
+                reader = threading.Thread(target=lock_from_another_connection)
+                reader.start()
+                reader.join()
+            return body.read(size)
+
+        session = write_chunk(self.user, session_id, 0, 100, mock.Mock(read=read))
+        self.assertEqual(outcome, [0])
+        self.assertEqual(session.offset, 100)
+
+    def test_direct_upload_checks_the_extension(self):
+        response = self.client.post('/api/upload-image/', {'image': SimpleUploadedFile('shell.php', b'<?php')})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('filename', response.data)
+        self.assertFalse(ImageBlob.objects.exists())
+
+
+class DealerDashboardTests(CatalogueFixtureMixin, TestCase):
+    def add_bookings(self, rows):
+        vehicles = self.create_vehicles(rows, type='USED')
+        for vehicle in vehicles:
+            InventoryItem.objects.create(branch=self.branch, vehicle_model_variant=vehicle.variant, price=Decimal('1000'))
+            Booking.objects.create(
+                user=self.dealer_user, branch=self.branch, booking_type='TEST_RIDE',
+                preferred_date=date(2025, 1, 1), status='CONFIRMED',
+            )
+
+    def test_dashboard_query_count_is_constant(self):
+        Branch.objects.create(dealership=self.dealership, name='Quiet', address='2 MG Road',
+                              city='Pune', state='MH', zipcode='411001')
+        for rows in (1, 10):
+            self.add_bookings(rows)
+            # Dealership, vehicle counts, bookings, inventory value, series
+            with self.assertNumQueries(5):
+                response = self.client.get('/api/dealer/dashboard/')
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(response.data['used_vehicles'], 11)
+        self.assertEqual(response.data['total_bookings'], 11)
+        self.assertEqual(response.data['test_ride_bookings'], 11)
+        self.assertEqual(response.data['bookings_by_status'], {'CONFIRMED': 11})
+        self.assertEqual(
+            [(branch['name'], branch['count']) for branch in response.data['bookings_by_branch']],
+            [('Main', 11), ('Quiet', 0)],
+        )
+        self.assertEqual(response.data['inventory_value'], Decimal('11000'))
+        self.assertEqual(sum(day['count'] for day in response.data['vehicles_over_time']), 11)
+
+
+class DailyRollupTests(CatalogueFixtureMixin, TestCase):
+    def rollup_rows(self):
+        return {
+            (row.dealership_id, row.branch_id, row.date): {column: getattr(row, column) for column in REBUILT_COLUMNS}
+            for row in DealerDailyStats.objects.all()
+        }
+
+    def test_incremental_rollups_match_a_recount(self):
+        vehicles = self.create_vehicles(3)
+        WishlistItem.objects.create(user=self.dealer_user, vehicle=vehicles[0])
+        booking = Booking.objects.create(
+            user=self.dealer_user, branch=self.branch, booking_type='TEST_RIDE', preferred_date=date(2025, 1, 1),
+        )
+        booking.status = 'CONFIRMED'
+        booking.save()
+        vehicles[1].status = 'SOLD'
+        vehicles[1].save()
+        vehicles[2].delete()
+
+        today = timezone.localdate()
+        self.assertEqual(self.rollup_rows(), dict(count_from_source(today, today)))
+        row = DealerDailyStats.objects.get()
+        self.assertEqual((row.vehicles_added, row.vehicles_sold, row.confirmed_bookings, row.pending_bookings), (2, 1, 1, 0))
+
+    def test_compaction_recounts_bulk_writes(self):
+        vehicle = self.create_vehicles(1)[0]
+        WishlistItem.objects.bulk_create([WishlistItem(user=self.dealer_user, vehicle=vehicle)])
+        today = timezone.localdate()
+        self.assertEqual(DealerDailyStats.objects.get().wishlist_adds, 0)
+        compact_rollups(today, today)
+        self.assertEqual(DealerDailyStats.objects.get().wishlist_adds, 1)
+
+    def test_dashboard_window(self):
+        self.create_vehicles(2)
+        response = self.client.get('/api/dealer/dashboard/', {'days': 90})
+        self.assertEqual(response.data['period_totals']['vehicles_added'], 2)
+        self.assertEqual(response.data['vehicles_over_time'], [{'date': timezone.localdate(), 'count': 2}])
+        self.assertEqual(self.client.get('/api/dealer/dashboard/', {'days': 7}).status_code, 400)
+
+
+class SlotBookingTests(CatalogueFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        response = self.client.put(f'/api/dealer/branches/{self.branch.id}/slot-config/', {
+            'opens_at': '10:00', 'closes_at': '12:00', 'slot_minutes': 60, 'capacity': 1,
+            'closed_weekdays': [], 'horizon_days': 7,
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def book(self, user):
+        return self.client_for(user).post('/api/bookings/', {
+            'booking_type': 'TEST_RIDE', 'branch': self.branch.id,
+            'preferred_date': str(self.day), 'preferred_time': '10:00',
+        }, format='json')
+
+    def available(self):
+        response = self.client.get(
+            f'/api/branches/{self.branch.id}/availability/', {'start': str(self.day), 'end': str(self.day)}
+        )
+        return response.data['dates'][0]['slots']
+
+    def test_full_slot_is_rejected_and_released_on_cancel(self):
+        self.assertEqual(self.available(), [{'time': '10:00', 'available': 1}, {'time': '11:00', 'available': 1}])
+        other = self.create_user('rider')
+        self.assertEqual(self.book(self.dealer_user).status_code, 201)
+        self.assertEqual(self.book(other).status_code, 409)
+        self.assertEqual(self.available(), [{'time': '11:00', 'available': 1}])
+
+        booking = Booking.objects.get()
+        booking.status = 'CANCELLED'
+        booking.save()
+        slot = BookingSlot.objects.get(branch=self.branch, date=self.day, start_time=time(10))
+        self.assertEqual(slot.booked, 0)
+        self.assertEqual(self.book(other).status_code, 201)
+
+    def test_update_moves_the_reservation(self):
+        other = self.create_user('rider')
+        self.assertEqual(self.book(other).status_code, 201)
+        client = self.client_for(self.dealer_user)
+        response = client.post('/api/bookings/', {
+            'booking_type': 'TEST_RIDE', 'branch': self.branch.id,
+            'preferred_date': str(self.day), 'preferred_time': '11:00',
+        }, format='json')
+        booking_id = response.data['id']
+        url = f'/api/bookings/{booking_id}/'
+
+        # Into the full 10:00 slot: refused, and the 11:00 one is still held
+        self.assertEqual(client.patch(url, {'preferred_time': '10:00'}, format='json').status_code, 409)
+        booked = BookingSlot.objects.filter(branch=self.branch, date=self.day).order_by('start_time')
+        self.assertEqual(list(booked.values_list('booked', flat=True)), [1, 1])
+
+        other_booking = Booking.objects.get(user=other)
+        other_booking.status = 'CANCELLED'
+        other_booking.save()
+        self.assertEqual(client.patch(url, {'preferred_time': '10:00'}, format='json').status_code, 200)
+        self.assertEqual(self.available(), [{'time': '11:00', 'available': 1}])
+
+        # Reopening a cancelled booking needs its slot back
+        client.patch(url, {'status': 'CANCELLED'}, format='json')
+        self.assertEqual(self.book(other).status_code, 201)
+        self.assertEqual(client.patch(url, {'status': 'PENDING'}, format='json').status_code, 409)
+        self.assertEqual(Booking.objects.get(pk=booking_id).status, 'CANCELLED')
+
+    def test_lower_capacity_reports_overbooked_slots(self):
+        self.client.put(f'/api/dealer/branches/{self.branch.id}/slot-config/', {
+            'opens_at': '10:00', 'closes_at': '12:00', 'slot_minutes': 60, 'capacity': 2,
+            'closed_weekdays': [], 'horizon_days': 7,
+        }, format='json')
+        self.book(self.dealer_user)
+        self.book(self.create_user('rider'))
+        response = self.client.put(f'/api/dealer/branches/{self.branch.id}/slot-config/', {
+            'opens_at': '10:00', 'closes_at': '12:00', 'slot_minutes': 60, 'capacity': 1,
+            'closed_weekdays': [], 'horizon_days': 7,
+        }, format='json')
+        self.assertEqual(response.data['overbooked_slots'], [
+            {'date': self.day, 'time': '10:00', 'booked': 2, 'capacity': 1},
+        ])
+
+
+@LOCAL_CACHE
+class WishlistBatchTests(CatalogueFixtureMixin, TestCase):
+    def test_batch_sync_and_compact_membership(self):
+        vehicles = self.create_vehicles(3)
+        ids = [vehicle.id for vehicle in vehicles]
+        WishlistItem.objects.create(user=self.dealer_user, vehicle=vehicles[0])
+
+        response = self.client.post('/api/wishlist/batch/', {'add': ids[:2] + [ids[1]]}, format='json')
+        self.assertEqual(response.data, {'added': 1, 'removed': 0})
+        response = self.client.get('/api/wishlist/ids/')
+        self.assertEqual(response.data, {'ids': ids[:2]})
+        self.assertEqual(DealerDailyStats.objects.get().wishlist_adds, 2)
+
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/wishlist/ids/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.post('/api/wishlist/batch/', {'add': [ids[2]], 'remove': [ids[0]]}, format='json')
+        self.assertEqual(response.data, {'added': 1, 'removed': 1})
+        response = self.client.get('/api/wishlist/ids/', {'start': ids[0], 'end': ids[0] + 15})
+        bits = int.from_bytes(base64.b64decode(response.data['bitmap']), 'little')
+        self.assertEqual([offset for offset in range(16) if bits >> offset & 1], [ids[1] - ids[0], ids[2] - ids[0]])
+        self.assertEqual(self.client.post('/api/wishlist/batch/', {'add': [0]}, format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/wishlist/batch/', {'add': [10 ** 6]}, format='json').status_code, 400)
+
+    def test_batch_remove_costs_the_same_for_any_size(self):
+        ids = [vehicle.id for vehicle in self.create_vehicles(12)]
+        queries = []
+        for batch in (ids[:2], ids[2:]):
+            self.client.post('/api/wishlist/batch/', {'add': batch}, format='json')
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.post('/api/wishlist/batch/', {'remove': batch}, format='json')
+            self.assertEqual(response.data, {'added': 0, 'removed': len(batch)})
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
+        self.assertFalse(WishlistItem.objects.exists())
+        self.assertEqual(DealerDailyStats.objects.get().wishlist_adds, 0)
+
+
+class PriceAlertTests(CatalogueFixtureMixin, TestCase):
+    def test_price_drops_notify_wishlisters_in_bulk(self):
+        vehicle = self.create_vehicles(1)[0]
+        shoppers = [self.create_user(f'shopper{index}') for index in range(4)]
+        WishlistItem.objects.bulk_create([WishlistItem(user=user, vehicle=vehicle) for user in shoppers])
+        PriceAlertSetting.objects.create(user=shoppers[0], min_drop_percent=Decimal('20'))
+        PriceAlertSetting.objects.create(user=shoppers[1], enabled=False)
+        self.assertEqual(PriceChange.objects.filter(vehicle=vehicle).count(), 1)
+
+        vehicle.save()
+        vehicle.price = Decimal('80000')
+        vehicle.save()
+        vehicle.discount_type, vehicle.discount_value = 'percentage', Decimal('15')
+        vehicle.save()
+        change = PriceChange.objects.latest('id')
+        self.assertEqual((change.old_effective_price, change.new_effective_price), (Decimal('80000'), Decimal('68000')))
+        vehicle.refresh_from_db()
+        self.assertEqual(vehicle.effective_price, change.new_effective_price)
+
+        # The listing and two changes: one drop of 75000 -> 68000 (9.3%)
+        # Pending vehicles, then per vehicle: claim, name, wishlist join,
+        # insert, mark sent, plus the savepoint pair
+        with self.assertNumQueries(8):
+            self.assertEqual(send_price_alerts(), (3, 2))
+        self.assertEqual(
+            sorted(Notification.objects.values_list('user__username', flat=True)), ['shopper2', 'shopper3']
+        )
+        self.assertEqual(send_price_alerts(), (0, 0))
+
+        response = self.client.put('/api/account/price-alerts/', {
+            'enabled': True, 'min_drop_percent': '5', 'min_drop_amount': '0',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(PriceAlertSetting.objects.filter(user=self.dealer_user, min_drop_percent=5).exists())
+
+
+    def test_each_vehicle_commits_its_alerts_separately(self):
+        first, second = self.create_vehicles(2)
+        shopper = self.create_user('shopper')
+        WishlistItem.objects.bulk_create([WishlistItem(user=shopper, vehicle=vehicle) for vehicle in (first, second)])
+        PriceChange.objects.update(alerts_sent_at=timezone.now())
+        for vehicle in (first, second):
+            vehicle.price = Decimal('70000')
+            vehicle.save()
+
+        real = notify_wishlisters
+
+        def fail_on_second(vehicle_id, *args):
+            if vehicle_id == second.id:
+                raise DatabaseError
+            return real(vehicle_id, *args)
+
+        with mock.patch('core.services.price_alert_service.notify_wishlisters', side_effect=fail_on_second):
+            with self.assertRaises(DatabaseError):
+                send_price_alerts()
+        # The first vehicle's alerts stay sent; the second's are retried
+        self.assertEqual(Notification.objects.filter(user=shopper).count(), 1)
+        pending = PriceChange.objects.filter(alerts_sent_at__isnull=True)
+        self.assertEqual(set(pending.values_list('vehicle_id', flat=True)), {second.id})
+        self.assertEqual(send_price_alerts(), (1, 1))
+
+
+class JobQueueTests(CatalogueFixtureMixin, TestCase):
+    def test_price_changes_queue_one_alert_job_that_retries(self):
+        vehicle = self.create_vehicles(1)[0]
+        Job.objects.all().delete()
+        vehicle.price = Decimal('70000')
+        vehicle.save()
+        # Both changes share the queued job, which waits out the batching delay
+        job = Job.objects.get(kind='send_price_alerts')
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIsNone(claim_job('test'))
+
+        Job.objects.update(run_at=timezone.now())
+        job = claim_job('test')
+        self.assertEqual((job.status, job.attempts), ('RUNNING', 1))
+        self.assertIsNone(claim_job('test'))
+        self.assertTrue(run_job(job))
+        self.assertFalse(Job.objects.exists())
+        self.assertFalse(PriceChange.objects.filter(alerts_sent_at__isnull=True).exists())
+
+        Job.objects.create(kind='generate_renditions', payload={'missing': 1}, max_attempts=2)
+        self.assertFalse(run_job(claim_job('test')))
+        job = Job.objects.get()
+        self.assertEqual(job.status, 'QUEUED')
+        self.assertIn('TypeError', job.last_error)
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=5))
+        Job.objects.update(run_at=timezone.now())
+        self.assertFalse(run_job(claim_job('test')))
+        self.assertEqual(Job.objects.get().status, 'FAILED')
+
+        metrics = JobMetrics.objects.get(kind='generate_renditions')
+        self.assertEqual((metrics.retried, metrics.failed, metrics.succeeded), (1, 1, 0))
+
+    def test_failed_or_stale_keyed_job_yields_to_the_queued_one(self):
+        Job.objects.all().delete()
+        Job.objects.create(kind='generate_renditions', key='renders', payload={'missing': 1})
+        job = claim_job('test')
+        # Queued again under the same key while the first one runs
+        later = timezone.now() + timedelta(hours=1)
+        Job.objects.create(kind='generate_renditions', key='renders', payload={'image_ids': []}, run_at=later)
+        self.assertFalse(run_job(job))
+        self.assertEqual(list(Job.objects.values_list('status', 'payload')), [('QUEUED', {'image_ids': []})])
+
+        Job.objects.update(status='RUNNING', started_at=timezone.now() - timedelta(days=1))
+        Job.objects.create(kind='generate_renditions', key='renders', payload={})
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(list(Job.objects.values_list('status', 'payload')), [('QUEUED', {})])
+
+
+class CatalogueImportTests(CatalogueFixtureMixin, TestCase):
+    CSV = (
+        "Brand,Name,Category,Fuel Type,Price,Branch,Variant,Stock,Discount Type,Discount Value,Spec: Range,Colour\n"
+        "Ather,450X,ev,electric,\"1,45,000\",Main,Pro,2,fixed,5000,146 km,Grey\n"
+        "ather,450X,EV,ELECTRIC,150000,Main,pro,1,,,,\n"
+        "Honda,Shine,BIKE,DIESEL,80000,Elsewhere,,1,,,,\n"
+    )
+
+    def upload(self, dry_run=False):
+        return self.client.post('/api/dealer/import/', {
+            'file': ContentFile(self.CSV.encode(), name='stock.csv'), 'dry_run': dry_run,
+        }, format='multipart')
+
+    def test_import_validates_rows_and_keeps_indexes_in_sync(self):
+        response = self.upload(dry_run=True)
+        self.assertEqual(response.data['created'], {'brands': 1, 'vehicles': 2, 'variants': 1, 'inventory_items': 3})
+        self.assertFalse(VehicleModel.objects.exists())
+
+        response = self.upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['rows'], response.data['imported']), (3, 2))
+        self.assertEqual(response.data['ignored_columns'], ['colour'])
+        self.assertEqual(response.data['errors'], [{'row': 4, 'errors': {
+            'fuel_type': 'Must be one of ELECTRIC, HYBRID, PETROL',
+            'branch': "No branch 'Elsewhere' in your dealership",
+            'stock': 'Stock needs a variant',
+        }}])
+
+        first, second = VehicleModel.objects.order_by('id')
+        self.assertEqual(first.variant_id, second.variant_id)
+        self.assertEqual(first.effective_price, Decimal('140000'))
+        self.assertEqual(first.spec_index['range'], 146)
+        self.assertEqual(InventoryItem.objects.filter(vehicle_model_variant=first.variant).count(), 3)
+        self.assertEqual(first.search_document.split(), ['450x', 'ather', 'pro'])
+        results = self.client.get('/api/vehicles/', {'search': '450x'}).data['results']
+        self.assertEqual(sorted(vehicle['id'] for vehicle in results), [first.id, second.id])
+        self.assertEqual(PriceChange.objects.filter(alerts_sent_at__isnull=False).count(), 5)
+        self.assertEqual(DealerDailyStats.objects.get().vehicles_added, 2)
+
+
+class EventStreamTests(TransactionTestCase):
+    # The stream reads on executor threads, which only see committed rows
+    def setUp(self):
+        self.user = User.objects.create_user(username='rider', password='password')
+        self.token = str(AccessToken.for_user(self.user))
+        Notification.objects.create(user=self.user, title='Old', message='Already seen')
+        self.booking = Booking.objects.create(user=self.user, booking_type='INQUIRY', preferred_date=date(2025, 1, 1))
+
+    def change_and_notify(self):
+        self.booking.status = 'CONFIRMED'
+        self.booking.save()
+        Notification.objects.create(user=self.user, title='Price drop', message='Cheaper now')
+
+    async def test_stream_sends_booking_changes_and_new_notifications(self):
+        response = await self.async_client.get('/api/events/', headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = aiter(response.streaming_content)
+        self.assertEqual(await anext(events), b'retry: 3000\n\n')
+
+        await sync_to_async(self.change_and_notify)()
+        received = sorted([(await anext(events)).decode(), (await anext(events)).decode()])
+        booking_event, notification_event = received
+        self.assertIn('event: booking', booking_event)
+        self.assertIn('"status": "CONFIRMED"', booking_event)
+        self.assertIn('event: notification', notification_event)
+        self.assertIn('Price drop', notification_event)
+        self.assertNotIn('Already seen', notification_event)
+        await events.aclose()
+
+    async def test_subscribe_returns_once_the_listener_is_listening(self):
+        broker = PostgresBroker()
+        async with broker.subscribe(self.user.id) as queue:
+            # Published right away, before the listener task had a turn to run
+            await sync_to_async(broker.publish)({'users': [self.user.id], 'event': 'ping', 'data': None})
+            message = await asyncio.wait_for(queue.get(), 5)
+        self.assertEqual(message['event'], 'ping')
+        listener, _ = broker._listeners[asyncio.get_running_loop()]
+        listener.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await listener
+
+    async def test_stream_opens_with_a_ticket(self):
+        ticket = (await self.async_client.post(
+            '/api/events/ticket/', headers={'Authorization': f'Bearer {self.token}'}
+        )).data['ticket']
+        response = await self.async_client.get('/api/events/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 200)
+        await response.streaming_content.aclose()
+
+        # The JWT itself is not accepted in the URL, and tickets expire
+        response = await self.async_client.get('/api/events/', {'ticket': self.token})
+        self.assertEqual(response.status_code, 401)
+        with mock.patch('core.views.event_views.TICKET_SECONDS', -1):
+            response = await self.async_client.get('/api/events/', {'ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_stream_requires_a_token(self):
+        response = await self.async_client.get('/api/events/', {'ticket': 'invalid'})
+        self.assertEqual(response.status_code, 401)
+
+        # The bare ASGI path used in production answers the same way
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/api/events/', 'query_string': b'ticket=invalid',
+            'headers': [(b'origin', b'http://localhost:5173')], 'root_path': '',
+        }
+        await EventStreamRouter(None)(scope, receive, send)
+        self.assertEqual(messages[0]['status'], 401)
+        self.assertIn((b'access-control-allow-origin', b'*'), messages[0]['headers'])
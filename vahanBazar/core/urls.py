@@ -4,14 +4,20 @@ from .views.auth_views import RegisterView, LoginView
 from core.views.dealer_views import (
     DealerProfileView,
     DealerBranchViewSet,
-    DealerDashboardView
+    DealerDashboardView,
+    DealerCatalogueImportView
 )
 from .views.brand_views import BrandViewSet
 from .views.vehicle_views import VehicleModelViewSet
-from .views.image_views import ImageUploadView
+from .views.image_views import ImageUploadView, UploadSessionViewSet
 from .views.wishlist_views import WishlistViewSet
 from .views.user_views import UserProfileView
-from .views.book_view import BookingViewSet
+from .views.notification_views import NotificationDetailView, NotificationListView, PriceAlertSettingView
+from .views.book_view import BookingViewSet, SlotAvailabilityView
+from .views.comapre_view import CompareAPIView
+from .views.cache_views import CacheStatsView
+from .views.job_views import JobStatsView
+from .views.event_views import EventStreamView, StreamTicketView
 
 router = DefaultRouter()
 router.register(r'brands', BrandViewSet)
@@ -19,15 +25,20 @@ router.register(r'vehicles', VehicleModelViewSet)
 router.register(r'dealer/branches', DealerBranchViewSet, basename='dealer-branches')
 router.register(r'wishlist', WishlistViewSet, basename='wishlist')
 router.register(r'bookings', BookingViewSet, basename='bookings')
+router.register(r'uploads', UploadSessionViewSet, basename='uploads')
 
 
 dealer_urlpatterns = [
     path('profile/', DealerProfileView.as_view(), name='dealer-profile'),
     path('dashboard/', DealerDashboardView.as_view(), name='dealer-dashboard'),
+    path('import/', DealerCatalogueImportView.as_view(), name='dealer-import'),
 ]
 
 account_urlpatterns = [
     path('profile/', UserProfileView.as_view(), name='user-profile'),
+    path('notifications/', NotificationListView.as_view(), name='user-notifications'),
+    path('notifications/<int:pk>/', NotificationDetailView.as_view(), name='user-notification'),
+    path('price-alerts/', PriceAlertSettingView.as_view(), name='user-price-alerts'),
 ]
 
 urlpatterns = [
@@ -36,5 +47,11 @@ urlpatterns = [
     path('dealer/', include(dealer_urlpatterns)),
     path('account/', include(account_urlpatterns)),
     path('upload-image/', ImageUploadView.as_view(), name='upload-image'),
+    path('compare/', CompareAPIView.as_view(), name='compare'),
+    path('branches/<int:branch_id>/availability/', SlotAvailabilityView.as_view(), name='branch-availability'),
+    path('events/', EventStreamView.as_view(), name='event-stream'),
+    path('events/ticket/', StreamTicketView.as_view(), name='event-stream-ticket'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('jobs/stats/', JobStatsView.as_view(), name='job-stats'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
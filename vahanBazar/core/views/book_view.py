@@ -1,15 +1,36 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from ..models import Booking, Branch
 from ..serializers.booking_serializers import BookingSerializer
-from rest_framework.permissions import IsAuthenticated
+from ..services.slot_service import availability, move_booking_slot, reserve_for_booking
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from .mixins import ConditionalGetMixin
 
-class BookingViewSet(viewsets.ModelViewSet):
+class BookingViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [IsAuthenticated]
+    # Bookings show their branch and inventory item names
+    etag_scopes = ('bookings', 'branches', 'inventory', 'vehicles')
 
     def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+        # The slot reservation commits or rolls back with the booking
+        with transaction.atomic():
+            slot = reserve_for_booking(serializer.validated_data)
+            serializer.save(user=self.request.user, slot=slot)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            slot = move_booking_slot(serializer.instance, serializer.validated_data)
+            serializer.save(slot=slot)
 
     def get_queryset(self):
         user = self.request.user
@@ -23,4 +44,30 @@ class BookingViewSet(viewsets.ModelViewSet):
             except AttributeError:
                 # Handle cases where user is not a dealer or has no dealership
                 pass
-        return Booking.objects.filter(user=user)
\ No newline at end of file
+        return Booking.objects.filter(user=user)
+
+
+class SlotAvailabilityView(APIView):
+    """Open test-ride slots of a branch, ?start=YYYY-MM-DD&end=YYYY-MM-DD (default: the next 7 days)."""
+    permission_classes = [AllowAny]
+
+    def get(self, request, branch_id):
+        branch = get_object_or_404(Branch, pk=branch_id)
+        start = self.parse_day('start', timezone.localdate())
+        end = self.parse_day('end', start + timedelta(days=6))
+        data = availability(branch.pk, start, end)
+        if data is None:
+            return Response({"error": "This branch does not take slot bookings"}, status=404)
+        return Response(data)
+
+    def parse_day(self, name, default):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return default
+        try:
+            day = parse_date(value)
+        except ValueError:
+            day = None
+        if day is None:
+            raise ValidationError({name: "Use YYYY-MM-DD"})
+        return day
@@ -3,11 +3,19 @@ from django_filters.rest_framework import DjangoFilterBackend
 from ..models import Brand, VehicleModel
 from core.serializers.main_serializers import BrandSerializer, VehicleModelSerializer
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from .mixins import ConditionalGetMixin, cache_response
 
-class BrandViewSet(viewsets.ModelViewSet):
+class BrandViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Brand.objects.all()
     serializer_class = BrandSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    etag_scopes = ('brands',)
+    # Brands carry no timestamp; the highest id stands in for it
+    etag_date_field = 'pk'
+
+    @cache_response('brands')
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
 class VehicleModelViewSet(viewsets.ModelViewSet):
     queryset = VehicleModel.objects.all()
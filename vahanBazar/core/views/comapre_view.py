@@ -1,24 +1,34 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from ..models import InventoryItem
+from rest_framework.exceptions import NotFound, ValidationError
+from ..services.compare_service import compare
+
 
 class CompareAPIView(APIView):
+    """
+    Compare up to `max_items` vehicles, variants and inventory items side by
+    side: ?vehicles=1,2&variants=5&inventory=9
+    """
+    max_items = 6
+    params = (('vehicles', 'vehicle'), ('variants', 'variant'), ('inventory', 'inventory'))
+
     def get(self, request):
-        v1_id = request.query_params.get('v1')
-        v2_id = request.query_params.get('v2')
-        v1 = InventoryItem.objects.get(pk=v1_id)
-        v2 = InventoryItem.objects.get(pk=v2_id)
+        refs = []
+        for param, kind in self.params:
+            raw = request.query_params.get(param, '')
+            try:
+                refs += [(kind, int(pk)) for pk in raw.split(',') if pk.strip()]
+            except ValueError:
+                raise ValidationError({param: "Must be a comma separated list of integers"})
 
-        # simplified diff
-        diff_fields = []
-        for field in ['price', 'vehicle_model__mileage', 'vehicle_model__fuel_type']:
-            val1 = getattr(v1.vehicle_model, field.split('__')[-1], None)
-            val2 = getattr(v2.vehicle_model, field.split('__')[-1], None)
-            if val1 != val2:
-                diff_fields.append(field)
+        # ?vehicles=1,1 is one item
+        refs = list(dict.fromkeys(refs))
+        if len(refs) < 2:
+            raise ValidationError({"non_field_errors": ["Select at least two items to compare"]})
+        if len(refs) > self.max_items:
+            raise ValidationError({"non_field_errors": [f"At most {self.max_items} items can be compared"]})
 
-        return Response({
-            'left': {'id': v1.id, 'name': v1.vehicle_model.name, 'price': v1.price},
-            'right': {'id': v2.id, 'name': v2.vehicle_model.name, 'price': v2.price},
-            'differences': diff_fields
-        })
+        table = compare(refs)
+        if table is None:
+            raise NotFound("One or more items to compare do not exist")
+        return Response(table)
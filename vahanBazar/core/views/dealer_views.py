@@ -1,12 +1,17 @@
+from django.db import transaction
 from rest_framework import generics, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
-from core.models import User, Branch, VehicleModel, Booking
-from core.serializers.dealer_serializers import DealerProfileSerializer
+from core.models import User, Branch, BranchSlotConfig
+from core.serializers.dealer_serializers import CatalogueImportSerializer, DealerProfileSerializer
 from core.serializers.main_serializers import DealerBranchSerializer
+from core.serializers.slot_serializers import BranchSlotConfigSerializer
+from core.services.dashboard_service import SERIES_DAYS, get_dashboard
+from core.services.import_service import import_catalogue
+from core.services.rollup_service import WINDOWS
+from core.services.slot_service import generate_slots
 from rest_framework.response import Response
-from django.utils import timezone
-from datetime import timedelta
-from django.db import models
 
 class DealerDashboardView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
@@ -20,31 +25,35 @@ class DealerDashboardView(generics.GenericAPIView):
         if not dealership:
             return Response({"error": "Dealer has no dealership"}, status=404)
 
-        total_vehicles = VehicleModel.objects.filter(dealer=dealership).count()
-        new_vehicles = VehicleModel.objects.filter(dealer=dealership, type='NEW').count()
-        used_vehicles = VehicleModel.objects.filter(dealer=dealership, type='USED').count()
+        try:
+            days = int(request.query_params.get('days', SERIES_DAYS))
+        except ValueError:
+            days = None
+        if days not in WINDOWS:
+            return Response({"days": f"Must be one of {', '.join(map(str, WINDOWS))}"}, status=400)
 
-        branches = Branch.objects.filter(dealership=dealership)
-        total_bookings = Booking.objects.filter(branch__in=branches).count()
+        data = get_dashboard(dealership, days)
+        return Response(data)
 
-        # Vehicle added over last 30 days
-        thirty_days_ago = timezone.now() - timedelta(days=30)
-        vehicles_over_time = (
-            VehicleModel.objects.filter(dealer=dealership, added_on__gte=thirty_days_ago)
-            .extra(select={'date': 'date(added_on)'})
-            .values('date')
-            .annotate(count=models.Count('id'))
-            .order_by('date')
-        )
+class DealerCatalogueImportView(generics.GenericAPIView):
+    """Bulk-create the dealership's vehicles from a CSV or XLSX file"""
+    serializer_class = CatalogueImportSerializer
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
 
-        data = {
-            'total_vehicles': total_vehicles,
-            'new_vehicles': new_vehicles,
-            'used_vehicles': used_vehicles,
-            'total_bookings': total_bookings,
-            'vehicles_over_time': list(vehicles_over_time)
-        }
-        return Response(data)
+    def post(self, request, *args, **kwargs):
+        user = request.user
+        if not user.is_dealer:
+            return Response({"error": "User is not a dealer"}, status=403)
+        dealership = user.owned_dealerships.first()
+        if not dealership:
+            return Response({"error": "Dealer has no dealership"}, status=404)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        file = serializer.validated_data['file']
+        report = import_catalogue(dealership, file, file.name, dry_run=serializer.validated_data['dry_run'])
+        return Response(report)
 
 class DealerProfileView(generics.RetrieveUpdateAPIView):
     queryset = User.objects.all()
@@ -72,4 +81,29 @@ class DealerBranchViewSet(viewsets.ModelViewSet):
         if user.is_dealer and hasattr(user, 'owned_dealerships'):
             dealership = user.owned_dealerships.first()
             if dealership:
-                serializer.save(dealership=dealership)
\ No newline at end of file
+                serializer.save(dealership=dealership)
+
+    @action(detail=True, methods=['get', 'put'], url_path='slot-config')
+    def slot_config(self, request, pk=None):
+        """Test-ride schedule of the branch; saving it regenerates the upcoming slots."""
+        branch = self.get_object()
+        config = BranchSlotConfig.objects.filter(branch=branch).first()
+        if request.method == 'GET':
+            if config is None:
+                return Response({"error": "No slot schedule for this branch"}, status=404)
+            return Response(BranchSlotConfigSerializer(config).data)
+
+        serializer = BranchSlotConfigSerializer(config, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            config = serializer.save(branch=branch)
+            _, overbooked = generate_slots(config)
+        return Response({
+            **serializer.data,
+            # Slots a lower capacity left overbooked; their bookings are kept
+            'overbooked_slots': [
+                {'date': slot['date'], 'time': slot['start_time'].strftime('%H:%M'),
+                 'booked': slot['booked'], 'capacity': slot['capacity']}
+                for slot in overbooked
+            ],
+        })
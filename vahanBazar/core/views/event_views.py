@@ -0,0 +1,157 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.db.models import Max
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from core.models import Notification, User
+from core.services.event_service import get_broker
+
+KEEPALIVE_SECONDS = 20
+REPLAY_LIMIT = 100
+RETRY_MILLISECONDS = 3000
+# A stream ticket ends up in URLs and access logs, so it only opens a
+# stream for this long
+TICKET_SECONDS = 60
+TICKET_SALT = 'core.event-stream'
+
+
+def _query(function, *args):
+    close_old_connections()
+    try:
+        return function(*args)
+    finally:
+        close_old_connections()
+
+
+def run_query(function, *args):
+    """
+    Run a short DB read on the shared executor, with the connection handling
+    of a request around it. Thread-sensitive calls would run in the
+    request's own thread, whose connection stays open as long as the stream.
+    """
+    return sync_to_async(_query, thread_sensitive=False)(function, *args)
+
+
+def authenticate(request):
+    """
+    The user of the request's JWT, or None. Browsers' EventSource cannot
+    send headers, so it passes a stream ticket as ?ticket= instead.
+    """
+    if 'ticket' in request.GET:
+        return read_ticket(request.GET['ticket'])
+    auth = JWTAuthentication()
+    header = auth.get_header(request)
+    raw_token = auth.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def read_ticket(ticket):
+    try:
+        user_id = signing.loads(ticket, salt=TICKET_SALT, max_age=TICKET_SECONDS)
+    except signing.BadSignature:
+        return None
+    return User.objects.filter(pk=user_id, is_active=True).first()
+
+
+def latest_notification_id(user_id):
+    return Notification.objects.filter(user_id=user_id).aggregate(latest=Max('id'))['latest'] or 0
+
+
+def notifications_after(user_id, last_id):
+    return list(
+        Notification.objects.filter(user_id=user_id, id__gt=last_id)
+        .order_by('id').values('id', 'title', 'message', 'created_at')[:REPLAY_LIMIT]
+    )
+
+
+def format_event(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data, cls=DjangoJSONEncoder)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(user_id, last_id=None):
+    """
+    Server-sent events for one user until the client disconnects. A
+    "notification" message is only a wake-up: the rows after the last one
+    sent are read, so bulk alerts stay small on the bus. A reconnecting
+    client passes `last_id` (Last-Event-ID) and first gets what it missed;
+    otherwise the stream starts from the newest notification, read after
+    subscribing so nothing created in between is lost.
+    """
+    async with get_broker().subscribe(user_id) as queue:
+        pending = last_id is not None
+        if not pending:
+            last_id = await run_query(latest_notification_id, user_id)
+        yield f'retry: {RETRY_MILLISECONDS}\n\n'
+        while True:
+            if pending:
+                for row in await run_query(notifications_after, user_id, last_id):
+                    last_id = row['id']
+                    yield format_event('notification', row, event_id=row['id'])
+                pending = False
+            try:
+                message = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if message['event'] == 'notification':
+                pending = True
+            else:
+                yield format_event(message['event'], message['data'])
+
+
+async def open_stream(request):
+    """The event iterator for an authenticated request, or None."""
+    user = await run_query(authenticate, request)
+    if user is None:
+        return None
+    # ?last_event_id= for a client reconnecting with a fresh ticket, which
+    # means a new EventSource and no Last-Event-ID header
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id', '')
+    return event_stream(user.pk, int(last_event_id) if last_event_id.isdigit() else None)
+
+
+STREAM_HEADERS = {'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+UNAUTHORIZED = {"detail": "Authentication credentials were not provided or are invalid"}
+
+
+class EventStreamView(View):
+    """
+    Server-sent event stream of the user's new notifications and booking
+    status changes. Under ASGI, core.asgi serves this path without Django's
+    request handler, so an open stream costs a coroutine and no thread.
+    """
+
+    async def get(self, request):
+        stream = await open_stream(request)
+        if stream is None:
+            return JsonResponse(UNAUTHORIZED, status=401)
+        return StreamingHttpResponse(stream, headers=STREAM_HEADERS)
+
+
+class StreamTicketView(APIView):
+    """A short-lived ticket that opens the user's event stream as ?ticket=."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        return Response({
+            'ticket': signing.dumps(request.user.pk, salt=TICKET_SALT),
+            'expires_in': TICKET_SECONDS,
+        })
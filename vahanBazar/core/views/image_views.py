@@ -1,10 +1,20 @@
+import re
+
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
-import uuid
+from core.storage import blob_storage
+from core.serializers.upload_serializers import UploadSessionSerializer
+from core.services.upload_service import (
+    file_extension, finalize_upload, get_session, start_upload, stream_to_storage, write_chunk
+)
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
 
 class ImageUploadView(APIView):
     permission_classes = [IsAuthenticated]
@@ -14,11 +24,56 @@ class ImageUploadView(APIView):
             return Response({'error': 'No image file provided'}, status=status.HTTP_400_BAD_REQUEST)
 
         image_file = request.FILES['image']
-        file_ext = image_file.name.split('.')[-1]
-        filename = f'vehicles/{uuid.uuid4()}.{file_ext}'
+        file_ext = file_extension(image_file.name)
+
+        # Save the file; large uploads are already spooled to a temp file by
+        # Django and are copied to storage chunk by chunk
+        path = stream_to_storage(image_file, file_ext)
+        image_url = blob_storage().url(path)
+
+        return Response({'url': image_url}, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionViewSet(viewsets.ViewSet):
+    """
+    Resumable uploads for large images:
+
+    1. POST /uploads/ {filename, size, sha256?} starts a session.
+    2. PUT /uploads/<id>/ sends the next chunk as the raw body, with
+       `Content-Range: bytes <start>-<end>/<size>`; 409 means the offset
+       is wrong and GET /uploads/<id>/ tells where to resume.
+    3. POST /uploads/<id>/finalize/ moves the file into storage.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def create(self, request):
+        serializer = UploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = start_upload(request.user, **serializer.validated_data)
+        data = UploadSessionSerializer(session).data
+        data['chunk_size'] = settings.UPLOAD_CHUNK_SIZE
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return Response(UploadSessionSerializer(get_session(request.user, pk)).data)
+
+    def update(self, request, pk=None):
+        match = CONTENT_RANGE_RE.match(request.headers.get('Content-Range', ''))
+        if not match:
+            raise ValidationError({"Content-Range": "Expected 'bytes <start>-<end>/<size>'"})
+        start, end = int(match.group(1)), int(match.group(2))
+        length = end - start + 1
+        try:
+            content_length = int(request.headers.get('Content-Length') or 0)
+        except ValueError:
+            content_length = 0
+        if content_length != length:
+            raise ValidationError({"Content-Range": "Range length does not match the body"})
 
-        # Save the file
-        path = default_storage.save(filename, ContentFile(image_file.read()))
-        image_url = default_storage.url(path)
+        # Read the raw body stream; request.data would buffer the whole chunk
+        session = write_chunk(request.user, pk, start, length, request.stream)
+        return Response(UploadSessionSerializer(session).data)
 
-        return Response({'url': image_url}, status=status.HTTP_201_CREATED)
\ No newline at end of file
+    @action(detail=True, methods=['post'])
+    def finalize(self, request, pk=None):
+        return Response(UploadSessionSerializer(finalize_upload(request.user, pk)).data)
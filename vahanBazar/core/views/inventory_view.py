@@ -11,7 +11,7 @@ class InventoryItemViewSet(viewsets.ModelViewSet):
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['branch', 'vehicle_model_variant__vehicle_model__brand', 'price', 'status']
     search_fields = ['vehicle_model_variant__vehicle_model__name', 'vehicle_model_variant__vehicle_model__brand__name', 'branch__city']
-    ordering_fields = ['price', 'added_on']
+    ordering_fields = ['price', 'effective_price', 'added_on']
     permission_classes = [IsDealerStaff | IsAuthenticatedOrReadOnly]
 
     def perform_create(self, serializer):
@@ -0,0 +1,12 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser
+from core.services.job_service import job_stats
+
+
+class JobStatsView(APIView):
+    """Queue depth, lag and run counters per background job kind"""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(job_stats())
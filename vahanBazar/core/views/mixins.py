@@ -0,0 +1,105 @@
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework.response import Response
+
+from core.services.cache_service import RESPONSE_CACHES, get_versions, record_cache_event
+
+
+def not_modified_response(request, etag):
+    """A 304 if the client already holds `etag`, else None."""
+    if etag and get_conditional_response(request, etag=etag) is not None:
+        return Response(status=304, headers={'ETag': etag})
+    return None
+
+
+def cache_response(*scopes, timeout=60 * 15):
+    """
+    Cache a read action's response data under the current versions of
+    `scopes`. Scopes are formatted with the URL kwargs, e.g. 'vehicle:{pk}'.
+
+    Writes bump a scope's version (see core.signals), which changes the key,
+    so a stale entry is never read again and simply expires. Permission
+    checks still run on every request; only the queries and serialization
+    behind a 200 response are skipped.
+    """
+    def decorator(method):
+        name = method.__qualname__
+        RESPONSE_CACHES.add(name)
+
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            versions = get_versions(*(scope.format(**kwargs) for scope in scopes))
+            url_hash = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+            key = 'response:{}:{}:{}'.format(
+                name, url_hash, ':'.join(str(version) for version in versions.values())
+            )
+
+            cached = cache.get(key)
+            if cached is not None:
+                record_cache_event(name, hit=True)
+                data, etag = cached
+                return not_modified_response(request, etag) or Response(
+                    data, headers={'ETag': etag} if etag else None
+                )
+
+            record_cache_event(name, hit=False)
+            response = method(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, (response.data, response.get('ETag')), timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETags for list and detail reads, answered with 304 on a matching
+    If-None-Match before anything is serialized.
+
+    A list's validator is one aggregate over the filtered queryset (row count
+    and latest `etag_date_field`) plus the versions of `etag_scopes`, the
+    per-table change counters bumped by core.signals; the counters catch
+    updates that leave both the count and the dates alone. A detail's
+    validator is built from `etag_detail_scopes` alone and costs no query.
+    Scopes are formatted with the URL kwargs and `user_id`.
+    """
+    etag_scopes = ()
+    etag_detail_scopes = ()
+    etag_date_field = 'created_at'
+
+    def get_etag(self, request, scopes, *parts):
+        context = {**self.kwargs, 'user_id': request.user.pk}
+        versions = get_versions(*(scope.format(**context) for scope in scopes))
+        validator = repr((
+            self.basename, self.action, request.get_full_path(),
+            request.accepted_media_type, request.user.pk, sorted(versions.items()), parts,
+        ))
+        return quote_etag(hashlib.md5(validator.encode()).hexdigest())
+
+    def get_list_etag(self, request, queryset):
+        summary = (
+            queryset.order_by().select_related(None).prefetch_related(None)
+            .aggregate(count=Count('pk'), latest=Max(self.etag_date_field))
+        )
+        return self.get_etag(request, self.etag_scopes, summary['count'], str(summary['latest']))
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag(request, self.filter_queryset(self.get_queryset()))
+        response = not_modified_response(request, etag) or super().list(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.etag_detail_scopes:
+            return super().retrieve(request, *args, **kwargs)
+        etag = self.get_etag(request, self.etag_detail_scopes)
+        response = not_modified_response(request, etag) or super().retrieve(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+        return response
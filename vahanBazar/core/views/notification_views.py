@@ -0,0 +1,33 @@
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from core.models import Notification, PriceAlertSetting
+from core.serializers.notification_serializers import NotificationSerializer, PriceAlertSettingSerializer
+
+RECENT_NOTIFICATIONS = 100
+
+
+class NotificationListView(generics.ListAPIView):
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Notification.objects.filter(user=self.request.user).order_by('-created_at', '-id')[:RECENT_NOTIFICATIONS]
+
+
+class NotificationDetailView(generics.UpdateAPIView):
+    """Mark a notification as seen."""
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return Notification.objects.filter(user=self.request.user)
+
+
+class PriceAlertSettingView(generics.RetrieveUpdateAPIView):
+    """The user's price alert thresholds; the defaults until first saved."""
+    serializer_class = PriceAlertSettingSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_object(self):
+        setting = PriceAlertSetting.objects.filter(user=self.request.user).first()
+        return setting or PriceAlertSetting(user=self.request.user)
@@ -1,34 +1,58 @@
+import copy
 import logging
 import json
 from rest_framework import viewsets, filters, status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db import transaction
-from core.models import VehicleModel, Brand, VehicleModelVariant as Variant, VehicleImage, Dealership
+from core.models import VehicleModel, Brand, VehicleModelVariant as Variant, Dealership
 from core.serializers.vehicle_serializers import VehicleModelSerializer
 from core.serializers.brand_serializers import BrandSerializer
 from core.serializers.variant_serializers import VariantSerializer
 from core.permissions import IsDealerOrReadOnly
+from core.pagination import KeysetCursorPagination
+from core.filters import SpecFilterBackend, VehicleSearchFilter
+from core.services.facet_service import get_facet_counts
+from core.services.suggest_service import suggest
+from core.views.mixins import ConditionalGetMixin, cache_response
 
 # logger = logging.getLogger(__name__)
 
-class VehicleModelViewSet(viewsets.ModelViewSet):
+class VehicleModelViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = VehicleModel.objects.all()
     serializer_class = VehicleModelSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = (MultiPartParser, FormParser)
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['brand', 'category', 'status', 'is_featured', 'branch']
-    search_fields = ['name', 'brand__name']
-    ordering_fields = ['price', 'created_at', 'updated_at']
+    pagination_class = KeysetCursorPagination
+    filter_backends = [DjangoFilterBackend, SpecFilterBackend, filters.OrderingFilter, VehicleSearchFilter]
+    filterset_fields = ['brand', 'category', 'fuel_type', 'status', 'is_featured', 'branch', 'seller']
+    ordering_fields = ['price', 'effective_price', 'created_at']
     ordering = ['-created_at']  # Default ordering
+    max_batch_size = 50
+    etag_scopes = ('vehicles',)
+    # A detail embeds the names of its brand, dealer, branch and seller
+    etag_detail_scopes = ('vehicle:{pk}', 'brands', 'dealerships', 'branches', 'sellers')
+    # The query parameters that select within each search facet
+    facet_params = {
+        'brand': ('brand',),
+        'category': ('category',),
+        'fuel_type': ('fuel_type',),
+        'type': ('type',),
+        'price': ('min_effective_price', 'max_effective_price'),
+    }
 
     def get_queryset(self):
+        serializer_class = self.get_serializer_class()
+        fields = serializer_class.get_requested_fields(self.request)
         queryset = super().get_queryset()
+        if fields is not None:
+            # Sparse fieldset: cursor pagination still reads the sort key
+            queryset = queryset.only('created_at', 'price', 'effective_price')
+        queryset = serializer_class.setup_eager_loading(queryset, fields)
         
         # Price range filter
         min_price = self.request.query_params.get('min_price', None)
@@ -38,6 +62,15 @@ class VehicleModelViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(price__gte=min_price)
         if max_price is not None:
             queryset = queryset.filter(price__lte=max_price)
+
+        # Price after discount
+        min_effective_price = self.request.query_params.get('min_effective_price', None)
+        max_effective_price = self.request.query_params.get('max_effective_price', None)
+
+        if min_effective_price is not None:
+            queryset = queryset.filter(effective_price__gte=min_effective_price)
+        if max_effective_price is not None:
+            queryset = queryset.filter(effective_price__lte=max_effective_price)
             
         # Stock filter
         in_stock = self.request.query_params.get('in_stock', None)
@@ -62,6 +95,10 @@ class VehicleModelViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    @cache_response(*etag_detail_scopes)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         try:
             with transaction.atomic():
@@ -189,12 +226,9 @@ class VehicleModelViewSet(viewsets.ModelViewSet):
 
                 data = json.loads(data)  # Parse the JSON string
 
-                # Handle image uploads
+                # Handle image uploads: new files, plus an optional ordered
+                # list of kept/new images (see image_service.replace_images)
                 images = request.FILES.getlist('images')
-                if not images or len(images) < 3:
-                    raise ValidationError({
-                        "images": "At least 3 images are required"
-                    })
 
                 # Handle user authentication and vehicle type
                 user = request.user
@@ -239,6 +273,7 @@ class VehicleModelViewSet(viewsets.ModelViewSet):
                 
                 data['brand'] = brand_id
                 context['images'] = images
+                context['image_entries'] = data.pop('images', None)
                 # Create vehicle model
                 serializer = self.get_serializer(instance=self.get_object(), data=data, context=context)
                 serializer.is_valid(raise_exception=True)
@@ -267,14 +302,6 @@ class VehicleModelViewSet(viewsets.ModelViewSet):
                             "variant": f"Variant with ID {variant_data} does not exist"
                         })
 
-                # Handle image uploads
-                vehicle.images.all().delete()
-                for image in images:
-                    vehicle_image = VehicleImage.objects.create(
-                        vehicle=vehicle,
-                        image=image
-                    )
-
                 # Add image URLs to response data
                 response_data = serializer.data
 
@@ -329,14 +356,98 @@ class VehicleModelViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def dealer_vehicles(self, request):
         """Get all vehicles for the authenticated dealer"""
-        dealer = request.user.dealer
-        queryset = self.get_queryset().filter(dealer=dealer)
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        dealer = request.user.owned_dealerships.first()
+        if dealer is None:
+            # filter(dealer=None) would list every private seller's vehicles
+            raise PermissionDenied("You do not own a dealership")
+        queryset = self.filter_queryset(self.get_queryset()).filter(dealer=dealer)
+        return self.list_response(queryset)
 
     @action(detail=False, methods=['get'])
+    @cache_response('vehicles')
     def featured(self, request):
         """Get featured vehicles"""
-        queryset = self.get_queryset().filter(is_featured=True)
+        queryset = self.filter_queryset(self.get_queryset()).filter(is_featured=True)
+        return self.list_response(queryset)
+
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Get a page of filtered vehicles together with facet counts"""
+        queryset = self.filter_queryset(self.get_queryset())
+        facet_querysets = {
+            facet: self.filter_queryset_without(params)
+            for facet, params in self.facet_params.items()
+            if any(param in request.query_params for param in params)
+        }
+        # Buckets follow what the buyer pays, not the list price
+        facets = get_facet_counts(queryset, price_field='effective_price', facet_querysets=facet_querysets)
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data['total'] = queryset.order_by().count()
+        response.data['facets'] = facets
+        return response
+
+    def filter_queryset_without(self, params):
+        """The filtered queryset as if the query string did not have `params`."""
+        request = self.request
+        query = request.query_params.copy()
+        for param in params:
+            query.pop(param, None)
+        # get_queryset and the filter backends all read self.request
+        self.request = copy.copy(request)
+        self.request._request = copy.copy(request._request)
+        self.request._request.GET = query
+        try:
+            return self.filter_queryset(self.get_queryset())
+        finally:
+            self.request = request
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny], authentication_classes=[])
+    def suggest(self, request):
+        """Get brand, model and variant suggestions for a search prefix"""
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 25)
+        except ValueError:
+            limit = 10
+        return Response(suggest(request.query_params.get('q', ''), limit))
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """Get several vehicles by id, in the order requested"""
+        try:
+            ids = [int(pk) for pk in request.query_params.get('ids', '').split(',') if pk.strip()]
+        except ValueError:
+            raise ValidationError({"ids": "ids must be a comma separated list of integers"})
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > self.max_batch_size:
+            raise ValidationError({"ids": f"At most {self.max_batch_size} vehicles can be fetched at once"})
+
+        vehicles = {vehicle.id: vehicle for vehicle in self.get_queryset().filter(id__in=ids)}
+        serializer = self.get_serializer([vehicles[pk] for pk in ids if pk in vehicles], many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'], url_path='options')
+    def picker_options(self, request):
+        """Get id, name and brand of every vehicle for pickers and dropdowns"""
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .select_related(None)
+            .prefetch_related(None)
+            .order_by('name', 'id')
+            .values_list('id', 'name', 'brand__name')
+        )
+        return Response([
+            {'id': vehicle_id, 'name': name, 'brand': brand_name}
+            for vehicle_id, name, brand_name in queryset
+        ])
+
+    def list_response(self, queryset):
+        """Serialize a queryset as one cursor page"""
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
\ No newline at end of file
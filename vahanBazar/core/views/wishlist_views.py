@@ -1,15 +1,24 @@
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from core.models import WishlistItem
-from core.serializers.wishlist_serializers import WishlistItemSerializer
+from core.serializers.wishlist_serializers import WishlistBatchSerializer, WishlistItemSerializer
+from core.services.wishlist_service import (
+    add_to_wishlist, remove_from_wishlist, wishlist_bitmap, wishlist_ids
+)
+from core.views.mixins import ConditionalGetMixin, not_modified_response
 
-class WishlistViewSet(viewsets.ModelViewSet):
+class WishlistViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = WishlistItemSerializer
     permission_classes = [IsAuthenticated]
+    etag_scopes = ('wishlist:{user_id}', 'vehicles')
+    etag_date_field = 'added_at'
 
     def get_queryset(self):
-        return WishlistItem.objects.filter(user=self.request.user)
+        queryset = WishlistItem.objects.filter(user=self.request.user)
+        return self.get_serializer_class().setup_eager_loading(queryset)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -20,3 +29,34 @@ class WishlistViewSet(viewsets.ModelViewSet):
             return Response(status=status.HTTP_403_FORBIDDEN)
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
+
+    @action(detail=False, methods=['get'])
+    def ids(self, request):
+        """
+        Saved vehicle ids only, or with ?start=&end= a membership bitmap of
+        that id range. The ETag comes from the wishlist version alone, so a
+        revalidation costs no query.
+        """
+        etag = self.get_etag(request, ('wishlist:{user_id}',))
+        response = not_modified_response(request, etag)
+        if response is None:
+            if 'start' in request.query_params or 'end' in request.query_params:
+                try:
+                    start = int(request.query_params['start'])
+                    end = int(request.query_params['end'])
+                except (KeyError, ValueError):
+                    raise ValidationError({"start": "Pass both start and end as integers"})
+                response = Response(wishlist_bitmap(request.user, start, end))
+            else:
+                response = Response({'ids': wishlist_ids(request.user)})
+        response['ETag'] = etag
+        return response
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Add and remove several vehicles at once, e.g. to sync a saved list."""
+        serializer = WishlistBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        added = add_to_wishlist(request.user, serializer.validated_data['add'])
+        removed = remove_from_wishlist(request.user, serializer.validated_data['remove'])
+        return Response({'added': added, 'removed': removed})
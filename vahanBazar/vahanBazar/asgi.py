@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vahanBazar.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from core.asgi import EventStreamRouter  # noqa: E402 (needs the app registry)
+
+# /api/events/ (live notifications) is served without Django's request
+# handler so open streams hold no threads; see core.asgi
+application = EventStreamRouter(django_application)
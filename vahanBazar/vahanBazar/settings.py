@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'core',
     'django_filters',
@@ -59,12 +60,57 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Opt in to the orjson-backed JSON renderer and parser (stdlib json when
+# orjson is not installed); measure the gain first with
+# `python manage.py benchmark_json`
+USE_FAST_JSON = False
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer' if USE_FAST_JSON else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.parsers.FastJSONParser' if USE_FAST_JSON else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Spec keys normalised to numbers in VehicleModel.spec_index, each backed by an
+# expression index so range filters (?spec__engine_cc__gte=150) avoid a
+# sequential scan. Maps a filter slug to the spec keys it is read from, in
+# priority order. Changing this needs `makemigrations` to update the indexes.
+SPEC_NUMERIC_KEYS = {
+    'engine_cc': ['Displacement (cc)', 'Displacement', 'Engine CC', 'Engine'],
+    'mileage': ['Mileage'],
+    'range': ['Range'],
+    'top_speed': ['Top Speed', 'Max Speed'],
+    'power': ['Power', 'Motor Power'],
+    'kerb_weight': ['Kerb Weight'],
+}
+
+# Response and comparison caches are invalidated by bumping version keys, so
+# every worker must share one cache: the database cache by default (run
+# `python manage.py createcachetable` once). Redis is faster, e.g.
+#   'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#   'LOCATION': 'redis://127.0.0.1:6379',
+# Local memory is only correct for a single process.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'vahanbazar_cache',
+    }
+}
+
+# Seconds before a worker rebuilds its in-memory autocomplete index, in a
+# background thread. Committed writes keep the writing process current; this
+# bounds staleness in the others.
+SUGGEST_INDEX_TTL = 300
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
@@ -152,6 +198,36 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = Path.joinpath(BASE_DIR / 'media')
 
+# "blobs" stores each distinct file once under its content hash (vehicle
+# images and uploads); see core.storage
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'blobs': {'BACKEND': 'core.storage.ContentAddressedStorage'},
+}
+
+# Resumable uploads: partial files live here until finalized (must be shared
+# by all workers), chunks are capped at UPLOAD_CHUNK_SIZE bytes
+UPLOAD_SESSION_DIR = BASE_DIR / 'upload_sessions'
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+UPLOAD_MAX_SIZE = 50 * 1024 * 1024
+# Unfinished sessions older than this many hours are removed by cleanup_uploads
+UPLOAD_SESSION_TTL_HOURS = 24
+
+# Pub/sub behind the live event stream (/api/events/), over PostgreSQL
+# LISTEN/NOTIFY so events published by runworker or other server processes
+# reach every stream. 'core.services.event_service.LocalBroker' only reaches
+# streams in the publishing process: a single process with JOB_QUEUE_EAGER
+EVENT_BROKER = 'core.services.event_service.PostgresBroker'
+
+# Background jobs (renditions, price alerts) are stored in the database and
+# run by `manage.py runworker`. Eager mode runs each job inline once the
+# enqueueing transaction commits instead (tests, one-off scripts)
+JOB_QUEUE_EAGER = False
+JOB_MAX_ATTEMPTS = 5
+# A job RUNNING for longer than this is assumed to have lost its worker
+JOB_TIMEOUT_SECONDS = 15 * 60
+
 # Logging configuration
 LOGGING = {
     'version': 1,
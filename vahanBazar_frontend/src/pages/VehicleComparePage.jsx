@@ -13,7 +13,7 @@ const VehicleComparePage = () => {
   useEffect(() => {
     const fetchVehicles = async () => {
       try {
-        const response = await axios.get(`${API_BASE_URL}/vehicles/`, {
+        const response = await axios.get(`${API_BASE_URL}/vehicles/options/`, {
           headers: {
             'Authorization': `Bearer ${localStorage.getItem('accessToken')}`
           }
@@ -21,8 +21,7 @@ const VehicleComparePage = () => {
         const options = response.data.map(vehicle => ({
           value: vehicle.id,
           label: vehicle.name,
-          category: vehicle.category,
-          image: vehicle.images.length > 0 ? vehicle.images[0].image : null
+          brand: vehicle.brand
         }));
         setAllVehicles(options);
       } catch (error) {
@@ -36,20 +35,15 @@ const VehicleComparePage = () => {
     const fetchVehicleDetails = async () => {
       setLoading(true);
       try {
-        const newVehicleDetails = await Promise.all(
-          selectedVehicles.map(async (vehicle) => {
-            if (vehicle) {
-              const response = await axios.get(`${API_BASE_URL}/vehicles/${vehicle.value}/`, {
-                headers: {
-                  'Authorization': `Bearer ${localStorage.getItem('accessToken')}`
-                }
-              });
-              return response.data;
-            }
-            return null;
-          })
-        );
-        setVehicleDetails(newVehicleDetails);
+        const ids = selectedVehicles.filter(v => v).map(v => v.value);
+        const response = await axios.get(`${API_BASE_URL}/vehicles/batch/`, {
+          params: { ids: ids.join(',') },
+          headers: {
+            'Authorization': `Bearer ${localStorage.getItem('accessToken')}`
+          }
+        });
+        const byId = Object.fromEntries(response.data.map(vehicle => [vehicle.id, vehicle]));
+        setVehicleDetails(selectedVehicles.map(vehicle => (vehicle ? byId[vehicle.value] || null : null)));
       } catch (error) {
         console.error('Error fetching vehicle details:', error);
       } finally {
@@ -120,7 +114,7 @@ const VehicleComparePage = () => {
             </div>
             {selectedVehicles[index] ? (
               <div className="text-center">
-                <img src={selectedVehicles[index].image || 'https://via.placeholder.com/150'} alt={selectedVehicles[index].label} className="w-48 h-48 object-contain mb-4 rounded-md"/>
+                <img src={vehicleDetails[index]?.images?.[0]?.image || 'https://via.placeholder.com/150'} alt={selectedVehicles[index].label} className="w-48 h-48 object-contain mb-4 rounded-md"/>
                 <h3 className="text-lg font-semibold text-gray-700">{selectedVehicles[index].label}</h3>
               </div>
             ) : (
@@ -9,9 +9,10 @@ import useDebounce from '../hooks/useDebounce';
 const API_BASE_URL = 'http://localhost:8000/api';
 
 // API functions
-const fetchVehicles = async (type) => {
-  let url = `${API_BASE_URL}/vehicles/`;
-  if (type) {
+// Returns one page, { results, next }; pass `next` back to get the following one
+const fetchVehicles = async (type, pageUrl) => {
+  let url = pageUrl || `${API_BASE_URL}/vehicles/`;
+  if (!pageUrl && type) {
     url += `?type=${type}`;
   }
   const response = await axios.get(url, {
@@ -28,10 +29,10 @@ const fetchBrands = async () => {
 };
 
 const fetchWishlist = async () => {
-    const response = await axios.get(`${API_BASE_URL}/wishlist/`, {
+    const response = await axios.get(`${API_BASE_URL}/wishlist/ids/`, {
         headers: { 'Authorization': `Bearer ${localStorage.getItem('accessToken')}` }
     });
-    return response.data;
+    return response.data.ids;
 }
 
 const VehicleListingPage = () => {
@@ -40,6 +41,8 @@ const VehicleListingPage = () => {
   const typeFromUrl = searchParams.get('type');
 
   const [vehicles, setVehicles] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [brands, setBrands] = useState([]);
   const [loading, setLoading] = useState(true);
   const [filters, setFilters] = useState({
@@ -72,7 +75,8 @@ const VehicleListingPage = () => {
             fetchBrands(),
             fetchWishlist()
         ]);
-        setVehicles(vehiclesData);
+        setVehicles(vehiclesData.results);
+        setNextPage(vehiclesData.next);
         setBrands(brandsData);
         setWishlist(wishlistData);
       } catch (error) {
@@ -90,6 +94,19 @@ const VehicleListingPage = () => {
     setFilters(prev => ({ ...prev, type: typeFromUrl || '' }));
   }, [location.search]);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await fetchVehicles(typeFromUrl, nextPage);
+      setVehicles(prev => [...prev, ...page.results]);
+      setNextPage(page.next);
+    } catch (error) {
+      console.error('Error fetching vehicles:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const vehicleCategories = ['BIKE', 'SCOOTER', 'EV'];
   const fuelTypes = ['Petrol', 'Electric', 'Hybrid'];
   const colors = ['Black', 'Red', 'Blue', 'White', 'Silver', 'Green', 'Orange', 'Yellow'];
@@ -127,18 +144,11 @@ const VehicleListingPage = () => {
   };
 
   const handleWishlistToggle = async (vehicleId) => {
-    const wishlistItem = wishlist.find(item => item.vehicle.id === vehicleId);
-    if (wishlistItem) {
-      await axios.delete(`${API_BASE_URL}/wishlist/${wishlistItem.id}/`, {
-        headers: { 'Authorization': `Bearer ${localStorage.getItem('accessToken')}` }
-      });
-      setWishlist(prev => prev.filter(item => item.id !== wishlistItem.id));
-    } else {
-      const response = await axios.post(`${API_BASE_URL}/wishlist/`, { vehicle_id: vehicleId }, {
-        headers: { 'Authorization': `Bearer ${localStorage.getItem('accessToken')}` }
-      });
-      setWishlist(prev => [...prev, response.data]);
-    }
+    const isSaved = wishlist.includes(vehicleId);
+    await axios.post(`${API_BASE_URL}/wishlist/batch/`, isSaved ? { remove: [vehicleId] } : { add: [vehicleId] }, {
+      headers: { 'Authorization': `Bearer ${localStorage.getItem('accessToken')}` }
+    });
+    setWishlist(prev => isSaved ? prev.filter(id => id !== vehicleId) : [...prev, vehicleId]);
   };
 
   const filteredVehicles = useMemo(() => {
@@ -331,10 +341,10 @@ const VehicleListingPage = () => {
           ) : sortedVehicles.length > 0 ? (
             <div className="grid grid-cols-1 md:!grid-cols-2 xl:!grid-cols-3 gap-8">
               {sortedVehicles.map((vehicle) => (
-                <VehicleCard key={vehicle.id} vehicle={vehicle} onWishlistToggle={handleWishlistToggle} isWishlisted={wishlist.some(item => item.vehicle.id === vehicle.id)} />
+                <VehicleCard key={vehicle.id} vehicle={vehicle} onWishlistToggle={handleWishlistToggle} isWishlisted={wishlist.includes(vehicle.id)} />
               ))}
             </div>
-          ) : (
+          ) : !nextPage ? (
             <div className="text-center py-20">
               <h2 className="text-2xl font-semibold text-gray-700">No Vehicles Found</h2>
               <p className="text-gray-500 mt-2">Try adjusting your filters to find what you're looking for.</p>
@@ -342,6 +352,14 @@ const VehicleListingPage = () => {
                 Clear All Filters
               </button>
             </div>
+          ) : null}
+
+          {!loading && nextPage && (
+            <div className="flex justify-center mt-10">
+              <button onClick={loadMore} disabled={loadingMore} className="bg-blue-600 text-white font-bold py-3 px-6 rounded-lg hover:bg-blue-700 transition-colors disabled:opacity-60">
+                {loadingMore ? 'Loading...' : 'Load More Vehicles'}
+              </button>
+            </div>
           )}
         </div>
       </main>
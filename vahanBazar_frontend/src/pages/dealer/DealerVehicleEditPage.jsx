@@ -530,6 +530,7 @@ const EditVehiclePage = () => {
 
         // Set images
         setImages(vehicleData.images.map(img => ({
+          id: img.id,
           url: img.image,
           name: img.image.split('/').pop(),
           existingImage: true
@@ -706,26 +707,17 @@ const EditVehiclePage = () => {
         loan_option: formData.type === 'USED' ? formData.loan_option : false,
         approved: formData.type === 'USED' ? formData.approved : false,
       };
+      // Existing images are referenced by id, so only new files are uploaded
+      // and a reorder never re-sends any image data
+      let uploadIndex = 0;
+      vehicleData.images = images.map(image => (
+        image.file ? { upload: uploadIndex++ } : { id: image.id }
+      ));
       const finalFormData = new FormData();
       finalFormData.append('data', JSON.stringify(vehicleData));
-      console.log(images)
-      // Convert existing images (with existingImage: true) to File objects if needed
       for (const image of images) {
         if (image.file) {
-          // New image uploaded by user
           finalFormData.append('images', image.file);
-        } else if (image.existingImage && image.url) {
-          // Existing image from DB, fetch and convert to File
-          try {
-        const response = await fetch(image.url);
-        const blob = await response.blob();
-        // Use original name if available, otherwise fallback
-        const fileName = image.name || image.url.split('/').pop() || 'image.jpg';
-        const file = new File([blob], fileName, { type: blob.type });
-        finalFormData.append('images', file);
-          } catch (err) {
-        console.error('Failed to fetch existing image:', image.url, err);
-          }
         }
       }
       if (id) {
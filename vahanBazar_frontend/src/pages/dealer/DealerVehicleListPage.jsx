@@ -12,6 +12,8 @@ import DealerVehicleCard from '../../components/DealerVehicleCard';
 const DealerVehicleListPage = () => {
   const navigate = useNavigate();
   const [vehicles, setVehicles] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [typeFilter, setTypeFilter] = useState('NEW');
@@ -60,7 +62,8 @@ const DealerVehicleListPage = () => {
         }
 
         const data = await response.json();
-        setVehicles(data);
+        setVehicles(data.results);
+        setNextPage(data.next);
       } catch (err) {
         setError(err.message);
       } finally {
@@ -71,6 +74,27 @@ const DealerVehicleListPage = () => {
     fetchVehicles();
   }, [typeFilter, brandFilter, statusFilter, searchQuery]);
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const response = await fetch(nextPage, {
+        headers: {
+          'Authorization': `Bearer ${localStorage.getItem('accessToken')}`,
+        },
+      });
+      if (!response.ok) {
+        throw new Error('Failed to fetch vehicles');
+      }
+      const data = await response.json();
+      setVehicles(prev => [...prev, ...data.results]);
+      setNextPage(data.next);
+    } catch (err) {
+      setError(err.message);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   // Simple local filtering for search
   const filteredVehicles = vehicles.filter(vehicle => {
     if (!searchQuery) return true;
@@ -312,6 +336,18 @@ const DealerVehicleListPage = () => {
                 ))}
               </div>
             )}
+
+            {nextPage && (
+              <div className="flex justify-center mt-8">
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="px-4 py-2 bg-blue-600 text-white rounded-lg font-semibold hover:bg-blue-700 transition-colors duration-200 disabled:opacity-60"
+                >
+                  {loadingMore ? 'Loading...' : 'Load More'}
+                </button>
+              </div>
+            )}
           </>
         )}
       </div>
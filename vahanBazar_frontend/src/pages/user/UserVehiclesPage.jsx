@@ -26,10 +26,16 @@ const UserVehiclesPage = () => {
     const fetchVehicles = async () => {
       setLoading(true);
       try {
-        const response = await axios.get(`${API_BASE_URL}/vehicles/?type=USED`, {
-          headers: { 'Authorization': `Bearer ${localStorage.getItem('accessToken')}` }
-        });
-        const userVehicles = response.data.filter(v => v.seller?.id === user.id);
+        // Only this user's listings, one cursor page at a time
+        const userVehicles = [];
+        let url = `${API_BASE_URL}/vehicles/?type=USED&seller=${user.id}`;
+        while (url) {
+          const response = await axios.get(url, {
+            headers: { 'Authorization': `Bearer ${localStorage.getItem('accessToken')}` }
+          });
+          userVehicles.push(...response.data.results);
+          url = response.data.next;
+        }
         setVehicles(userVehicles);
       } catch (err) {
         setError('Failed to fetch vehicles.');